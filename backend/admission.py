@@ -0,0 +1,224 @@
+"""Host-level admission control for new bot sessions."""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+from metrics import Histogram
+
+# Upper bounds in seconds for the time requests wait for admission
+WAIT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def read_memory_percent() -> float | None:
+    """Return the percentage of host memory in use, from /proc/meminfo."""
+    try:
+        with open("/proc/meminfo") as f:
+            meminfo = {
+                line.split(":")[0]: int(line.split()[1]) for line in f if ":" in line
+            }
+        return 100 * (1 - meminfo["MemAvailable"] / meminfo["MemTotal"])
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+
+class HostCPUMonitor:
+    """Host CPU utilisation since the previous reading, from /proc/stat.
+
+    Falls back to the one-minute load average per core where /proc is missing.
+    """
+
+    def __init__(self):
+        self._previous: tuple[int, int] | None = None
+
+    def read_percent(self) -> float | None:
+        try:
+            with open("/proc/stat") as f:
+                values = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            if hasattr(os, "getloadavg"):
+                return 100 * os.getloadavg()[0] / (os.cpu_count() or 1)
+            return None
+
+        # idle + iowait count as not busy
+        total, idle = sum(values), values[3] + values[4]
+        previous, self._previous = self._previous, (total, idle)
+        if previous is None or total == previous[0]:
+            return None
+        return 100 * (1 - (idle - previous[1]) / (total - previous[0]))
+
+
+@dataclass
+class Ticket:
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    admitted_at: float | None = None
+    admitted: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class AdmissionController:
+    """Admits new sessions only while the host has headroom.
+
+    Requests wait in a bounded FIFO queue. A dispatcher admits the head of the
+    queue while running plus admitted-but-unlaunched sessions stay under
+    `max_bots`, and host CPU and memory stay under their limits. Tickets that
+    are not polled within `ticket_ttl` seconds are dropped, so abandoned
+    clients do not hold a place in the queue or an admitted slot.
+    """
+
+    def __init__(
+        self,
+        running_bots: Callable[[], int],
+        max_bots: int = 50,
+        max_cpu_percent: float = 85.0,
+        max_memory_percent: float = 85.0,
+        max_queue: int = 20,
+        ticket_ttl: float = 30.0,
+        poll_interval: float = 1.0,
+    ):
+        self.running_bots = running_bots
+        self.max_bots = max_bots
+        self.max_cpu_percent = max_cpu_percent
+        self.max_memory_percent = max_memory_percent
+        self.max_queue = max_queue
+        self.ticket_ttl = ticket_ttl
+        self.poll_interval = poll_interval
+        self.queue: OrderedDict[str, Ticket] = OrderedDict()
+        self.cpu_monitor = HostCPUMonitor()
+        self.cpu_percent: float | None = None
+        self.memory_percent: float | None = None
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.expired_total = 0
+        self.wait_seconds_total = 0.0
+        self.recent_waits: deque[float] = deque(maxlen=200)
+        self.wait_seconds = Histogram(WAIT_BUCKETS)
+        self._wakeup = asyncio.Event()
+        self._dispatch_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        if self._dispatch_task:
+            self._dispatch_task.cancel()
+
+    def enqueue(self) -> Ticket:
+        """Queue a new request, raising QueueFullError when the queue is full."""
+        if len(self.queue) >= self.max_queue:
+            self.rejected_total += 1
+            raise QueueFullError(f"Admission queue full ({self.max_queue})")
+
+        ticket = Ticket()
+        self.queue[ticket.id] = ticket
+        self._wakeup.set()
+        return ticket
+
+    def get(self, ticket_id: str) -> Ticket | None:
+        ticket = self.queue.get(ticket_id)
+        if ticket:
+            ticket.last_seen = time.monotonic()
+        return ticket
+
+    async def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for `ticket` to be admitted."""
+        try:
+            await asyncio.wait_for(ticket.admitted.wait(), timeout)
+        except TimeoutError:
+            pass
+        ticket.last_seen = time.monotonic()
+        return ticket.admitted.is_set()
+
+    def position(self, ticket: Ticket) -> int:
+        """Return the 1-based position among tickets still waiting."""
+        waiting = [t for t in self.queue.values() if not t.admitted.is_set()]
+        return waiting.index(ticket) + 1 if ticket in waiting else 0
+
+    def complete(self, ticket: Ticket) -> None:
+        """Release an admitted ticket once its session launched or failed."""
+        self.queue.pop(ticket.id, None)
+        self._wakeup.set()
+
+    def metrics(self) -> dict:
+        waits = sorted(self.recent_waits)
+        return {
+            "queue_depth": sum(
+                1 for ticket in self.queue.values() if not ticket.admitted.is_set()
+            ),
+            "admitted_pending_launch": sum(
+                1 for ticket in self.queue.values() if ticket.admitted.is_set()
+            ),
+            "running_bots": self.running_bots(),
+            "cpu_percent": self.cpu_percent,
+            "memory_percent": self.memory_percent,
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "expired_total": self.expired_total,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "wait_seconds_p50": waits[len(waits) // 2] if waits else None,
+            "wait_seconds_p95": waits[int(len(waits) * 0.95)] if waits else None,
+        }
+
+    def _has_headroom(self, reserved: int) -> bool:
+        if self.running_bots() + reserved >= self.max_bots:
+            return False
+        if self.cpu_percent is not None and self.cpu_percent >= self.max_cpu_percent:
+            return False
+        return not (
+            self.memory_percent is not None
+            and self.memory_percent >= self.max_memory_percent
+        )
+
+    def _expire(self, now: float) -> None:
+        for ticket in list(self.queue.values()):
+            if now - ticket.last_seen > self.ticket_ttl:
+                logger.info(f"Admission ticket {ticket.id} expired")
+                self.queue.pop(ticket.id)
+                self.expired_total += 1
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        self._expire(now)
+        self.cpu_percent = self.cpu_monitor.read_percent()
+        self.memory_percent = read_memory_percent()
+
+        reserved = sum(1 for ticket in self.queue.values() if ticket.admitted.is_set())
+        for ticket in self.queue.values():
+            if ticket.admitted.is_set():
+                continue
+            if not self._has_headroom(reserved):
+                break
+
+            ticket.admitted_at = now
+            ticket.admitted.set()
+            reserved += 1
+            wait_seconds = now - ticket.enqueued_at
+            self.admitted_total += 1
+            self.wait_seconds_total += wait_seconds
+            self.recent_waits.append(wait_seconds)
+            self.wait_seconds.observe(wait_seconds)
+
+            # CPU and memory only reflect a session once it is running, so
+            # admit one per pass to let each show up in the next reading
+            if self.cpu_percent is not None or self.memory_percent is not None:
+                break
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            self._dispatch()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -6,52 +6,138 @@
 
 import argparse
 import os
-import subprocess
+import sys
 from contextlib import asynccontextmanager
 
 import aiohttp
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
-from pipecat.transports.services.helpers.daily_rest import (
-    DailyRESTHelper,
-    DailyRoomParams,
-    DailyRoomProperties,
-)
+from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper
+
+from admission import AdmissionController, QueueFullError, Ticket
+from bot_pool import BotWorkerPool
+from metrics import MetricsCollector
+from room_pool import DailyAPIError, PooledRoom, RoomPool
+from supervisor import BotSupervisor
 
 load_dotenv(override=True)
 
 MAX_BOTS_PER_ROOM = 1
 
-# Bot sub-process dict for status reporting and concurrency control
-bot_procs = {}
+# Number of pre-started bot workers kept waiting for a room
+BOT_POOL_SIZE = int(os.getenv("BOT_POOL_SIZE", "2"))
 
-daily_rest_helper = None
+# Number of Daily rooms, with tokens, created ahead of requests
+ROOM_POOL_SIZE = int(os.getenv("ROOM_POOL_SIZE", "2"))
+
+# Number of concurrent sessions each bot worker process hosts
+MAX_SESSIONS_PER_WORKER = int(os.getenv("MAX_SESSIONS_PER_WORKER", "4"))
 
+# Run each bot worker under hot_reload.py, which swaps in a warmed-up worker
+# with the new code when bot files change or on SIGHUP, then drains the old one
+BOT_HANDOFF_RELOAD = os.getenv("BOT_HANDOFF_RELOAD", "") == "1"
+
+# Tracks bot workers for status reporting and concurrency control
+supervisor = BotSupervisor(
+    sample_interval=float(os.getenv("BOT_SAMPLE_INTERVAL", "5.0"))
+)
+
+# Host-wide limits for admitting new sessions
+admission = AdmissionController(
+    running_bots=lambda: supervisor.running_bots,
+    max_bots=int(os.getenv("MAX_RUNNING_BOTS", "50")),
+    max_cpu_percent=float(os.getenv("ADMISSION_MAX_CPU_PERCENT", "85")),
+    max_memory_percent=float(os.getenv("ADMISSION_MAX_MEMORY_PERCENT", "85")),
+    max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "20")),
+)
 
-def cleanup():
-    # Clean up function, just to be extra safe
-    for entry in bot_procs.values():
-        proc = entry[0]
-        proc.terminate()
-        proc.wait()
+# How long a request waits in the admission queue before getting a ticket back
+ADMISSION_WAIT_SECONDS = float(os.getenv("ADMISSION_WAIT_SECONDS", "10"))
+
+daily_rest_helper = None
+bot_pool = None
+room_pool = None
+
+# Aggregates the metrics bot workers report, served from /metrics
+metrics = MetricsCollector()
+metrics.add_gauge(
+    "active_sessions", "Bot sessions currently running", lambda: supervisor.running_bots
+)
+metrics.add_gauge(
+    "bot_workers",
+    "Bot worker processes in the pool",
+    lambda: len(bot_pool.workers) if bot_pool else None,
+)
+metrics.add_gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission",
+    lambda: admission.metrics()["queue_depth"],
+)
+metrics.add_gauge(
+    "room_pool_ready",
+    "Daily rooms created ahead and ready to hand out",
+    lambda: len(room_pool.rooms) if room_pool else None,
+)
+metrics.add_histogram(
+    "admission_wait_seconds",
+    "Time requests waited in the queue before being admitted",
+    admission.wait_seconds,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global daily_rest_helper
+    global daily_rest_helper, bot_pool, room_pool
     aiohttp_session = aiohttp.ClientSession()
     daily_rest_helper = DailyRESTHelper(
         daily_api_key=os.getenv("DAILY_API_KEY", ""),
         daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
         aiohttp_session=aiohttp_session,
     )
+    room_pool = RoomPool(
+        daily_rest_helper,
+        size=ROOM_POOL_SIZE,
+        # Calls are cut off when their room expires, at least this long after
+        # the room is handed out
+        session_seconds=float(os.getenv("ROOM_SESSION_SECONDS", "3600")),
+        shelf_seconds=float(os.getenv("ROOM_SHELF_SECONDS", "600")),
+        room_name=os.getenv("DAILY_SAMPLE_ROOM_NAME") or None,
+    )
+    # Workers run with this interpreter directly, skipping uv resolution
+    command = [sys.executable]
+    if BOT_HANDOFF_RELOAD:
+        command += ["bot/hot_reload.py", "--handoff"]
+    command += [
+        "bot/bot.py",
+        "--worker",
+        "--max-sessions",
+        str(MAX_SESSIONS_PER_WORKER),
+    ]
+    bot_pool = BotWorkerPool(
+        command=command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        size=BOT_POOL_SIZE,
+        event_handlers=[metrics.on_worker_event],
+    )
+    await bot_pool.start()
+    await room_pool.start()
+    await supervisor.start()
+    await admission.start()
     yield
-    await daily_rest_helper.delete_room_by_name(os.getenv("DAILY_SAMPLE_ROOM_NAME", ""))
-    await aiohttp_session.close()
-    cleanup()
+    await admission.stop()
+    # Stop the bots first, deleting rooms can fail
+    await bot_pool.stop()
+    await supervisor.stop()
+    try:
+        await room_pool.stop()
+        await daily_rest_helper.delete_room_by_name(
+            os.getenv("DAILY_SAMPLE_ROOM_NAME", "")
+        )
+    finally:
+        await aiohttp_session.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -67,17 +153,73 @@ app.add_middleware(
 
 @app.get("/")
 async def start_agent(request: Request):
-    logger.info("Creating room")
-    room = await daily_rest_helper.create_room(
-        DailyRoomParams(
-            name=os.getenv("DAILY_SAMPLE_ROOM_NAME", ""),
-            properties=DailyRoomProperties(
-                enable_chat=True,
-                enable_recording=False,
-            ),
+    try:
+        ticket = admission.enqueue()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "10"}
         )
-    )
+
+    return await admit_or_queue(ticket)
+
+
+@app.get("/queue/{ticket_id}")
+async def poll_queue(ticket_id: str):
+    ticket = admission.get(ticket_id)
+    if not ticket:
+        raise HTTPException(
+            status_code=404, detail=f"Queue ticket: {ticket_id} not found or expired"
+        )
+
+    return await admit_or_queue(ticket)
+
+
+@app.get("/admission")
+def get_admission():
+    return JSONResponse(admission.metrics())
+
+
+@app.get("/rooms")
+def get_room_pool():
+    return JSONResponse(room_pool.metrics())
+
+
+async def admit_or_queue(ticket: Ticket):
+    """Launch the agent once admitted, or report the ticket's queue position."""
+    if not await admission.wait(ticket, ADMISSION_WAIT_SECONDS):
+        return JSONResponse(
+            {
+                "status": "queued",
+                "ticket": ticket.id,
+                "position": admission.position(ticket),
+            },
+            status_code=202,
+        )
+
+    try:
+        return await launch_agent()
+    finally:
+        admission.complete(ticket)
+
+
+async def launch_agent():
+    # Take a pre-created room and token, or create them now if none is ready
+    try:
+        room = await room_pool.acquire()
+    except DailyAPIError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create room: {e}")
     logger.info(f"Room URL: {room.url}")
+    try:
+        return await start_bot(room)
+    except Exception as e:
+        if not isinstance(e, HTTPException):
+            logger.exception(f"Failed to start a bot for room {room.url}")
+        # Nobody will join the room, don't leave it behind until it expires
+        await room_pool.discard(room)
+        raise
+
+
+async def start_bot(room: PooledRoom):
     # Ensure the room property is present
     if not room.url:
         raise HTTPException(
@@ -85,59 +227,67 @@ async def start_agent(request: Request):
             detail="Missing  'room' property in request data. Cannot start agent without a target room!",
         )
 
-    # Check if there is already an existing process running in this room
-    num_bots_in_room = sum(
-        1
-        for proc in bot_procs.values()
-        if proc[1] == room.url and proc[0].poll() is None
-    )
-    if num_bots_in_room >= MAX_BOTS_PER_ROOM:
+    # Check if there is already an existing session running in this room
+    if supervisor.bots_in_room(room.url) >= MAX_BOTS_PER_ROOM:
         raise HTTPException(
             status_code=500, detail=f"Max bot limited reach for room: {room.url}"
         )
 
-    # Get the token for the room
-    token = await daily_rest_helper.get_token(room.url)
-
-    if not token:
+    if not room.token:
         raise HTTPException(
             status_code=500, detail=f"Failed to get token for room: {room.url}"
         )
 
-    # Spawn a new agent, and join the user session
+    # Hand the room to a pre-warmed agent, and join the user session
     # Note: this is mostly for demonstration purposes (refer to 'deployment' in README)
     try:
-        proc = subprocess.Popen(
-            [f"uv run bot/bot.py --room-url {room.url} --token {token} --reload"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
+        worker = await bot_pool.acquire()
+        session_id = await worker.assign(room.url, room.token)
+        supervisor.track(worker, session_id, room.url)
+    except TimeoutError:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to start subprocess: no bot worker became ready in time",
         )
-        bot_procs[proc.pid] = (proc, room.url)
-    except Exception as e:
+    except OSError as e:
+        # Spawning the worker failed, or it closed its stdin before the assignment
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
 
-    return JSONResponse({"room_url": room.url})
+    return JSONResponse(
+        {"room_url": room.url, "bot_id": worker.pid, "session_id": session_id}
+    )
 
 
 @app.get("/status/{pid}")
 def get_status(pid: int):
     # Look up the subprocess
-    proc = bot_procs.get(pid)
+    status = supervisor.status(pid)
 
     # If the subprocess doesn't exist, return an error
-    if not proc:
+    if not status:
         raise HTTPException(
             status_code=404, detail=f"Bot with process id: {pid} not found"
         )
 
-    # Check the status of the subprocess
-    if proc[0].poll() is None:
-        status = "running"
-    else:
-        status = "finished"
+    return JSONResponse(status)
+
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/latency/{session_id}")
+def get_latency(session_id: str):
+    latency = supervisor.session_latency(session_id)
+    if not latency:
+        raise HTTPException(
+            status_code=404, detail=f"No latency reported for session: {session_id}"
+        )
 
-    return JSONResponse({"bot_id": pid, "status": status})
+    return JSONResponse(latency)
 
 
 if __name__ == "__main__":
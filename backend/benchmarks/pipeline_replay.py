@@ -0,0 +1,391 @@
+"""Replay screen frames and transcripts through the VisionAssistant pipeline offline.
+
+Builds the real pipeline from VisionAssistant.setup_pipeline for each session,
+with the Daily transport, Anthropic LLMs and Cartesia TTS replaced by local
+stubs that answer after configurable fake latencies. Each session receives
+screen frames at --fps and a user turn every --turn-interval seconds. Reports
+throughput, per-stage turn latency from the sessions' TurnTracers, process CPU
+and peak memory for each concurrency level.
+
+Frames come from a session recording (--recording), a directory of screenshots
+(--frames) or are synthesized. Transcripts come from the recording or a text
+file with one utterance per line (--transcripts).
+
+    uv run benchmarks/pipeline_replay.py --sessions 1 4 16 --seconds 30
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from collections.abc import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from config import VisionConfig
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    OutputAudioRawFrame,
+    TextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserImageRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.processors.frame_processor import (
+    FrameDirection,
+    FrameProcessor,
+)
+from pipecat.services.ai_services import TTSService
+from pipecat.services.anthropic import AnthropicLLMService
+from recording import RecordingReader
+from tracing import LATENCY_BUCKETS, LatencyHistogram
+
+from bot import VisionAssistant
+
+FRAME_SIZE = (1280, 800)
+TTS_SAMPLE_RATE = 24000
+
+DEFAULT_TRANSCRIPTS = [
+    "How do I open my email?",
+    "I pressed the blue button, what now?",
+    "Where did the message go?",
+    "Can you make the text bigger?",
+    "What is this little bell at the top?",
+    "How do I call my grandson?",
+]
+
+
+class StubLLMService(AnthropicLLMService):
+    """Anthropic LLM service that streams a canned reply instead of calling the API.
+
+    Frame handling and context conversion are inherited, so requests are built
+    exactly as they would be for the real service.
+    """
+
+    def __init__(self, ttft: float, token_interval: float, reply: str, **kwargs):
+        super().__init__(api_key="stub", **kwargs)
+        self.ttft = ttft
+        self.token_interval = token_interval
+        self.reply = reply
+        self.requests = 0
+
+    async def _process_context(self, context):
+        self.requests += 1
+        await self.push_frame(LLMFullResponseStartFrame())
+        try:
+            await asyncio.sleep(self.ttft)
+            for word in self.reply.split(" "):
+                await self.push_frame(TextFrame(f"{word} "))
+                await asyncio.sleep(self.token_interval)
+        finally:
+            await self.push_frame(LLMFullResponseEndFrame())
+
+
+class StubTTSService(TTSService):
+    """TTS service that returns silence after a fake time to first byte."""
+
+    def __init__(self, ttfb: float, chunk_seconds: float = 0.1, **kwargs):
+        super().__init__(sample_rate=TTS_SAMPLE_RATE, **kwargs)
+        self.ttfb = ttfb
+        self.chunk_bytes = int(chunk_seconds * TTS_SAMPLE_RATE) * 2
+
+    async def set_model(self, model: str):
+        self.set_model_name(model)
+
+    def set_voice(self, voice: str):
+        self._voice_id = voice
+
+    async def flush_audio(self):
+        pass
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        yield TTSStartedFrame()
+        await asyncio.sleep(self.ttfb)
+        # Roughly 15 characters of speech per second
+        for _ in range(max(1, int(len(text) / 15 / 0.1))):
+            yield TTSAudioRawFrame(bytes(self.chunk_bytes), TTS_SAMPLE_RATE, 1)
+        yield TTSStoppedFrame()
+
+
+class StubInput(FrameProcessor):
+    """Passes queued frames on, like the Daily input transport."""
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        await self.push_frame(frame, direction)
+
+
+class StubOutput(FrameProcessor):
+    """Swallows bot audio and reports speaking like the Daily output transport."""
+
+    def __init__(self):
+        super().__init__()
+        self.speaking = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OutputAudioRawFrame):
+            if not self.speaking:
+                self.speaking = True
+                await self.push_frame(BotStartedSpeakingFrame())
+                await self.push_frame(
+                    BotStartedSpeakingFrame(), FrameDirection.UPSTREAM
+                )
+            return
+        if isinstance(frame, TTSStoppedFrame) and self.speaking:
+            self.speaking = False
+            await self.push_frame(BotStoppedSpeakingFrame())
+            await self.push_frame(BotStoppedSpeakingFrame(), FrameDirection.UPSTREAM)
+
+        await self.push_frame(frame, direction)
+
+
+class StubTransport:
+    """Stands in for DailyTransport in VisionAssistant.setup_pipeline."""
+
+    def __init__(self):
+        self._input = StubInput()
+        self._output = StubOutput()
+
+    def input(self) -> FrameProcessor:
+        return self._input
+
+    def output(self) -> FrameProcessor:
+        return self._output
+
+
+def synthetic_frames(count: int, seed: int) -> list[bytes]:
+    """Screens with a static layout and a few widgets that change between frames."""
+    rng = np.random.default_rng(seed)
+    width, height = FRAME_SIZE
+    screen = np.full((height, width, 3), 235, dtype=np.uint8)
+    screen[:60] = (40, 90, 160)
+    for _ in range(12):
+        left, top = rng.integers(0, width - 300), rng.integers(80, height - 120)
+        screen[top : top + 100, left : left + 300] = rng.integers(0, 255, 3)
+
+    frames = []
+    for _ in range(count):
+        # Most frames change a little, some not at all, some a lot
+        for _ in range(rng.choice([0, 1, 1, 2, 8])):
+            left, top = rng.integers(0, width - 200), rng.integers(0, height - 80)
+            screen[top : top + 80, left : left + 200] = rng.integers(0, 255, 3)
+        frames.append(screen.tobytes())
+    return frames
+
+
+def load_frames(directory: Path) -> list[bytes]:
+    frames = []
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp"):
+            image = Image.open(path).convert("RGB").resize(FRAME_SIZE)
+            frames.append(image.tobytes())
+    if not frames:
+        raise SystemExit(f"No screenshots found in {directory}")
+    return frames
+
+
+def load_recording(path: Path) -> tuple[list[bytes], list[str]]:
+    with RecordingReader(str(path)) as reader:
+        frames = [image.resize(FRAME_SIZE).tobytes() for _, image in reader.frames()]
+        transcripts = [text for _, text in reader.transcripts()]
+    if not frames:
+        raise SystemExit(f"No frames in recording {path}")
+    return frames, transcripts
+
+
+async def replay(
+    task, frames: list[bytes], transcripts: list[str], args: argparse.Namespace
+) -> None:
+    """Feed frames and user turns to a session in real time, then end it."""
+    started = time.monotonic()
+    next_frame = started
+    next_turn = started + args.turn_interval / 2
+    frame_index = turn_index = 0
+    while (now := time.monotonic()) < started + args.seconds:
+        if now >= next_frame:
+            frame = frames[frame_index % len(frames)]
+            await task.queue_frame(
+                UserImageRawFrame(
+                    image=frame, size=FRAME_SIZE, format="RGB", user_id="replay"
+                )
+            )
+            frame_index += 1
+            next_frame += 1 / args.fps
+        if now >= next_turn:
+            text = transcripts[turn_index % len(transcripts)]
+            await task.queue_frames(
+                [
+                    UserStartedSpeakingFrame(),
+                    UserStoppedSpeakingFrame(),
+                    TranscriptionFrame(text, "replay", str(now)),
+                ]
+            )
+            turn_index += 1
+            next_turn += args.turn_interval
+        await asyncio.sleep(max(0.0, min(next_frame, next_turn) - time.monotonic()))
+
+    # Let the last turn finish, then end the session the way a bot does
+    await asyncio.sleep(args.drain)
+    await task.queue_frame(EndFrame())
+
+
+async def run_session(
+    frames: list[bytes],
+    transcripts: list[str],
+    executor: ThreadPoolExecutor,
+    args: argparse.Namespace,
+) -> tuple[VisionAssistant, StubLLMService]:
+    assistant = VisionAssistant(encoder_executor=executor)
+    vision_llm = StubLLMService(
+        args.vision_ttft,
+        args.token_interval,
+        "The user opens the mail app and taps the inbox.",
+    )
+    task, _ = await assistant.setup_pipeline(
+        StubTransport(),
+        StubTTSService(args.tts_ttfb),
+        StubLLMService(
+            args.llm_ttft, args.token_interval, "Tap the blue envelope at the top."
+        ),
+        vision_llm,
+        assistant.setup_initial_context(),
+    )
+    runner = PipelineRunner(handle_sigint=False)
+    await asyncio.gather(runner.run(task), replay(task, frames, transcripts, args))
+    assistant.frame_encoder.shutdown()
+    if assistant.recorder:
+        await assistant.recorder.close()
+    return assistant, vision_llm
+
+
+def merge(histograms: list[LatencyHistogram]) -> LatencyHistogram:
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        merged.total += histogram.total
+        merged.count += histogram.count
+    return merged
+
+
+async def measure(
+    count: int,
+    frames: list[bytes],
+    transcripts: list[str],
+    args: argparse.Namespace,
+) -> None:
+    executor = ThreadPoolExecutor(max_workers=VisionConfig.ENCODER_WORKERS * count)
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    results = await asyncio.gather(
+        *[run_session(frames, transcripts, executor, args) for _ in range(count)]
+    )
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+    executor.shutdown()
+
+    frames_received = sum(a.image_manager.stats.frames_received for a, _ in results)
+    frames_encoded = sum(a.image_manager.stats.frames_encoded for a, _ in results)
+    turns = sum(a.tracer.stats.turns_completed for a, _ in results)
+    summaries_sent = sum(a.summarize_processor.stats.summaries_sent for a, _ in results)
+    summaries_skipped = sum(
+        a.summarize_processor.stats.summaries_skipped for a, _ in results
+    )
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"\n{count} session(s), {wall:.1f}s")
+    print(
+        f"  throughput: {frames_received / wall:.2f} frames/s received, "
+        f"{frames_encoded / wall:.2f} encoded, {turns / wall:.2f} turns/s"
+    )
+    summaries_deferred = sum(
+        a.summarize_processor.stats.summaries_deferred for a, _ in results
+    )
+    summaries_cancelled = sum(
+        a.summarize_processor.stats.summaries_cancelled for a, _ in results
+    )
+    summaries_cached = sum(
+        a.summarize_processor.stats.summaries_cached for a, _ in results
+    )
+    print(
+        f"  summaries: {summaries_sent} sent, {summaries_skipped} skipped, "
+        f"{summaries_deferred} deferred, {summaries_cancelled} cancelled, "
+        f"{summaries_cached} cached"
+    )
+    print(
+        f"  cpu: {100 * cpu / wall:.1f}% of a core "
+        f"({100 * cpu / wall / count:.1f}% per session), "
+        f"peak rss: {peak_rss_mb:.0f} MB"
+    )
+    print(f"  {'span':<26} {'count':>6} {'mean':>8} {'p95 <=':>8}")
+    for span in results[0][0].tracer.histograms:
+        histogram = merge([a.tracer.histograms[span] for a, _ in results])
+        if not histogram.count:
+            continue
+        p95 = histogram.quantile(0.95)
+        p95_text = f"{p95:.2f}s" if p95 <= LATENCY_BUCKETS[-1] else "inf"
+        print(
+            f"  {span:<26} {histogram.count:>6} "
+            f"{histogram.total / histogram.count * 1000:>6.1f}ms {p95_text:>8}"
+        )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--fps", type=float, default=1.0)
+    parser.add_argument("--turn-interval", type=float, default=5.0)
+    parser.add_argument(
+        "--drain", type=float, default=3.0, help="Seconds to let the last turn finish"
+    )
+    parser.add_argument("--recording", type=Path, help="Session recording file")
+    parser.add_argument("--frames", type=Path, help="Directory of screenshots")
+    parser.add_argument("--transcripts", type=Path, help="One utterance per line")
+    parser.add_argument("--llm-ttft", type=float, default=0.4)
+    parser.add_argument("--vision-ttft", type=float, default=1.0)
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--tts-ttfb", type=float, default=0.15)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    frames, transcripts = [], []
+    if args.recording:
+        frames, transcripts = load_recording(args.recording)
+    elif args.frames:
+        frames = load_frames(args.frames)
+    else:
+        frames = synthetic_frames(max(1, int(args.seconds * args.fps)), seed=0)
+    if args.transcripts:
+        transcripts = [
+            line for line in args.transcripts.read_text().splitlines() if line.strip()
+        ]
+    transcripts = transcripts or DEFAULT_TRANSCRIPTS
+
+    for count in args.sessions:
+        asyncio.run(measure(count, frames, transcripts, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Measure time to get a Daily room and token with and without the room pool.
+
+Runs a local stub of the Daily REST API that answers after --api-latency
+seconds, then makes --requests room requests --interval seconds apart
+through a RoomPool of each --pool-sizes size. A size of 0 creates every room
+on demand, like start_agent did before rooms were pooled.
+
+    uv run benchmarks/room_provisioning.py --pool-sizes 0 2 --requests 20
+
+With --serve the stub runs on its own, so the API server can be pointed at it:
+
+    uv run benchmarks/room_provisioning.py --serve 8765
+    DAILY_API_URL=http://localhost:8765 uv run api.py
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipecat.transports.services.helpers.daily_rest import (
+    DailyRESTHelper,
+)
+
+from room_pool import RoomPool
+
+
+def daily_stub_app(latency: float) -> web.Application:
+    """The parts of the Daily REST API that RoomPool uses, kept in memory."""
+    rooms = {}
+    app = web.Application()
+    # Counts requests by kind, read back by the benchmark
+    app["requests"] = {"rooms": 0, "meeting-tokens": 0, "delete": 0}
+
+    async def create_room(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        app["requests"]["rooms"] += 1
+        body = await request.json()
+        name = body.get("name") or uuid.uuid4().hex[:12]
+        if name in rooms:
+            return web.json_response(
+                {"error": "invalid-request-error", "info": f"{name} exists"},
+                status=400,
+            )
+        rooms[name] = {
+            "id": uuid.uuid4().hex,
+            "name": name,
+            "api_created": True,
+            "privacy": body.get("privacy", "public"),
+            "url": f"https://stub.daily.co/{name}",
+            "created_at": datetime.now(UTC).isoformat(),
+            "config": body.get("properties", {}),
+        }
+        return web.json_response(rooms[name])
+
+    async def get_room(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        room = rooms.get(request.match_info["name"])
+        if not room:
+            return web.json_response({"error": "not-found"}, status=404)
+        return web.json_response(room)
+
+    async def delete_room(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        app["requests"]["delete"] += 1
+        if not rooms.pop(request.match_info["name"], None):
+            return web.json_response({"error": "not-found"}, status=404)
+        return web.json_response({"deleted": True})
+
+    async def create_token(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        app["requests"]["meeting-tokens"] += 1
+        properties = (await request.json()).get("properties", {})
+        if properties.get("room_name") not in rooms:
+            return web.json_response({"error": "invalid-request-error"}, status=400)
+        return web.json_response({"token": uuid.uuid4().hex})
+
+    app.router.add_post("/rooms", create_room)
+    app.router.add_get("/rooms/{name}", get_room)
+    app.router.add_delete("/rooms/{name}", delete_room)
+    app.router.add_post("/meeting-tokens", create_token)
+    return app
+
+
+async def start_stub(latency: float, port: int = 0) -> web.AppRunner:
+    runner = web.AppRunner(daily_stub_app(latency))
+    await runner.setup()
+    await web.TCPSite(runner, "localhost", port).start()
+    return runner
+
+
+async def measure(size: int, args: argparse.Namespace) -> None:
+    runner = await start_stub(args.api_latency)
+    port = runner.addresses[0][1]
+    async with aiohttp.ClientSession() as session:
+        helper = DailyRESTHelper(
+            daily_api_key="stub",
+            daily_api_url=f"http://localhost:{port}",
+            aiohttp_session=session,
+        )
+        pool = RoomPool(helper, size=size, refill_interval=args.interval)
+        await pool.start()
+        # Let the first refill finish, as it does while the API server starts
+        await asyncio.sleep(2 * args.api_latency + 0.1)
+
+        waits = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            await pool.acquire()
+            waits.append(time.perf_counter() - started)
+            await asyncio.sleep(args.interval)
+        await pool.stop()
+    requests = runner.app["requests"]
+    await runner.cleanup()
+
+    waits.sort()
+    stats = pool.metrics()
+    print(
+        f"{size:>6} {sum(waits) / len(waits) * 1000:>9.1f}ms "
+        f"{waits[int(len(waits) * 0.95)] * 1000:>9.1f}ms "
+        f"{stats['hits_total']:>6} {stats['misses_total']:>6} "
+        f"{requests['rooms']:>6} {requests['delete']:>6}"
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    await start_stub(args.api_latency, args.serve)
+    print(f"Daily REST stub listening on http://localhost:{args.serve}")
+    await asyncio.Event().wait()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--api-latency", type=float, default=0.15)
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Only run the stub")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    # Requests cut off when the pool stops are not errors worth a traceback
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+
+    print(f"{'pool':>6} {'mean':>11} {'p95':>11} {'hits':>6} {'misses':>6} ", end="")
+    print(f"{'rooms':>6} {'delete':>6}")
+    for size in args.pool_sizes:
+        asyncio.run(measure(size, args))
+
+
+if __name__ == "__main__":
+    main()
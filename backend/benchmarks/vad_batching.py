@@ -0,0 +1,110 @@
+"""Benchmark CPU per concurrent session for Silero VAD with and without batching.
+
+Each simulated session feeds 16 kHz audio to its own VAD analyzer in real
+time (one 512-sample chunk every 32ms) from its own thread, like a
+DailyTransport input does. Reports process CPU per session as a
+percentage of one core.
+
+    uv run benchmarks/vad_batching.py --sessions 1 8 32 --seconds 10
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bot"))
+
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+from vad import (
+    BatchedSileroInference,
+    BatchedSileroModel,
+    SharedSileroVADAnalyzer,
+    load_silero_session,
+)
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 512
+CHUNK_SECONDS = CHUNK_SAMPLES / SAMPLE_RATE
+
+
+def make_audio(seconds: float, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * SAMPLE_RATE)
+    t = np.arange(samples) / SAMPLE_RATE
+    # Alternate half-second bursts of tone and quiet noise
+    tone = 0.3 * np.sin(2 * np.pi * (180 + 40 * seed % 200) * t)
+    gate = (np.floor(t * 2) % 2).astype(np.float32)
+    audio = tone * gate + 0.01 * rng.standard_normal(samples)
+    return (audio * 32767).astype(np.int16).tobytes()
+
+
+def run_session(analyzer, audio: bytes, stop_at: float) -> None:
+    chunk_bytes = CHUNK_SAMPLES * 2
+    next_time = time.monotonic()
+    offset = 0
+    while time.monotonic() < stop_at:
+        analyzer.analyze_audio(audio[offset : offset + chunk_bytes])
+        offset = (offset + chunk_bytes) % (len(audio) - chunk_bytes)
+        next_time += CHUNK_SECONDS
+        time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def measure(analyzers, seconds: float) -> float:
+    """Return process CPU seconds per session per wall second."""
+    audio = [make_audio(5.0, seed) for seed in range(len(analyzers))]
+    stop_at = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=run_session, args=(analyzer, audio[i], stop_at))
+        for i, analyzer in enumerate(analyzers)
+    ]
+
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpu = time.process_time() - cpu_start
+    wall = time.monotonic() - wall_start
+
+    return cpu / wall / len(analyzers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--max-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    session = load_silero_session()
+
+    print(f"{'sessions':>8} {'per-session':>12} {'batched':>12} {'avg batch':>10}")
+    for count in args.sessions:
+        unbatched = measure([SileroVADAnalyzer() for _ in range(count)], args.seconds)
+
+        inference = BatchedSileroInference(
+            session, max_batch_size=max(count, 1), max_delay=args.max_delay
+        )
+        batched = measure(
+            [
+                SharedSileroVADAnalyzer(BatchedSileroModel(inference))
+                for _ in range(count)
+            ],
+            args.seconds,
+        )
+        inference.close()
+        average_batch = inference.chunks / max(inference.batches, 1)
+
+        print(
+            f"{count:>8} {unbatched * 100:>11.2f}% {batched * 100:>11.2f}% "
+            f"{average_batch:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
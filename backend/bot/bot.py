@@ -7,24 +7,53 @@
 import argparse
 import asyncio
 import os
-from typing import Tuple
+from concurrent.futures import Executor
 
 from config import VisionConfig
+from context_manager import ContextManager, ContextStats, PromptCacheContext
 from dotenv import load_dotenv
+from frame_processors.capture_rate import AdaptiveCaptureProcessor
+from frame_processors.frame_encoder import FrameEncoder
 from frame_processors.image_processor import (
+    CONVERSATION_FRAMES,
+    CONVERSATION_PROFILE,
+    VISION_PROFILE,
+    ImageBudget,
     ImageFrameProcessor,
     ImageManager,
     ProcessImageSummaryFrame,
     SummarizeImageFrames,
+    SummaryStats,
 )
+from frame_processors.routing import Branch, RoutedParallelPipeline
+from frame_processors.session_recorder import SessionRecorder
+from frame_processors.speculation import (
+    SpeculationStats,
+    SpeculativeAnthropicLLMService,
+    SpeculativeTurnProcessor,
+)
+from frame_processors.summary_cache import SummaryCache
+from frame_processors.summary_scheduler import SummaryScheduler
 from frame_processors.transcript_processor import TranscriptProcessor
+from frame_processors.tts_cache import (
+    CachedCartesiaTTSService,
+    TTSAudioCache,
+    TTSCacheStats,
+)
+from frame_processors.turn_trace_processor import TurnTraceProcessor
 from loguru import logger
 from message_handler import MessageHandler
 from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.frames.frames import (
     BotInterruptionFrame,
+    BotStartedSpeakingFrame,
+    EndFrame,
+    ImageRawFrame,
+    TextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStoppedSpeakingFrame,
 )
-from pipecat.pipeline.parallel_pipeline import ParallelPipeline
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -39,14 +68,72 @@ from pipecat.services.anthropic import (
 )
 from pipecat.services.cartesia import CartesiaTTSService
 from pipecat.transports.services.daily import DailyParams, DailyTransport
+from session_host import SessionHost
+from tracing import (
+    LLM_FIRST_TOKEN,
+    OUTPUT_STARTED,
+    TRANSCRIPTION,
+    TTS_FIRST_BYTE,
+    VAD_STOP,
+    TurnTracer,
+)
 
 
 class VisionAssistant:
-    def __init__(self):
+    def __init__(
+        self,
+        vad_analyzer: SileroVADAnalyzer | None = None,
+        encoder_executor: Executor | None = None,
+        tts_cache: TTSAudioCache | None = None,
+    ):
+        self.vad_analyzer = vad_analyzer
+        if tts_cache is None and VisionConfig.TTS_CACHE:
+            tts_cache = TTSAudioCache(
+                max_bytes=VisionConfig.TTS_CACHE_MAX_BYTES,
+                directory=VisionConfig.TTS_CACHE_DIR,
+            )
+        self.tts_cache = tts_cache
+        self.tts = None
+        self.llm = None
+        self.frame_encoder = FrameEncoder(
+            max_workers=VisionConfig.ENCODER_WORKERS,
+            use_processes=VisionConfig.ENCODER_USE_PROCESSES,
+            max_pending=VisionConfig.ENCODER_MAX_PENDING,
+            executor=encoder_executor,
+        )
         self.image_manager = ImageManager(
-            max_summary_length=4000, max_recent_frames=VisionConfig.MAX_FRAMES
+            max_summary_length=4000,
+            max_recent_frames=VisionConfig.MAX_FRAMES,
+            encoder=self.frame_encoder,
+            budgets={
+                VISION_PROFILE: ImageBudget(
+                    max_long_edge=VisionConfig.VISION_MAX_LONG_EDGE,
+                    max_request_bytes=VisionConfig.VISION_MAX_REQUEST_BYTES,
+                    format=VisionConfig.IMAGE_FORMAT,
+                ),
+                CONVERSATION_PROFILE: ImageBudget(
+                    max_long_edge=VisionConfig.CONVERSATION_MAX_LONG_EDGE,
+                    max_request_bytes=VisionConfig.CONVERSATION_MAX_REQUEST_BYTES,
+                    format=VisionConfig.IMAGE_FORMAT,
+                ),
+            },
+            thumbnail_edge=VisionConfig.DELTA_THUMBNAIL_EDGE,
         )
         self.message_handler = None
+        self.context_manager = None
+        self.summarize_processor = None
+        self.recorder = None
+        self.tracer = TurnTracer()
+        self.capture_controller = None
+        self.summary_cache = (
+            SummaryCache(
+                max_entries=VisionConfig.SUMMARY_CACHE_SIZE,
+                ttl_seconds=VisionConfig.SUMMARY_CACHE_TTL_SECONDS,
+                max_distance=VisionConfig.SUMMARY_CACHE_MAX_DISTANCE,
+            )
+            if VisionConfig.SUMMARY_CACHE
+            else None
+        )
 
         load_dotenv(override=True)
         logger.info("VisionAssistant initialized with narrative focus")
@@ -55,7 +142,7 @@ class VisionAssistant:
         self,
         room_url: str,
         token: str,
-    ) -> Tuple[DailyTransport, CartesiaTTSService, AnthropicLLMService]:
+    ) -> tuple[DailyTransport, CartesiaTTSService, AnthropicLLMService]:
         logger.info(f"Initializing services for room: {room_url}")
 
         transport = DailyTransport(
@@ -66,27 +153,44 @@ class VisionAssistant:
                 audio_out_enabled=True,
                 transcription_enabled=True,
                 vad_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
+                vad_analyzer=self.vad_analyzer or SileroVADAnalyzer(),
             ),
         )
         logger.debug("Daily transport initialized")
 
-        tts = CartesiaTTSService(
-            api_key=os.getenv("CARTESIA_API_KEY"),
-            voice_id=VisionConfig.VOICE_ID,
-        )
+        if self.tts_cache:
+            tts = CachedCartesiaTTSService(
+                api_key=os.getenv("CARTESIA_API_KEY"),
+                voice_id=VisionConfig.VOICE_ID,
+                cache=self.tts_cache,
+                max_cached_chars=VisionConfig.TTS_CACHE_MAX_CHARS,
+            )
+        else:
+            tts = CartesiaTTSService(
+                api_key=os.getenv("CARTESIA_API_KEY"),
+                voice_id=VisionConfig.VOICE_ID,
+            )
+        self.tts = tts
         logger.debug("TTS service initialized")
 
-        llm = AnthropicLLMService(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-            model="claude-3-5-sonnet-20240620",
-            enable_prompt_caching_beta=True,
-        )
+        if VisionConfig.SPECULATIVE_LLM:
+            llm = SpeculativeAnthropicLLMService(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                model="claude-3-5-sonnet-20240620",
+                params=AnthropicLLMService.InputParams(enable_prompt_caching_beta=True),
+                match_threshold=VisionConfig.SPECULATION_MATCH_THRESHOLD,
+            )
+        else:
+            llm = AnthropicLLMService(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                model="claude-3-5-sonnet-20240620",
+                params=AnthropicLLMService.InputParams(enable_prompt_caching_beta=True),
+            )
 
         vision_llm = AnthropicLLMService(
             api_key=os.getenv("ANTHROPIC_API_KEY"),
             model="claude-3-5-sonnet-20240620",
-            enable_prompt_caching_beta=True,
+            params=AnthropicLLMService.InputParams(enable_prompt_caching_beta=True),
         )
         logger.debug("LLM services initialized")
 
@@ -99,53 +203,135 @@ class VisionAssistant:
         llm: AnthropicLLMService,
         vision_llm: AnthropicLLMService,
         context: AnthropicLLMContext,
-    ) -> Tuple[PipelineTask, AnthropicContextAggregatorPair]:
+    ) -> tuple[PipelineTask, AnthropicContextAggregatorPair]:
         logger.info("Setting up pipeline...")
         llm_context_aggregator = llm.create_context_aggregator(context)
 
-        self.message_handler = MessageHandler(context, self.image_manager)
-        summarize_processor = SummarizeImageFrames(
+        self.context_manager = ContextManager(
+            context,
+            max_bytes=VisionConfig.CONTEXT_MAX_BYTES,
+            max_image_turns=VisionConfig.CONTEXT_MAX_IMAGE_TURNS,
+        )
+        self.message_handler = MessageHandler(
+            context, self.image_manager, self.context_manager, tracer=self.tracer
+        )
+
+        # Create the summarize processor first so we can pass it to
+        # ProcessImageSummaryFrame
+        summarize_processor = self.summarize_processor = SummarizeImageFrames(
             self.image_manager,
             summary_interval_seconds=2.0,  # More frequent updates
+            change_threshold=VisionConfig.SUMMARY_CHANGE_THRESHOLD,
+            summary_mode=VisionConfig.SUMMARY_MODE,
+            scheduler=SummaryScheduler(
+                turn_hold_seconds=VisionConfig.SUMMARY_TURN_HOLD_SECONDS,
+                deadline_seconds=VisionConfig.SUMMARY_DEADLINE_SECONDS,
+                finish_grace_seconds=VisionConfig.SUMMARY_FINISH_GRACE_SECONDS,
+            ),
+            cache=self.summary_cache,
         )
 
-        # Create the summarize processor first so we can pass it to ProcessImageSummaryFrame
-        summarize_processor = SummarizeImageFrames(self.image_manager)
+        self.llm = llm
+        speculation = []
+        if isinstance(llm, SpeculativeAnthropicLLMService):
+            speculation.append(
+                SpeculativeTurnProcessor(
+                    self.message_handler,
+                    llm,
+                    min_chars=VisionConfig.SPECULATION_MIN_CHARS,
+                )
+            )
+
+        if VisionConfig.ADAPTIVE_CAPTURE:
+            self.capture_controller = AdaptiveCaptureProcessor(
+                min_fps=VisionConfig.CAPTURE_MIN_FPS,
+                max_fps=VisionConfig.CAPTURE_MAX_FPS,
+                burst_seconds=VisionConfig.CAPTURE_BURST_SECONDS,
+                burst_threshold=VisionConfig.CAPTURE_BURST_THRESHOLD,
+            )
+
+        # Optionally capture what the session saw for debugging and benchmarks
+        if VisionConfig.RECORDING_DIR:
+            self.recorder = SessionRecorder(
+                VisionConfig.RECORDING_DIR,
+                keyframe_interval=VisionConfig.RECORDING_KEYFRAME_INTERVAL,
+                quality=VisionConfig.RECORDING_QUALITY,
+            )
 
         pipeline = Pipeline(
             [
                 transport.input(),
+                *([self.capture_controller] if self.capture_controller else []),
                 ImageFrameProcessor(self.image_manager),
-                ParallelPipeline(
-                    # Main conversation pipeline
-                    [
-                        TranscriptProcessor(self.message_handler, self.image_manager),
-                        RTVIUserTranscriptionProcessor(),
-                        llm_context_aggregator.user(),
-                        llm,  # LLM
-                        RTVIBotTranscriptionProcessor(),
-                        tts,  # TTS
-                        transport.output(),  # Transport bot output
-                        llm_context_aggregator.assistant(),  # Assistant spoken response
-                    ],
-                    # Continuous image summary pipeline
-                    [
-                        summarize_processor,
-                        vision_llm,
-                        ProcessImageSummaryFrame(
-                            self.image_manager, summarize_processor
-                        ),
-                    ],
+                *([self.recorder] if self.recorder else []),
+                # Each branch only receives the frame types it declares
+                RoutedParallelPipeline(
+                    # Main conversation pipeline, screen frames are only read
+                    # through the image manager
+                    Branch(
+                        [
+                            TurnTraceProcessor(
+                                self.tracer,
+                                {
+                                    UserStoppedSpeakingFrame: VAD_STOP,
+                                    TranscriptionFrame: TRANSCRIPTION,
+                                },
+                            ),
+                            TranscriptProcessor(
+                                self.message_handler, self.image_manager
+                            ),
+                            *speculation,
+                            RTVIUserTranscriptionProcessor(),
+                            llm_context_aggregator.user(),
+                            llm,  # LLM
+                            TurnTraceProcessor(
+                                self.tracer,
+                                {TextFrame: LLM_FIRST_TOKEN},
+                                record_usage=True,
+                            ),
+                            RTVIBotTranscriptionProcessor(),
+                            tts,  # TTS
+                            # Audio goes down, the output transport reports speaking up
+                            TurnTraceProcessor(
+                                self.tracer,
+                                {
+                                    TTSAudioRawFrame: TTS_FIRST_BYTE,
+                                    BotStartedSpeakingFrame: OUTPUT_STARTED,
+                                },
+                            ),
+                            transport.output(),  # Transport bot output
+                            # Assistant spoken response
+                            llm_context_aggregator.assistant(),
+                        ],
+                        rejects=(ImageRawFrame,),
+                    ),
+                    # Continuous image summary pipeline, which also watches for
+                    # conversation turns to schedule around them
+                    Branch(
+                        [
+                            summarize_processor,
+                            vision_llm,
+                            ProcessImageSummaryFrame(
+                                self.image_manager, summarize_processor
+                            ),
+                        ],
+                        accepts=(ImageRawFrame, *CONVERSATION_FRAMES),
+                    ),
                 ),
             ],
         )
 
         logger.debug("Pipeline configured with narrative focus")
         return PipelineTask(
-            pipeline, PipelineParams(allow_interruptions=True, enable_metrics=True)
+            pipeline,
+            PipelineParams(
+                allow_interruptions=True,
+                enable_metrics=True,
+                enable_usage_metrics=True,
+            ),
         ), llm_context_aggregator
 
-    async def run(self, room_url: str, token: str):
+    async def run(self, room_url: str, token: str, handle_sigint: bool = True):
         logger.info("Starting VisionAssistant...")
         transport, tts, llm, vision_llm = await self.initialize_services(
             room_url, token
@@ -161,8 +347,86 @@ class VisionAssistant:
 
         # Run the pipeline
         logger.info("Starting pipeline runner...")
-        runner = PipelineRunner()
-        await runner.run(task)
+        runner = PipelineRunner(handle_sigint=handle_sigint)
+        try:
+            await runner.run(task)
+        finally:
+            self.frame_encoder.shutdown()
+            if self.recorder:
+                await self.recorder.close()
+
+    def _tts_cache_counters(self) -> dict:
+        stats = (
+            self.tts.stats
+            if isinstance(self.tts, CachedCartesiaTTSService)
+            else TTSCacheStats()
+        )
+        return {
+            "tts_cache_hits": stats.hits,
+            "tts_cache_misses": stats.misses,
+            "tts_first_audio_saved_seconds": round(stats.first_audio_saved_seconds, 3),
+        }
+
+    def _speculation_counters(self) -> dict:
+        stats = (
+            self.llm.stats
+            if isinstance(self.llm, SpeculativeAnthropicLLMService)
+            else SpeculationStats()
+        )
+        return {
+            "speculations_started": stats.started,
+            "speculations_committed": stats.committed,
+            "speculations_discarded": stats.discarded,
+            "speculation_latency_saved_seconds": round(stats.latency_saved_seconds, 3),
+        }
+
+    def get_metrics(self) -> dict:
+        """Counters and latency histograms reported to the API process."""
+        encode_stats = self.image_manager.get_stats()
+        summary_stats = (
+            self.summarize_processor.stats
+            if self.summarize_processor
+            else SummaryStats()
+        )
+        context_stats = (
+            self.context_manager.stats if self.context_manager else ContextStats()
+        )
+        return {
+            "counters": {
+                "frames_received": encode_stats.frames_received,
+                "frames_encoded": encode_stats.frames_encoded,
+                "frames_dropped": encode_stats.frames_dropped,
+                "summaries_sent": summary_stats.summaries_sent,
+                "summaries_skipped": summary_stats.summaries_skipped,
+                "summaries_deferred": summary_stats.summaries_deferred,
+                "summaries_forced": summary_stats.summaries_forced,
+                "summaries_cancelled": summary_stats.summaries_cancelled,
+                "summaries_cached": summary_stats.summaries_cached,
+                "images_deduplicated": context_stats.images_deduplicated,
+                "uncached_input_tokens": self.tracer.stats.uncached_input_tokens,
+                "cache_read_tokens": self.tracer.stats.cache_read_tokens,
+                "cache_write_tokens": self.tracer.stats.cache_write_tokens,
+                **self._tts_cache_counters(),
+                **self._speculation_counters(),
+                "summary_cache_misses": (
+                    self.summary_cache.stats.misses if self.summary_cache else 0
+                ),
+                "frames_saved": (
+                    self.capture_controller.stats.frames_saved(
+                        self.capture_controller.max_fps
+                    )
+                    if self.capture_controller
+                    else 0
+                ),
+            },
+            "capture_fps": (
+                self.capture_controller.stats.effective_fps()
+                if self.capture_controller
+                else VisionConfig.FRAMES_PER_SECOND
+            ),
+            "context_bytes": context_stats.last_context_bytes,
+            "latency": self.tracer.snapshot(),
+        }
 
     def setup_initial_context(self):
         logger.info("Setting up initial context...")
@@ -176,17 +440,21 @@ class VisionAssistant:
         Your response will be turned into speech so use only simple words and punctuation.
         """
 
-        anthropic_context = AnthropicLLMContext(
+        # The system prompt never changes, so it is the first cached prefix
+        anthropic_context = PromptCacheContext(
             messages=[
-                {
-                    "role": "user",
-                    "content": system_prompt,
-                },
                 {
                     "role": "user",
                     "content": "Start the conversation by saying 'hello'.",
                 },
             ],
+            system=[
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
         )
 
         # Initialize context setup code here
@@ -214,11 +482,18 @@ class VisionAssistant:
 
             # Start capturing participant's transcription and screen video
             await transport.capture_participant_transcription(participant_id)
-            await transport.capture_participant_video(
-                participant_id,
-                framerate=VisionConfig.FRAMES_PER_SECOND,
-                video_source="screenVideo",
-            )
+            if self.capture_controller:
+                # Frames are only rendered when the controller asks for them
+                await transport.capture_participant_video(
+                    participant_id, framerate=0, video_source="screenVideo"
+                )
+                self.capture_controller.start(participant_id)
+            else:
+                await transport.capture_participant_video(
+                    participant_id,
+                    framerate=VisionConfig.FRAMES_PER_SECOND,
+                    video_source="screenVideo",
+                )
             logger.debug("Started capturing participant transcription and video")
 
             # Initialize the conversation
@@ -226,6 +501,11 @@ class VisionAssistant:
             await task.queue_frames([context_frame])
             logger.debug("Queued initial context frame")
 
+        @transport.event_handler("on_participant_left")
+        async def on_participant_left(transport, participant, reason):
+            logger.info(f"Participant left: {participant['id']} ({reason})")
+            await task.queue_frame(EndFrame())
+
         @transport.event_handler("on_app_message")
         async def on_app_message(transport, message, sender):
             logger.debug(f"Received app message: {message}")
@@ -250,15 +530,33 @@ class VisionAssistant:
             logger.debug("Queued message context frame for processing")
 
 
+async def run_worker(max_sessions: int):
+    """Pre-warm, then host sessions handed over by the API process on stdin."""
+    host = SessionHost(VisionAssistant, max_sessions=max_sessions)
+    await host.run()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Project Grandson")
     parser.add_argument("--room-url", type=str, help="Room URL")
     parser.add_argument("--token", type=str, help="Daily token")
     parser.add_argument("--reload", action="store_true", help="Reload code on change")
+    parser.add_argument(
+        "--worker", action="store_true", help="Pre-warm and wait for rooms on stdin"
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=1,
+        help="Concurrent sessions hosted by a worker",
+    )
 
     args = parser.parse_args()
 
-    logger.info(f"Running with args: {args.room_url} {args.token} {args.reload}")
+    if args.worker:
+        asyncio.run(run_worker(args.max_sessions))
+    else:
+        logger.info(f"Running with args: {args.room_url} {args.token} {args.reload}")
 
-    assistant = VisionAssistant()
-    asyncio.run(assistant.run(args.room_url, args.token))
+        assistant = VisionAssistant()
+        asyncio.run(assistant.run(args.room_url, args.token))
@@ -1,7 +1,14 @@
 """Configuration settings for the vision assistant."""
 
+import os
 from dataclasses import dataclass
 
+from dotenv import load_dotenv
+
+# Some settings are read from the environment when this module is imported,
+# so .env has to be loaded first
+load_dotenv(override=True)
+
 
 @dataclass
 class VisionConfig:
@@ -9,3 +16,56 @@ class VisionConfig:
     FRAMES_PER_SECOND: float = 0.2
     INTERRUPT_MESSAGE: str = "STOP"
     VOICE_ID: str = "79a125e8-cd45-4c13-8a67-188112f4dd22"
+    ENCODER_WORKERS: int = 1
+    ENCODER_USE_PROCESSES: bool = False
+    ENCODER_MAX_PENDING: int = 4
+    SUMMARY_CHANGE_THRESHOLD: float = 0.01
+    IMAGE_FORMAT: str = "JPEG"
+    VISION_MAX_LONG_EDGE: int = 1568
+    VISION_MAX_REQUEST_BYTES: int = 1_000_000
+    CONVERSATION_MAX_LONG_EDGE: int = 1568
+    CONVERSATION_MAX_REQUEST_BYTES: int = 1_500_000
+    SUMMARY_MODE: str = "full"
+    DELTA_THUMBNAIL_EDGE: int = 512
+    CONTEXT_MAX_BYTES: int = 2_000_000
+    CONTEXT_MAX_IMAGE_TURNS: int = 2
+    VAD_BATCHING: bool = True
+    VAD_MAX_BATCH_SIZE: int = 32
+    VAD_MAX_BATCH_DELAY: float = 0.005
+    METRICS_REPORT_INTERVAL: float = 10.0
+    # Sessions are recorded into this directory when set
+    RECORDING_DIR: str | None = os.getenv("RECORDING_DIR") or None
+    RECORDING_KEYFRAME_INTERVAL: int = int(
+        os.getenv("RECORDING_KEYFRAME_INTERVAL", "10")
+    )
+    RECORDING_QUALITY: int = int(os.getenv("RECORDING_QUALITY", "70"))
+    # Set ADAPTIVE_CAPTURE=1 to request frames at a rate following activity
+    ADAPTIVE_CAPTURE: bool = os.getenv("ADAPTIVE_CAPTURE", "") == "1"
+    CAPTURE_MIN_FPS: float = float(os.getenv("CAPTURE_MIN_FPS", "0.2"))
+    CAPTURE_MAX_FPS: float = float(os.getenv("CAPTURE_MAX_FPS", "2.0"))
+    CAPTURE_BURST_SECONDS: float = float(os.getenv("CAPTURE_BURST_SECONDS", "5.0"))
+    CAPTURE_BURST_THRESHOLD: float = float(os.getenv("CAPTURE_BURST_THRESHOLD", "0.02"))
+    SUMMARY_TURN_HOLD_SECONDS: float = 4.0
+    SUMMARY_DEADLINE_SECONDS: float = 15.0
+    SUMMARY_FINISH_GRACE_SECONDS: float = 0.3
+    # Set SUMMARY_CACHE=1 to reuse descriptions of screens seen earlier
+    SUMMARY_CACHE: bool = os.getenv("SUMMARY_CACHE", "") == "1"
+    SUMMARY_CACHE_SIZE: int = 256
+    SUMMARY_CACHE_TTL_SECONDS: float = 24 * 3600
+    # Fraction of perceptual hash bits two screens may differ in to match
+    SUMMARY_CACHE_MAX_DISTANCE: float = 0.05
+    # Set TTS_CACHE=0 to synthesize every phrase
+    TTS_CACHE: bool = os.getenv("TTS_CACHE", "1") == "1"
+    TTS_CACHE_MAX_BYTES: int = int(
+        os.getenv("TTS_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+    )
+    TTS_CACHE_MAX_CHARS: int = int(os.getenv("TTS_CACHE_MAX_CHARS", "120"))
+    # Synthesized phrases are also kept here when set, across restarts
+    TTS_CACHE_DIR: str | None = os.getenv("TTS_CACHE_DIR") or None
+    # Set SPECULATIVE_LLM=1 to start replies from interim transcripts before
+    # the final one arrives
+    SPECULATIVE_LLM: bool = os.getenv("SPECULATIVE_LLM", "") == "1"
+    SPECULATION_MATCH_THRESHOLD: float = float(
+        os.getenv("SPECULATION_MATCH_THRESHOLD", "0.9")
+    )
+    SPECULATION_MIN_CHARS: int = int(os.getenv("SPECULATION_MIN_CHARS", "8"))
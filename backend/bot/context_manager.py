@@ -0,0 +1,270 @@
+"""Keeps the conversation context within a size budget."""
+
+import copy
+from collections.abc import Collection
+from dataclasses import dataclass, field
+
+from loguru import logger
+from pipecat.services.anthropic import AnthropicLLMContext
+
+# Replaces references to earlier screenshots once a turn is aged, so the
+# turn never changes again and can stay in the cached prompt prefix
+DROPPED_REFERENCE_TEXT = "[The screen had not changed since an earlier screenshot.]"
+
+# Prompt cache breakpoints kept on messages; the system prompt holds another
+# and Anthropic allows four per request
+MAX_MESSAGE_BREAKPOINTS = 2
+
+
+@dataclass
+class ContextTurn:
+    message: dict
+    images: list[dict]
+    summary: dict
+    # Content hash and label block of each image, in the same order
+    image_hashes: list[str | None] = field(default_factory=list)
+    labels: list[dict | None] = field(default_factory=list)
+    # Content hash -> text block pointing at an image in an earlier turn
+    references: dict[str, dict] = field(default_factory=dict)
+    # First content block the turn added to its message
+    first_block: dict | None = None
+
+
+@dataclass
+class ContextStats:
+    turns: int = 0
+    turns_compacted: int = 0
+    last_context_bytes: int = 0
+    last_image_count: int = 0
+    images_deduplicated: int = 0
+
+
+def block_size(block: dict) -> int:
+    if block.get("type") == "image":
+        return len(block["source"]["data"])
+    return len(block.get("text", ""))
+
+
+def message_size(message: dict) -> int:
+    content = message.get("content")
+    if isinstance(content, str):
+        return len(content)
+    return sum(block_size(block) for block in content or [])
+
+
+class PromptCacheContext(AnthropicLLMContext):
+    """AnthropicLLMContext with prompt cache breakpoints chosen by the caller.
+
+    pipecat marks the last two user messages, but those carry the screenshots
+    ContextManager is about to age out, so the next request never matches the
+    cached prefix. Here the breakpoints are the (message, content index)
+    pairs in `cache_breakpoints`, which ContextManager keeps at the end of
+    the part of the context that no longer changes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_breakpoints: list[tuple[dict, int]] = []
+
+    def get_messages_with_cache_control_markers(self) -> list[dict]:
+        messages = copy.deepcopy(self.messages)
+        for original, marked in zip(self.messages, messages):
+            for message, index in self.cache_breakpoints:
+                if original is not message or not marked["content"]:
+                    continue
+                if isinstance(marked["content"], str):
+                    marked["content"] = [{"type": "text", "text": marked["content"]}]
+                marked["content"][index]["cache_control"] = {"type": "ephemeral"}
+        return messages
+
+
+class ContextManager:
+    """Ages image-bearing turns out of an AnthropicLLMContext.
+
+    Only the newest `max_image_turns` turns keep their screenshots. Older turns
+    keep the narrative summary that was attached to them instead. If the
+    context is still over `max_bytes`, aged summaries are cut down to their
+    latest entry, then images are dropped from all but the newest turn.
+
+    Turns may reference a screenshot attached by an earlier turn instead of
+    attaching it again. Referenced screenshots stay as long as the turn that
+    references them keeps its images.
+
+    Aged turns are never modified again (unless the context goes over
+    budget), so with a PromptCacheContext the prompt cache breakpoints are
+    moved to the end of the aged part of the context after each compaction.
+    """
+
+    def __init__(
+        self,
+        context: AnthropicLLMContext,
+        max_bytes: int = 2_000_000,
+        max_image_turns: int = 2,
+    ):
+        self.context = context
+        self.max_bytes = max_bytes
+        self.max_image_turns = max_image_turns
+        self.turns: list[ContextTurn] = []
+        self.stats = ContextStats()
+        logger.debug("ContextManager initialized")
+
+    def track_turn(
+        self,
+        images: list[dict],
+        summary: dict,
+        image_hashes: list[str] | None = None,
+        labels: list[dict] | None = None,
+        references: dict[str, dict] | None = None,
+        first_block: dict | None = None,
+    ) -> None:
+        """Record the turn that was just added as the last context message."""
+        self.turns.append(
+            ContextTurn(
+                self.context.messages[-1],
+                images,
+                summary,
+                image_hashes=image_hashes or [None] * len(images),
+                labels=labels or [None] * len(images),
+                references=references or {},
+                first_block=first_block,
+            )
+        )
+        self.stats.turns += 1
+        self.stats.images_deduplicated += len(references or {})
+
+    def has_image(self, image_hash: str) -> bool:
+        """Whether an image with this content hash is still in the context."""
+        live_messages = {id(message) for message in self.context.messages}
+        return any(
+            image_hash in turn.image_hashes and id(turn.message) in live_messages
+            for turn in self.turns
+        )
+
+    def compact(self) -> int:
+        """Compact aged turns and return the resulting context size in bytes."""
+        live_messages = {id(message) for message in self.context.messages}
+        self.turns = [turn for turn in self.turns if id(turn.message) in live_messages]
+
+        image_turns = [turn for turn in self.turns if turn.images or turn.references]
+        kept = image_turns[-self.max_image_turns :] if self.max_image_turns else []
+        keep = {key for turn in kept for key in turn.references}
+        for turn in image_turns[: -self.max_image_turns or None]:
+            self._drop_images(turn, keep)
+
+        size = self.context_size()
+        if size > self.max_bytes:
+            for turn in self.turns[:-1]:
+                self._shorten_summary(turn)
+            keep = set(self.turns[-1].references) if self.turns else set()
+            for turn in self.turns[:-1]:
+                self._drop_images(turn, keep)
+            size = self.context_size()
+            if isinstance(self.context, PromptCacheContext):
+                # Aged turns changed too, earlier breakpoints no longer match
+                self.context.cache_breakpoints = []
+
+        if isinstance(self.context, PromptCacheContext):
+            self._place_cache_breakpoints()
+
+        self.stats.last_context_bytes = size
+        self.stats.last_image_count = sum(len(turn.images) for turn in self.turns)
+        logger.debug(
+            f"Context size after turn {self.stats.turns}: {size} bytes, "
+            f"{len(self.context.messages)} messages, "
+            f"{self.stats.last_image_count} images"
+        )
+        if size > self.max_bytes:
+            logger.warning(
+                f"Context still over budget: {size} > {self.max_bytes} bytes"
+            )
+        return size
+
+    def context_size(self) -> int:
+        return sum(message_size(message) for message in self.context.messages)
+
+    def _place_cache_breakpoints(self) -> None:
+        """Mark the last content block before the first turn that can still change."""
+        messages = self.context.messages
+        mutable = next((t for t in self.turns if t.images or t.references), None)
+
+        breakpoint = None
+        if mutable is None:
+            if messages:
+                breakpoint = self._last_block(messages[-1])
+        else:
+            content = mutable.message["content"]
+            position = next(
+                (i for i, block in enumerate(content) if block is mutable.first_block),
+                0,
+            )
+            if position > 0:
+                breakpoint = (mutable.message, position - 1)
+            else:
+                index = next(
+                    i
+                    for i, message in enumerate(messages)
+                    if message is mutable.message
+                )
+                if index > 0:
+                    breakpoint = self._last_block(messages[index - 1])
+
+        live_messages = {id(message) for message in messages}
+        breakpoints = [
+            (message, index)
+            for message, index in self.context.cache_breakpoints
+            if id(message) in live_messages
+        ]
+        if breakpoint and not any(
+            message is breakpoint[0] and index == breakpoint[1]
+            for message, index in breakpoints
+        ):
+            # Keep the previous breakpoint too, it is what this request reads
+            breakpoints.append(breakpoint)
+        self.context.cache_breakpoints = breakpoints[-MAX_MESSAGE_BREAKPOINTS:]
+
+    @staticmethod
+    def _last_block(message: dict) -> tuple[dict, int]:
+        content = message["content"]
+        return message, 0 if isinstance(content, str) else len(content) - 1
+
+    def _drop_images(self, turn: ContextTurn, keep: Collection[str] = ()) -> None:
+        """Drop a turn's images, except those whose hash is in `keep`."""
+        for note in turn.references.values():
+            note["text"] = DROPPED_REFERENCE_TEXT
+        turn.references = {}
+
+        dropped = [
+            i
+            for i, key in enumerate(turn.image_hashes)
+            if key is None or key not in keep
+        ]
+        if not dropped:
+            return
+
+        content = turn.message["content"]
+        for i in dropped:
+            for removed in (turn.images[i], turn.labels[i]):
+                # Blocks are shared between turns, so remove by identity and
+                # only the first (oldest) occurrence
+                for j, block in enumerate(content):
+                    if block is removed:
+                        del content[j]
+                        break
+
+            # Later turns can no longer point at this image
+            for other in self.turns:
+                note = other.references.pop(turn.image_hashes[i], None)
+                if note is not None:
+                    note["text"] = DROPPED_REFERENCE_TEXT
+
+        turn.images = [image for i, image in enumerate(turn.images) if i not in dropped]
+        turn.image_hashes = [
+            key for i, key in enumerate(turn.image_hashes) if i not in dropped
+        ]
+        turn.labels = [label for i, label in enumerate(turn.labels) if i not in dropped]
+        self.stats.turns_compacted += 1
+
+    def _shorten_summary(self, turn: ContextTurn) -> None:
+        entries = turn.summary.get("text", "").split("\n")
+        if len(entries) > 1:
+            turn.summary["text"] = entries[-1]
@@ -0,0 +1,146 @@
+"""Adaptive screen capture rate driven by on-screen activity and speech."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from frame_processors.change_detector import ChangeDetector
+from loguru import logger
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    ImageRawFrame,
+    UserImageRequestFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+@dataclass
+class CaptureStats:
+    frames_captured: int = 0
+    bursts: int = 0
+    started_at: float | None = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at else 0.0
+
+    def effective_fps(self) -> float:
+        elapsed = self.elapsed()
+        return self.frames_captured / elapsed if elapsed else 0.0
+
+    def frames_saved(self, max_fps: float) -> int:
+        """Frames a fixed capture at `max_fps` would have taken on top of ours."""
+        return max(0, int(self.elapsed() * max_fps) - self.frames_captured)
+
+
+class AdaptiveCaptureProcessor(FrameProcessor):
+    """Requests screen frames from the input transport at an adaptive rate.
+
+    The participant's video is captured with a framerate of 0, so the
+    transport only renders a frame when asked to. Frames are requested at
+    `min_fps` while the screen is idle, and at `max_fps` while the user is
+    speaking and for `burst_seconds` after a frame changed by more than
+    `burst_threshold` from the previous one, or after the user stopped
+    speaking.
+    """
+
+    def __init__(
+        self,
+        min_fps: float = 0.2,
+        max_fps: float = 2.0,
+        burst_seconds: float = 5.0,
+        burst_threshold: float = 0.02,
+    ):
+        super().__init__()
+        if not 0 < min_fps <= max_fps:
+            raise ValueError(
+                f"Capture rates must satisfy 0 < min_fps <= max_fps, "
+                f"got {min_fps} and {max_fps}"
+            )
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.burst_seconds = burst_seconds
+        self.burst_threshold = burst_threshold
+        self.change_detector = ChangeDetector()
+        self.participant_id: str | None = None
+        self.user_speaking = False
+        self.burst_until = 0.0
+        self.stats = CaptureStats()
+        self._rate_changed = asyncio.Event()
+        self._request_task: asyncio.Task | None = None
+
+    @property
+    def current_fps(self) -> float:
+        if self.user_speaking or time.monotonic() < self.burst_until:
+            return self.max_fps
+        return self.min_fps
+
+    def start(self, participant_id: str) -> None:
+        """Start requesting frames from `participant_id`'s screen."""
+        self.participant_id = participant_id
+        self.stats.started_at = time.monotonic()
+        if not self._request_task:
+            self._request_task = asyncio.create_task(self._request_loop())
+
+    async def stop(self) -> None:
+        if self._request_task:
+            self._request_task.cancel()
+            self._request_task = None
+            logger.info(
+                f"Adaptive capture: {self.stats.effective_fps():.2f} fps effective, "
+                f"{self.stats.frames_captured} frames captured, "
+                f"{self.stats.frames_saved(self.max_fps)} saved, "
+                f"{self.stats.bursts} bursts"
+            )
+
+    async def cleanup(self):
+        await super().cleanup()
+        await self.stop()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, ImageRawFrame):
+            self.stats.frames_captured += 1
+            if self.change_detector.score(frame) >= self.burst_threshold:
+                self._burst()
+            self.change_detector.set_reference(frame)
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self.user_speaking = True
+            self._rate_changed.set()
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self.user_speaking = False
+            self._burst()
+        elif isinstance(frame, (EndFrame, CancelFrame)):
+            await self.stop()
+
+        await self.push_frame(frame, direction)
+
+    def _burst(self) -> None:
+        if self.current_fps < self.max_fps:
+            self.stats.bursts += 1
+            self._rate_changed.set()
+        self.burst_until = time.monotonic() + self.burst_seconds
+
+    async def _request_loop(self) -> None:
+        while True:
+            requested_at = time.monotonic()
+            await self.push_frame(
+                UserImageRequestFrame(user_id=self.participant_id),
+                FrameDirection.UPSTREAM,
+            )
+            # Wake up early if the rate went up in the meantime, but never
+            # request faster than max_fps
+            self._rate_changed.clear()
+            try:
+                await asyncio.wait_for(
+                    self._rate_changed.wait(), timeout=1 / self.current_fps
+                )
+            except TimeoutError:
+                pass
+            await asyncio.sleep(
+                max(0.0, requested_at + 1 / self.max_fps - time.monotonic())
+            )
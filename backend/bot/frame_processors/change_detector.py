@@ -0,0 +1,138 @@
+"""Cheap frame-to-frame change scoring for screen captures."""
+
+import numpy as np
+from pipecat.frames.frames import ImageRawFrame
+
+
+def frame_signature(
+    frame: ImageRawFrame, grid_size: int = 32, sample_size: int = 256
+) -> np.ndarray:
+    """Downsample a frame to a small grayscale grid.
+
+    The frame is strided down to roughly `sample_size` pixels on each side
+    before being block-averaged into a `grid_size` x `grid_size` grid, so the
+    cost stays flat regardless of screen resolution.
+    """
+    width, height = frame.size
+    channels = len(frame.image) // (width * height)
+    pixels = np.frombuffer(frame.image, dtype=np.uint8).reshape(height, width, channels)
+
+    step_y = max(1, height // sample_size)
+    step_x = max(1, width // sample_size)
+    sampled = pixels[::step_y, ::step_x, :3]
+
+    # Crop to a multiple of the grid so the block average is a plain reshape
+    cell_h = max(1, sampled.shape[0] // grid_size)
+    cell_w = max(1, sampled.shape[1] // grid_size)
+    rows = sampled.shape[0] // cell_h
+    cols = sampled.shape[1] // cell_w
+    cropped = sampled[: rows * cell_h, : cols * cell_w].mean(axis=2, dtype=np.float32)
+
+    return cropped.reshape(rows, cell_h, cols, cell_w).mean(axis=(1, 3))
+
+
+class ChangeDetector:
+    """Scores how much a frame differs from a reference frame.
+
+    The score is the fraction of grid cells whose average brightness moved by
+    more than `cell_threshold` levels, so 0.0 means visually identical and
+    1.0 means every part of the screen changed.
+    """
+
+    def __init__(self, grid_size: int = 32, cell_threshold: float = 8.0):
+        self.grid_size = grid_size
+        self.cell_threshold = cell_threshold
+        self.reference: np.ndarray | None = None
+
+    def signature(self, frame: ImageRawFrame) -> np.ndarray:
+        return frame_signature(frame, grid_size=self.grid_size)
+
+    def score(self, frame: ImageRawFrame) -> float:
+        """Return the change score of `frame` against the reference (1.0 if none)."""
+        if self.reference is None:
+            return 1.0
+
+        signature = self.signature(frame)
+        if signature.shape != self.reference.shape:
+            return 1.0
+
+        changed = np.abs(signature - self.reference) > self.cell_threshold
+        return float(changed.mean())
+
+    def set_reference(self, frame: ImageRawFrame) -> None:
+        self.reference = self.signature(frame)
+
+
+def changed_regions(
+    previous: np.ndarray,
+    current: np.ndarray,
+    tile_size: int = 32,
+    pixel_threshold: int = 24,
+    max_regions: int = 4,
+) -> list[tuple[int, int, int, int]]:
+    """Find the boxes that changed between two equally sized (H, W, C) frames.
+
+    The frames are compared tile by tile. Changed tiles that touch (or sit one
+    tile apart) are grouped into one region. Boxes are returned as
+    (left, top, right, bottom) pixel coordinates. When there are more than
+    `max_regions` groups they are merged into a single bounding box.
+    """
+    height, width = current.shape[:2]
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+
+    # max - min keeps the difference in uint8 without overflow
+    diff = (np.maximum(previous, current) - np.minimum(previous, current))[..., :3]
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=np.uint8)
+    padded[:height, :width] = diff.max(axis=2)
+    mask = padded.reshape(rows, tile_size, cols, tile_size).max(axis=(1, 3))
+    mask = mask > pixel_threshold
+    if not mask.any():
+        return []
+
+    # Grow the mask by one tile so fragments of the same widget group together
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+
+    visited = np.zeros_like(grown)
+    tile_boxes = []
+    for start in zip(*np.nonzero(mask)):
+        if visited[start]:
+            continue
+        visited[start] = True
+        stack = [start]
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while stack:
+            r, c = stack.pop()
+            if mask[r, c]:
+                top, bottom = min(top, r), max(bottom, r)
+                left, right = min(left, c), max(right, c)
+            for nr in range(max(0, r - 1), min(rows, r + 2)):
+                for nc in range(max(0, c - 1), min(cols, c + 2)):
+                    if grown[nr, nc] and not visited[nr, nc]:
+                        visited[nr, nc] = True
+                        stack.append((nr, nc))
+        tile_boxes.append((left, top, right, bottom))
+
+    if len(tile_boxes) > max_regions:
+        tile_boxes = [
+            (
+                min(box[0] for box in tile_boxes),
+                min(box[1] for box in tile_boxes),
+                max(box[2] for box in tile_boxes),
+                max(box[3] for box in tile_boxes),
+            )
+        ]
+
+    return [
+        (
+            int(left * tile_size),
+            int(top * tile_size),
+            int(min(width, (right + 1) * tile_size)),
+            int(min(height, (bottom + 1) * tile_size)),
+        )
+        for left, top, right, bottom in tile_boxes
+    ]
@@ -0,0 +1,71 @@
+"""Background encoding stage for image frames."""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from loguru import logger
+
+
+class FrameEncoder:
+    """Runs CPU-heavy frame work on a worker pool so the event loop stays free.
+
+    At most `max_pending` jobs wait for a free worker. When a new job arrives
+    on a full queue the oldest waiting one is dropped, so a slow encoder sheds
+    stale frames instead of backing up the pipeline. Jobs a worker already
+    started always finish.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        use_processes: bool = False,
+        max_pending: int = 4,
+        executor: Executor | None = None,
+    ):
+        self.max_pending = max(1, max_pending)
+        self.frames_dropped = 0
+        # A shared executor is owned by the caller and survives shutdown()
+        self._owns_executor = executor is None
+        self._executor: Executor = executor or (
+            ProcessPoolExecutor(max_workers=max_workers)
+            if use_processes
+            else ThreadPoolExecutor(max_workers=max_workers)
+        )
+        # Jobs not yet picked up by a worker, oldest first
+        self._pending: deque[Future] = deque()
+        logger.debug(
+            f"FrameEncoder initialized with {max_workers} "
+            f"{'process' if use_processes else 'thread'} worker(s)"
+        )
+
+    def submit(self, fn: Callable, *args) -> asyncio.Future:
+        """Schedule `fn(*args)` on the pool and return an awaitable future."""
+        self._pending = deque(job for job in self._pending if not self._started(job))
+
+        while len(self._pending) >= self.max_pending:
+            # Fails if a worker picked the job up meanwhile, it then finishes
+            if self._pending.popleft().cancel():
+                self.frames_dropped += 1
+                logger.debug("Encoder queue full, dropped oldest frame")
+
+        job = self._executor.submit(fn, *args)
+        self._pending.append(job)
+        return asyncio.wrap_future(job)
+
+    def shutdown(self) -> None:
+        for job in self._pending:
+            job.cancel()
+        self._pending.clear()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _started(job: Future) -> bool:
+        return job.running() or job.done()
@@ -1,11 +1,19 @@
 """Image processing and management components."""
 
+import asyncio
 import base64
+import hashlib
 import io
 import time
 from collections import deque
-from typing import Dict, List
-
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from frame_processors.change_detector import ChangeDetector, changed_regions
+from frame_processors.frame_encoder import FrameEncoder
+from frame_processors.routing import LIFECYCLE_FRAMES
+from frame_processors.summary_cache import SummaryCache, perceptual_hash
+from frame_processors.summary_scheduler import SummaryScheduler
 from loguru import logger
 from PIL import Image
 from pipecat.frames.frames import (
@@ -13,33 +21,277 @@ from pipecat.frames.frames import (
     ImageRawFrame,
     LLMFullResponseEndFrame,
     LLMMessagesFrame,
+    StartInterruptionFrame,
     TextFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
 )
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 
+# Anthropic bills roughly one token per 750 image pixels
+PIXELS_PER_TOKEN = 750
+
+VISION_PROFILE = "vision"
+CONVERSATION_PROFILE = "conversation"
+
+SUMMARY_MODE_FULL = "full"
+SUMMARY_MODE_DELTA = "delta"
+
+# Frames that mean a conversation turn is starting
+CONVERSATION_FRAMES = (
+    UserStartedSpeakingFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    OpenAILLMContextFrame,
+)
+
+
+@dataclass
+class ImageBudget:
+    """Size and byte limits for the images sent in one LLM request."""
+
+    max_long_edge: int = 1568
+    max_pixels: int = 1_150_000
+    max_request_bytes: int = 1_500_000
+    max_request_tokens: int | None = None
+    format: str = "JPEG"
+    qualities: tuple[int, ...] = (85, 70, 55, 40)
+
+
+@dataclass
+class EncodeStats:
+    frames_received: int = 0
+    frames_encoded: int = 0
+    frames_dropped: int = 0
+    cache_hits: int = 0
+    encode_seconds: float = 0.0
+    requests: dict[str, int] = field(default_factory=dict)
+    bytes_sent: dict[str, int] = field(default_factory=dict)
+    last_request_bytes: dict[str, int] = field(default_factory=dict)
+
+    def record_request(self, profile: str, num_bytes: int) -> None:
+        self.requests[profile] = self.requests.get(profile, 0) + 1
+        self.bytes_sent[profile] = self.bytes_sent.get(profile, 0) + num_bytes
+        self.last_request_bytes[profile] = num_bytes
+
+
+@dataclass
+class SummaryStats:
+    summaries_sent: int = 0
+    summaries_skipped: int = 0
+    summaries_deferred: int = 0
+    summaries_forced: int = 0
+    summaries_cancelled: int = 0
+    summaries_cached: int = 0
+
+
+def image_block(data: str, media_type: str) -> dict:
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": media_type,
+            "data": data,
+        },
+    }
+
+
+def fit_image(image: Image.Image, budget: ImageBudget, max_images: int) -> Image.Image:
+    """Downscale an image to the budget's long edge and per-image pixel limits."""
+    max_pixels = budget.max_pixels
+    if budget.max_request_tokens:
+        token_pixels = budget.max_request_tokens * PIXELS_PER_TOKEN // max_images
+        max_pixels = min(max_pixels, token_pixels)
+
+    width, height = image.size
+    scale = min(
+        1.0,
+        budget.max_long_edge / max(width, height),
+        (max_pixels / (width * height)) ** 0.5,
+    )
+    if scale >= 1.0:
+        return image
+
+    new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return image.resize(new_size, Image.Resampling.LANCZOS)
+
+
+def frame_hash(frame: ImageRawFrame) -> str:
+    """Content hash of a frame's raw pixels, equal only for identical frames."""
+    digest = hashlib.blake2b(frame.image, digest_size=16)
+    digest.update(f"{frame.format}{frame.size}".encode())
+    return digest.hexdigest()
+
+
+def encode_image(image: Image.Image, budget: ImageBudget, max_images: int) -> dict:
+    """Encode an image with the best quality that fits the per-image byte budget.
+
+    Walks down the quality ladder, then keeps shrinking the image at the
+    lowest quality until it fits or a few attempts have been spent.
+    """
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image = fit_image(image, budget, max_images)
+    byte_budget = budget.max_request_bytes // max_images
+    media_type = f"image/{budget.format.lower()}"
+
+    for attempt in range(4):
+        for quality in budget.qualities:
+            buffer = io.BytesIO()
+            image.save(buffer, format=budget.format, quality=quality)
+            encoded_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
+            if len(encoded_image) <= byte_budget:
+                return image_block(encoded_image, media_type)
+
+        width, height = image.size
+        image = image.resize(
+            (max(1, int(width * 0.75)), max(1, int(height * 0.75))),
+            Image.Resampling.LANCZOS,
+        )
+
+    logger.warning(
+        f"Image still {len(encoded_image)} bytes after resizing, "
+        f"over the {byte_budget} byte budget"
+    )
+    return image_block(encoded_image, media_type)
+
+
+def encode_frame(
+    format: str,
+    size: tuple[int, int],
+    image: bytes,
+    budgets: dict[str, ImageBudget],
+    max_images: int,
+) -> tuple[dict[str, dict], float]:
+    """Encode raw frame data into one image content block per budget profile.
+
+    Runs on the encoder pool, so it only takes picklable arguments and returns
+    the time it spent alongside the blocks. The frame is decoded once and
+    profiles with identical budgets share a block.
+    """
+    start_time = time.perf_counter()
+    decoded = Image.frombytes(format, size, image)
+
+    blocks = {}
+    for profile, budget in budgets.items():
+        for other, block in blocks.items():
+            if budgets[other] == budget:
+                blocks[profile] = block
+                break
+        else:
+            blocks[profile] = encode_image(decoded, budget, max_images)
+
+    return blocks, time.perf_counter() - start_time
+
+
+def encode_delta(
+    format: str,
+    size: tuple[int, int],
+    image: bytes,
+    reference_image: bytes,
+    budget: ImageBudget,
+    thumbnail_edge: int,
+    max_area_fraction: float,
+) -> tuple[list[dict] | None, list[tuple[int, int, int, int]], float]:
+    """Encode a low-resolution thumbnail plus crops of the regions that changed.
+
+    Returns no blocks when the changed area is too large for cropping to pay
+    off, in which case the caller should send the full frame instead.
+    """
+    start_time = time.perf_counter()
+    width, height = size
+    previous = np.frombuffer(reference_image, dtype=np.uint8).reshape(height, width, -1)
+    current = np.frombuffer(image, dtype=np.uint8).reshape(height, width, -1)
+    regions = changed_regions(previous, current)
+
+    changed_area = sum(
+        (right - left) * (bottom - top) for left, top, right, bottom in regions
+    )
+    if changed_area > max_area_fraction * width * height:
+        return None, regions, time.perf_counter() - start_time
+
+    decoded = Image.frombytes(format, size, image)
+    num_images = len(regions) + 1
+    thumbnail_budget = replace(budget, max_long_edge=thumbnail_edge)
+    blocks = [encode_image(decoded, thumbnail_budget, num_images)]
+    for region in regions:
+        blocks.append(encode_image(decoded.crop(region), budget, num_images))
+
+    return blocks, regions, time.perf_counter() - start_time
+
 
 class ImageManager:
-    def __init__(self, max_summary_length: int = 4000, max_recent_frames: int = 10):
+    def __init__(
+        self,
+        max_summary_length: int = 4000,
+        max_recent_frames: int = 10,
+        encoder: FrameEncoder | None = None,
+        budgets: dict[str, ImageBudget] | None = None,
+        thumbnail_edge: int = 512,
+        max_delta_area_fraction: float = 0.5,
+    ):
         self.recent_frames = deque(maxlen=max_recent_frames)
+        # Futures for the encoded content blocks, kept in lockstep with
+        # recent_frames so an entry is dropped as soon as its frame leaves the deque.
+        self.encoded_frames: deque[asyncio.Future] = deque(maxlen=max_recent_frames)
+        self.frame_hashes: deque[str] = deque(maxlen=max_recent_frames)
         self.unsummarized_frames = deque()
         self.narrative_summary = ""
         self.max_summary_length = max_summary_length
+        self.encoder = encoder or FrameEncoder()
+        self.budgets = budgets or {
+            VISION_PROFILE: ImageBudget(),
+            CONVERSATION_PROFILE: ImageBudget(),
+        }
+        self.thumbnail_edge = thumbnail_edge
+        self.max_delta_area_fraction = max_delta_area_fraction
+        # Last frame sent for summarization, the baseline for delta summaries
+        self.summary_reference: ImageRawFrame | None = None
+        self.stats = EncodeStats()
         logger.debug("ImageManager initialized with narrative focus")
 
     def add_frame(self, frame: ImageRawFrame) -> None:
+        future = self.encoder.submit(
+            encode_frame,
+            frame.format,
+            frame.size,
+            frame.image,
+            self.budgets,
+            self.recent_frames.maxlen,
+        )
+        future.add_done_callback(self._on_frame_encoded)
+        self.stats.frames_received += 1
+
         self.recent_frames.append(frame)
+        self.encoded_frames.append(future)
+        self.frame_hashes.append(frame_hash(frame))
         self.unsummarized_frames.append(frame)
 
-    def get_frames(self) -> List[ImageRawFrame]:
+    def _on_frame_encoded(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.stats.frames_dropped += 1
+            return
+        if future.exception():
+            logger.error(f"Failed to encode frame: {future.exception()}")
+            return
+        _, encode_seconds = future.result()
+        self.stats.frames_encoded += 1
+        self.stats.encode_seconds += encode_seconds
+
+    def get_frames(self) -> list[ImageRawFrame]:
         logger.debug(f"Retrieving {len(self.recent_frames)} image frames")
         return list(self.recent_frames)
 
-    def get_unsummarized_frames(self) -> List[ImageRawFrame]:
+    def get_unsummarized_frames(self) -> list[ImageRawFrame]:
         return list(self.unsummarized_frames)
 
     def clear_unsummarized_frames(self) -> None:
         self.unsummarized_frames.clear()
 
+    def set_summary_reference(self, frame: ImageRawFrame) -> None:
+        self.summary_reference = frame
+
     def update_summary(self, new_text: str) -> None:
         # Update the narrative summary, keeping the most recent content
         timestamp = time.strftime("%H:%M:%S")
@@ -73,29 +325,118 @@ class ImageManager:
     def get_summary(self) -> str:
         return self.narrative_summary
 
-    def recent_images_to_llm_messages(self) -> List[Dict[str, str]]:
-        """Convert image frames to base64-encoded content items."""
+    def get_stats(self) -> EncodeStats:
+        return self.stats
+
+    async def recent_images_to_llm_messages(
+        self, profile: str = CONVERSATION_PROFILE
+    ) -> list[dict[str, str]]:
+        """Return the base64-encoded content items for the recent frames.
+
+        Images are prepared with the budget registered for `profile`. Frames
+        whose encoding was dropped or failed are left out.
+        """
+        return [block for _, block in await self.recent_images_with_hashes(profile)]
+
+    async def recent_images_with_hashes(
+        self, profile: str = CONVERSATION_PROFILE
+    ) -> list[tuple[str, dict[str, str]]]:
+        """Like `recent_images_to_llm_messages`, paired with each frame's hash."""
         content = []
-        for frame in self.recent_frames:
-            buffer = io.BytesIO()
-            Image.frombytes(frame.format, frame.size, frame.image).save(
-                buffer, format="JPEG"
-            )
-            encoded_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        for key, future in list(zip(self.frame_hashes, self.encoded_frames)):
+            if future.done():
+                self.stats.cache_hits += 1
+            try:
+                # Shielded so cancelling this call leaves the shared job alone
+                blocks, _ = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue  # Dropped by the encoder
+            except (OSError, ValueError):
+                # PIL and numpy report image data they can't handle as these
+                logger.opt(exception=True).warning(
+                    f"Skipping frame {key[:8]}, its encode failed"
+                )
+                continue
+            content.append((key, blocks[profile]))
 
-            content.append(
-                {
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "image/jpeg",
-                        "data": encoded_image,
-                    },
-                }
-            )
+        request_bytes = sum(len(block["source"]["data"]) for _, block in content)
+        self.stats.record_request(profile, request_bytes)
 
+        logger.debug(
+            f"Served {len(content)} encoded image(s) for {profile}, "
+            f"{request_bytes} bytes "
+            f"({self.stats.frames_encoded} encoded "
+            f"in {self.stats.encode_seconds:.3f}s, "
+            f"{self.stats.cache_hits} cache hits, {self.stats.frames_dropped} dropped)"
+        )
         return content
 
+    async def delta_images_to_llm_messages(
+        self, frame: ImageRawFrame, profile: str = VISION_PROFILE
+    ) -> list[dict[str, str]] | None:
+        """Return a thumbnail plus crops of what changed since the summary reference.
+
+        Returns None when there is no comparable reference, most of the
+        screen changed or the encode failed, so the caller can fall back to
+        full frames.
+        """
+        reference = self.summary_reference
+        if (
+            reference is None
+            or reference.size != frame.size
+            or reference.format != frame.format
+        ):
+            return None
+
+        future = self.encoder.submit(
+            encode_delta,
+            frame.format,
+            frame.size,
+            frame.image,
+            reference.image,
+            self.budgets[profile],
+            self.thumbnail_edge,
+            self.max_delta_area_fraction,
+        )
+        try:
+            blocks, regions, encode_seconds = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            return None  # Dropped by the encoder
+        except (OSError, ValueError):
+            logger.opt(exception=True).warning(
+                "Delta encode failed, falling back to full frames"
+            )
+            return None
+        self.stats.encode_seconds += encode_seconds
+
+        if blocks is None:
+            logger.debug("Changed area too large for a delta summary")
+            return None
+
+        request_bytes = sum(len(block["source"]["data"]) for block in blocks)
+        self.stats.record_request(profile, request_bytes)
+        logger.debug(
+            f"Served delta of {len(regions)} changed region(s) for {profile}, "
+            f"{request_bytes} bytes"
+        )
+
+        boxes = ", ".join(str(region) for region in regions) or "none"
+        return blocks + [
+            {
+                "type": "text",
+                "text": (
+                    "The first image is a low-resolution view of the whole screen "
+                    f"({frame.size[0]}x{frame.size[1]}). The following images are "
+                    "full-resolution crops of the regions that changed, as "
+                    f"(left, top, right, bottom) boxes: {boxes}."
+                ),
+            }
+        ]
+
 
 class ImageFrameProcessor(FrameProcessor):
     def __init__(self, image_manager: ImageManager):
@@ -112,23 +453,55 @@ class ImageFrameProcessor(FrameProcessor):
 
 class SummarizeImageFrames(FrameProcessor):
     def __init__(
-        self, image_manager: ImageManager, summary_interval_seconds: float = 2.0
+        self,
+        image_manager: ImageManager,
+        summary_interval_seconds: float = 2.0,
+        change_threshold: float = 0.01,
+        summary_mode: str = SUMMARY_MODE_FULL,
+        scheduler: SummaryScheduler | None = None,
+        cache: SummaryCache | None = None,
     ):
         super().__init__()
         self.image_manager = image_manager
         self.summary_interval = summary_interval_seconds
+        self.change_threshold = change_threshold
+        self.summary_mode = summary_mode
+        self.scheduler = scheduler or SummaryScheduler()
+        self.cache = cache
+        # Perceptual hash of the screen the in-flight summary describes, None
+        # for delta summaries, which only describe what changed
+        self._summary_key: int | None = None
+        self.change_detector = ChangeDetector()
+        self.max_change_since_summary = 0.0
         self.last_summary_time = 0
         self.pending_summary = False
+        # State to restore if the in-flight summary is cancelled
+        self._rollback: tuple | None = None
+        self.stats = SummaryStats()
         logger.debug(
-            f"SummarizeImageFrames initialized with {summary_interval_seconds}s interval"
+            "SummarizeImageFrames initialized with "
+            f"{summary_interval_seconds}s interval"
         )
 
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
 
+        if isinstance(frame, CONVERSATION_FRAMES):
+            if self.scheduler.conversation_activity() and self.pending_summary:
+                await self.cancel_summary()
+            return
+
+        if isinstance(frame, LIFECYCLE_FRAMES):
+            # The vision LLM starts and stops with the pipeline
+            await self.push_frame(frame, direction)
+            return
+
         if isinstance(frame, ImageRawFrame):
             current_time = time.time()
             unsummarized_frames = self.image_manager.get_unsummarized_frames()
+            self.max_change_since_summary = max(
+                self.max_change_since_summary, self.change_detector.score(frame)
+            )
 
             should_summarize = (
                 len(unsummarized_frames) > 0
@@ -136,9 +509,38 @@ class SummarizeImageFrames(FrameProcessor):
                 and not self.pending_summary
             )
 
-            if should_summarize:
+            if (
+                should_summarize
+                and self.max_change_since_summary < self.change_threshold
+            ):
+                # Nothing worth describing changed since the last summary
+                self.last_summary_time = current_time
+                self.image_manager.clear_unsummarized_frames()
+                self.stats.summaries_skipped += 1
+                logger.debug(
+                    f"Skipped summary, change {self.max_change_since_summary:.4f} "
+                    f"below threshold ({self.stats.summaries_skipped} skipped, "
+                    f"{self.stats.summaries_sent} sent)"
+                )
+            elif should_summarize and self._use_cached_summary(frame):
+                self.last_summary_time = current_time
+            elif should_summarize and not (reason := self.scheduler.may_start()):
+                # A conversation turn is running, keep the change for later
+                self.stats.summaries_deferred += 1
+            elif should_summarize:
+                if reason == "deadline":
+                    self.stats.summaries_forced += 1
+                self._rollback = (
+                    self.max_change_since_summary,
+                    self.change_detector.reference,
+                    self.image_manager.summary_reference,
+                )
                 self.pending_summary = True
+                self.scheduler.started()
                 self.last_summary_time = current_time
+                self.change_detector.set_reference(frame)
+                self.max_change_since_summary = 0.0
+                self.stats.summaries_sent += 1
 
                 system_message = f"""
 You are analyzing a continuous stream of screen captures. Provide a brief, focused update on what has changed.
@@ -153,13 +555,30 @@ Guidelines:
 - Keep it to 1-2 sentences
 """
 
+                try:
+                    images = None
+                    if self.summary_mode == SUMMARY_MODE_DELTA:
+                        images = await self.image_manager.delta_images_to_llm_messages(
+                            frame, VISION_PROFILE
+                        )
+                    if images is not None:
+                        # Describes the change from the previous screen, which
+                        # the cache, keyed on this screen alone, can't reuse
+                        self._summary_key = None
+                    else:
+                        images = await self.image_manager.recent_images_to_llm_messages(
+                            VISION_PROFILE
+                        )
+                except asyncio.CancelledError:
+                    # Interrupted by a conversation turn before the request went out
+                    self._restore()
+                    raise
+                self.image_manager.set_summary_reference(frame)
+
                 summary_frame = LLMMessagesFrame(
                     messages=[
                         {"role": "system", "content": system_message},
-                        {
-                            "role": "user",
-                            "content": self.image_manager.recent_images_to_llm_messages(),
-                        },
+                        {"role": "user", "content": images},
                     ],
                 )
                 logger.debug(
@@ -167,6 +586,52 @@ Guidelines:
                 )
                 await self.push_frame(summary_frame, direction)
 
+    def summary_finished(self, summary: str) -> None:
+        if self.cache and self._summary_key is not None:
+            self.cache.store(self._summary_key, summary)
+        self.pending_summary = False
+        self._rollback = None
+        self.scheduler.finished()
+
+    def _use_cached_summary(self, frame: ImageRawFrame) -> bool:
+        """Describe `frame` from the cache if this screen was seen before."""
+        if not self.cache:
+            return False
+
+        self._summary_key = perceptual_hash(frame)
+        summary = self.cache.lookup(self._summary_key)
+        if summary is None:
+            return False
+
+        self.image_manager.update_summary(summary)
+        self.image_manager.clear_unsummarized_frames()
+        self.image_manager.set_summary_reference(frame)
+        self.change_detector.set_reference(frame)
+        self.max_change_since_summary = 0.0
+        self.stats.summaries_cached += 1
+        logger.debug(
+            f"Reused cached summary ({self.cache.stats.hit_rate():.0%} hit rate)"
+        )
+        return True
+
+    async def cancel_summary(self) -> None:
+        """Stop the in-flight summary and keep its frames for the next one."""
+        logger.debug("Cancelling in-flight summary for a conversation turn")
+        await self.push_frame(StartInterruptionFrame())
+        self._restore()
+        self.stats.summaries_cancelled += 1
+
+    def _restore(self) -> None:
+        if self._rollback:
+            (
+                self.max_change_since_summary,
+                self.change_detector.reference,
+                self.image_manager.summary_reference,
+            ) = self._rollback
+            self._rollback = None
+        self.pending_summary = False
+        self.scheduler.cancelled()
+
 
 class ProcessImageSummaryFrame(FrameProcessor):
     def __init__(
@@ -180,12 +645,25 @@ class ProcessImageSummaryFrame(FrameProcessor):
 
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
+        if isinstance(frame, StartInterruptionFrame):
+            # The summary was cancelled, drop what was streamed so far
+            self.current_summary = ""
+            return
+
+        if isinstance(frame, LIFECYCLE_FRAMES):
+            await self.push_frame(frame, direction)
+            return
+
+        # Ignore leftovers from a cancelled summary
+        if not self.summarize_processor.pending_summary:
+            return
+
         if isinstance(frame, TextFrame):
             self.current_summary += frame.text
 
         if isinstance(frame, LLMFullResponseEndFrame):
             logger.debug("Received LLMFullResponseEndFrame")
-            self.summarize_processor.pending_summary = False
+            self.summarize_processor.summary_finished(self.current_summary)
             self.image_manager.update_summary(self.current_summary)
             self.image_manager.clear_unsummarized_frames()
             self.current_summary = ""
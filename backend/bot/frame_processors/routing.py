@@ -0,0 +1,173 @@
+"""Parallel pipeline that routes frames to branches by type."""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import chain
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    StartFrame,
+    StartInterruptionFrame,
+    StopInterruptionFrame,
+)
+from pipecat.pipeline.base_pipeline import BasePipeline
+from pipecat.pipeline.parallel_pipeline import Sink, Source
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+# Frames every branch receives, so all of them start, stop and are interrupted
+LIFECYCLE_FRAMES = (
+    StartFrame,
+    EndFrame,
+    CancelFrame,
+    StartInterruptionFrame,
+    StopInterruptionFrame,
+)
+
+# Ids of frames sent through several branches, to pass on only one copy
+MAX_TRACKED_FRAMES = 256
+
+
+@dataclass
+class Branch:
+    """Processors of one parallel branch and the downstream frames it takes.
+
+    A frame is routed to the branch if it is an instance of one of `accepts`
+    and of none of `rejects`. Lifecycle frames are always routed.
+    """
+
+    processors: list[FrameProcessor]
+    accepts: tuple[type[Frame], ...] = (Frame,)
+    rejects: tuple[type[Frame], ...] = ()
+
+    def takes(self, frame_type: type[Frame]) -> bool:
+        if issubclass(frame_type, LIFECYCLE_FRAMES):
+            return True
+        return issubclass(frame_type, self.accepts) and not issubclass(
+            frame_type, self.rejects
+        )
+
+
+class RoutedParallelPipeline(BasePipeline):
+    """ParallelPipeline that only sends each branch the frames it takes.
+
+    Routes are worked out once per frame type. A frame taken by a single
+    branch is queued to it directly, without the task per branch and frame
+    ParallelPipeline creates. Frames that went through several branches are
+    passed on once, when the first copy comes out. An EndFrame is only passed
+    on once every branch has flushed it, so the pipeline finishes after all
+    branches did.
+    """
+
+    def __init__(self, *branches: Branch):
+        super().__init__()
+        if not branches:
+            raise ValueError("RoutedParallelPipeline needs at least one branch")
+
+        self._branches = list(branches)
+        self._up_queue = asyncio.Queue()
+        self._down_queue = asyncio.Queue()
+        self._up_task: asyncio.Task | None = None
+        self._down_task: asyncio.Task | None = None
+        self._sources: list[Source] = []
+        self._sinks: list[Sink] = []
+        self._pipelines: list[Pipeline] = []
+        for branch in branches:
+            source = Source(self._up_queue)
+            sink = Sink(self._down_queue)
+            pipeline = Pipeline(branch.processors)
+            source.link(pipeline)
+            pipeline.link(sink)
+            self._sources.append(source)
+            self._sinks.append(sink)
+            self._pipelines.append(pipeline)
+
+        # Frame type -> sources of the branches that take it
+        self._routes: dict[type[Frame], list[Source]] = {}
+        # Frame id -> [copies still expected, whether one was passed on], for
+        # frames sent to several branches
+        self._copies: OrderedDict[int, list] = OrderedDict()
+
+    def processors_with_metrics(self) -> list[FrameProcessor]:
+        return list(
+            chain.from_iterable(p.processors_with_metrics() for p in self._pipelines)
+        )
+
+    async def cleanup(self):
+        await asyncio.gather(*[p.cleanup() for p in self._pipelines])
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, StartFrame):
+            loop = self.get_event_loop()
+            self._up_task = loop.create_task(self._process_up_queue())
+            self._down_task = loop.create_task(self._process_down_queue())
+
+        # Upstream frames come from after the branches, and go to all of them
+        targets = (
+            self._sinks
+            if direction == FrameDirection.UPSTREAM
+            else self._route(type(frame))
+        )
+        if len(targets) == 1:
+            await targets[0].queue_frame(frame, direction)
+        elif targets:
+            self._track(frame, len(targets))
+            await asyncio.gather(*[t.queue_frame(frame, direction) for t in targets])
+
+        if isinstance(frame, CancelFrame):
+            await self._stop_tasks()
+
+    def _route(self, frame_type: type[Frame]) -> list[Source]:
+        sources = self._routes.get(frame_type)
+        if sources is None:
+            sources = [
+                source
+                for branch, source in zip(self._branches, self._sources)
+                if branch.takes(frame_type)
+            ]
+            self._routes[frame_type] = sources
+        return sources
+
+    def _track(self, frame: Frame, copies: int) -> None:
+        self._copies[frame.id] = [copies, False]
+        # Frames a branch consumes never come out, forget the oldest ones
+        while len(self._copies) > MAX_TRACKED_FRAMES:
+            self._copies.popitem(last=False)
+
+    def _should_pass(self, frame: Frame) -> bool:
+        """Whether a frame coming out of a branch goes on to the next processor."""
+        entry = self._copies.get(frame.id)
+        if entry is None:
+            return True
+        entry[0] -= 1
+        if entry[0] == 0:
+            del self._copies[frame.id]
+        if isinstance(frame, EndFrame):
+            return entry[0] == 0
+        first, entry[1] = not entry[1], True
+        return first
+
+    async def _stop_tasks(self) -> None:
+        await self._up_queue.put(None)
+        await self._down_queue.put(None)
+        await asyncio.gather(
+            *[task for task in (self._up_task, self._down_task) if task]
+        )
+
+    async def _process_up_queue(self):
+        while (frame := await self._up_queue.get()) is not None:
+            if self._should_pass(frame):
+                await self.push_frame(frame, FrameDirection.UPSTREAM)
+
+    async def _process_down_queue(self):
+        while (frame := await self._down_queue.get()) is not None:
+            if self._should_pass(frame):
+                await self.push_frame(frame, FrameDirection.DOWNSTREAM)
+                if isinstance(frame, EndFrame):
+                    await self._up_queue.put(None)
+                    return
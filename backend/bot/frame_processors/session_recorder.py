@@ -0,0 +1,92 @@
+"""Records what a session saw and heard to a session recording file."""
+
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    ImageRawFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from recording import RecordingWriter
+
+# Frame type -> event name written to the recording
+TIMING_EVENTS = {
+    UserStartedSpeakingFrame: "user_started_speaking",
+    UserStoppedSpeakingFrame: "user_stopped_speaking",
+    BotStartedSpeakingFrame: "bot_started_speaking",
+    BotStoppedSpeakingFrame: "bot_stopped_speaking",
+}
+
+
+class SessionRecorder(FrameProcessor):
+    """Writes screen frames, transcripts and speaking events to a recording.
+
+    Encoding and writing happen on a dedicated thread so the pipeline never
+    waits on disk, and a single thread keeps records in arrival order.
+    """
+
+    def __init__(self, directory: str, keyframe_interval: int = 10, quality: int = 70):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.gsrec"
+        )
+        self.writer = RecordingWriter(
+            path, keyframe_interval=keyframe_interval, quality=quality
+        )
+        self._started = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        logger.info(f"Recording session to {path}")
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        timestamp = time.monotonic() - self._started
+        if isinstance(frame, ImageRawFrame):
+            self._write(
+                self.writer.write_frame,
+                timestamp,
+                frame.format,
+                frame.size,
+                frame.image,
+            )
+        elif isinstance(frame, TranscriptionFrame):
+            self._write(self.writer.write_transcript, timestamp, frame.text)
+        elif type(frame) in TIMING_EVENTS:
+            self._write(self.writer.write_event, timestamp, TIMING_EVENTS[type(frame)])
+
+        await self.push_frame(frame, direction)
+
+    async def close(self) -> None:
+        """Flush pending writes and finish the recording file."""
+        # The single writer thread runs jobs in order, so every pending write
+        # is done once the close is
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.writer.close
+        )
+        self._executor.shutdown(wait=False)
+        stats = self.writer.stats
+        logger.info(
+            f"Recorded {stats.frames} frames ({stats.keyframes} keyframes) in "
+            f"{stats.written_bytes} bytes, {stats.raw_bytes} bytes raw"
+        )
+
+    def _write(self, write, *args) -> None:
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, write, *args
+        )
+        future.add_done_callback(self._on_written)
+
+    def _on_written(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception():
+            logger.error(f"Failed to write recording: {future.exception()}")
@@ -0,0 +1,266 @@
+"""Speculative LLM requests started from interim transcriptions."""
+
+import asyncio
+import copy
+import difflib
+import time
+from dataclasses import dataclass, field
+
+from anthropic import APIError
+from loguru import logger
+from message_handler import MessageHandler
+from pipecat.frames.frames import (
+    Frame,
+    InterimTranscriptionFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    TextFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.anthropic import AnthropicLLMContext, AnthropicLLMService
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(
+        "".join(c for c in text if c.isalnum() or c.isspace()).split()
+    ).casefold()
+
+
+def transcripts_match(speculated: str, final: str, threshold: float) -> bool:
+    """Whether two transcripts differ little enough to share a reply."""
+    return (
+        difflib.SequenceMatcher(
+            None, normalize_transcript(speculated), normalize_transcript(final)
+        ).ratio()
+        >= threshold
+    )
+
+
+def last_user_text(context: OpenAILLMContext) -> str:
+    """Text of the last text block of the last user message."""
+    if not context.messages or context.messages[-1]["role"] != "user":
+        return ""
+    content = context.messages[-1]["content"]
+    if isinstance(content, str):
+        return content
+    texts = [block["text"] for block in content if block.get("type") == "text"]
+    return texts[-1] if texts else ""
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    committed: int = 0
+    discarded: int = 0
+    latency_saved_seconds: float = 0.0
+
+    def hit_rate(self) -> float:
+        return self.committed / self.started if self.started else 0.0
+
+
+@dataclass
+class _Speculation:
+    text: str
+    started: float
+    task: asyncio.Task | None = None
+    # Streamed text, then None once the response is complete
+    chunks: asyncio.Queue = field(default_factory=asyncio.Queue)
+    error: Exception | None = None
+    usage: dict[str, int] = field(
+        default_factory=lambda: {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+    )
+
+
+class SpeculativeAnthropicLLMService(AnthropicLLMService):
+    """AnthropicLLMService that can start a reply before the context is final.
+
+    `speculate` sends a request for the context plus a provisional user turn
+    and buffers the streamed reply. When the real context arrives and its
+    last user text matches the speculated transcript by at least
+    `match_threshold`, the buffered reply is played out instead of starting
+    a new request. Otherwise the speculation is cancelled and the context is
+    processed as usual. Tool calls are not supported while speculating.
+    """
+
+    def __init__(self, *, match_threshold: float = 0.9, **kwargs):
+        super().__init__(**kwargs)
+        self.match_threshold = match_threshold
+        self.stats = SpeculationStats()
+        self._speculation: _Speculation | None = None
+
+    @property
+    def speculating_on(self) -> str | None:
+        return self._speculation.text if self._speculation else None
+
+    def speculate(
+        self, context: AnthropicLLMContext, content: list[dict], text: str
+    ) -> None:
+        """Start a reply to `context` as if the user had said `text`."""
+        self.cancel_speculation()
+
+        if self._settings["enable_prompt_caching_beta"]:
+            messages = context.get_messages_with_cache_control_markers()
+        else:
+            messages = copy.deepcopy(context.messages)
+        # What MessageHandler and the user context aggregator will add
+        turn = [*content, {"type": "text", "text": text}]
+        if messages and messages[-1]["role"] == "user":
+            if isinstance(messages[-1]["content"], str):
+                messages[-1]["content"] = [
+                    {"type": "text", "text": messages[-1]["content"]}
+                ]
+            messages[-1]["content"].extend(turn)
+        else:
+            messages.append({"role": "user", "content": turn})
+
+        speculation = _Speculation(text=text, started=time.monotonic())
+        speculation.task = self.get_event_loop().create_task(
+            self._run_speculation(speculation, context.system, messages)
+        )
+        self._speculation = speculation
+        self.stats.started += 1
+        logger.debug(f"Speculating on interim transcript: [{text}]")
+
+    def cancel_speculation(self) -> None:
+        speculation, self._speculation = self._speculation, None
+        if speculation:
+            speculation.task.cancel()
+            self.stats.discarded += 1
+
+    async def _run_speculation(
+        self, speculation: _Speculation, system, messages: list[dict]
+    ) -> None:
+        api_call = self._client.messages.create
+        if self._settings["enable_prompt_caching_beta"]:
+            api_call = self._client.beta.prompt_caching.messages.create
+
+        try:
+            response = await api_call(
+                tools=[],
+                system=system,
+                messages=messages,
+                model=self.model_name,
+                max_tokens=self._settings["max_tokens"],
+                stream=True,
+                temperature=self._settings["temperature"],
+                top_k=self._settings["top_k"],
+                top_p=self._settings["top_p"],
+                **self._settings["extra"],
+            )
+            async for event in response:
+                if event.type == "content_block_delta" and hasattr(event.delta, "text"):
+                    speculation.chunks.put_nowait(event.delta.text)
+                elif event.type == "message_start":
+                    usage = event.message.usage
+                    speculation.usage["prompt_tokens"] += usage.input_tokens
+                    for name in (
+                        "cache_creation_input_tokens",
+                        "cache_read_input_tokens",
+                    ):
+                        speculation.usage[name] += getattr(usage, name, None) or 0
+                elif event.type == "message_delta":
+                    speculation.usage["completion_tokens"] += event.usage.output_tokens
+        except APIError as e:
+            logger.warning(f"Speculative request failed: {e}")
+            speculation.error = e
+        finally:
+            speculation.chunks.put_nowait(None)
+
+    async def _process_context(self, context: OpenAILLMContext):
+        speculation, self._speculation = self._speculation, None
+        if speculation and (
+            speculation.error
+            or not transcripts_match(
+                speculation.text, last_user_text(context), self.match_threshold
+            )
+        ):
+            speculation.task.cancel()
+            self.stats.discarded += 1
+            speculation = None
+
+        if not speculation:
+            await super()._process_context(context)
+            return
+
+        # The reply has been in flight since the speculation started
+        saved = time.monotonic() - speculation.started
+        self.stats.committed += 1
+        self.stats.latency_saved_seconds += saved
+        logger.debug(
+            f"Committing speculative reply, {saved:.3f}s head start "
+            f"({self.stats.hit_rate():.0%} hit rate)"
+        )
+        await self._play_speculation(speculation)
+
+    async def _play_speculation(self, speculation: _Speculation) -> None:
+        try:
+            await self.push_frame(LLMFullResponseStartFrame())
+            await self.start_processing_metrics()
+            while (chunk := await speculation.chunks.get()) is not None:
+                await self.push_frame(TextFrame(chunk))
+        finally:
+            speculation.task.cancel()
+            await self.stop_processing_metrics()
+            await self.push_frame(LLMFullResponseEndFrame())
+            await self._report_usage_metrics(**speculation.usage)
+
+
+class SpeculativeTurnProcessor(FrameProcessor):
+    """Starts speculative replies from interim transcriptions.
+
+    When the user stops speaking, the latest interim transcript and the turn
+    content MessageHandler would build for it are handed to the LLM service
+    to start a reply. A later interim transcript that no longer matches
+    restarts the speculation, and the user speaking again cancels it.
+    Transcripts shorter than `min_chars` are not speculated on.
+    """
+
+    def __init__(
+        self,
+        message_handler: MessageHandler,
+        llm: SpeculativeAnthropicLLMService,
+        min_chars: int = 8,
+    ):
+        super().__init__()
+        self.message_handler = message_handler
+        self.llm = llm
+        self.min_chars = min_chars
+        self.user_speaking = False
+        self.interim = ""
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self.user_speaking = True
+            self.llm.cancel_speculation()
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self.user_speaking = False
+            await self._speculate()
+        elif isinstance(frame, InterimTranscriptionFrame):
+            self.interim = frame.text
+            speculated = self.llm.speculating_on
+            if speculated is not None and not transcripts_match(
+                speculated, self.interim, self.llm.match_threshold
+            ):
+                await self._speculate()
+        elif isinstance(frame, TranscriptionFrame):
+            self.interim = ""
+
+        await self.push_frame(frame, direction)
+
+    async def _speculate(self) -> None:
+        text = self.interim.strip()
+        if self.user_speaking or len(text) < self.min_chars:
+            return
+        content = await self.message_handler.prepare_turn_content(text)
+        self.llm.speculate(self.message_handler.context, content, text)
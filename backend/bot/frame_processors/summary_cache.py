@@ -0,0 +1,90 @@
+"""Reuse of screen summaries for screens that were already described."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from frame_processors.change_detector import frame_signature
+from pipecat.frames.frames import ImageRawFrame
+
+HASH_GRID_SIZE = 16
+HASH_BITS = HASH_GRID_SIZE * HASH_GRID_SIZE
+
+
+def perceptual_hash(frame: ImageRawFrame) -> int:
+    """Average hash of a frame: one bit per grid cell brighter than the mean.
+
+    Small rendering differences (a blinking cursor, a clock) flip a few bits,
+    while a different screen flips a large share of them.
+    """
+    signature = frame_signature(frame, grid_size=HASH_GRID_SIZE)
+    bits = np.packbits(signature > signature.mean())
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+@dataclass
+class SummaryCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SummaryCache:
+    """LRU cache of screen descriptions keyed by perceptual hash.
+
+    A lookup matches the closest cached screen whose hash differs in at most
+    `max_distance` of its bits. Entries older than `ttl_seconds` are dropped,
+    and the least recently used entry is evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        max_distance: float = 0.05,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        # hash -> (summary, stored at unix seconds)
+        self.entries: OrderedDict[int, tuple[str, float]] = OrderedDict()
+        self.stats = SummaryCacheStats()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, key: int) -> str | None:
+        """Return the description of the closest cached screen, if close enough."""
+        self._expire()
+        best, best_distance = None, int(self.max_distance * HASH_BITS)
+        for cached in self.entries:
+            distance = (cached ^ key).bit_count()
+            if distance <= best_distance:
+                best, best_distance = cached, distance
+
+        if best is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self.entries.move_to_end(best)
+        return self.entries[best][0]
+
+    def store(self, key: int, summary: str) -> None:
+        if not summary:
+            return
+        self.entries[key] = (summary, time.time())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        # Entries are stored in insertion order, but hits reorder them
+        for key in [
+            k for k, (_, stored_at) in self.entries.items() if stored_at < cutoff
+        ]:
+            del self.entries[key]
@@ -0,0 +1,84 @@
+"""Scheduling of vision summaries around conversation turns."""
+
+import time
+
+# How fast the expected summary latency follows new measurements
+LATENCY_SMOOTHING = 0.2
+
+
+class SummaryScheduler:
+    """Decides when the summary branch may call the vision LLM.
+
+    Conversation activity (the user starting to speak, a transcript, an app
+    message) opens a hold of `turn_hold_seconds` during which no new summary
+    is started, so the turn gets the API and CPU to itself. A summary already
+    in flight is cancelled, unless it is expected to finish within
+    `finish_grace_seconds`. Holds never starve the summary: once a summary has
+    been deferred for `deadline_seconds` it is started anyway, so the
+    narrative is at most that stale when the next turn reads it.
+    """
+
+    def __init__(
+        self,
+        turn_hold_seconds: float = 4.0,
+        deadline_seconds: float = 15.0,
+        finish_grace_seconds: float = 0.3,
+    ):
+        self.turn_hold_seconds = turn_hold_seconds
+        self.deadline_seconds = deadline_seconds
+        self.finish_grace_seconds = finish_grace_seconds
+        self.hold_until = 0.0
+        self.in_flight_since: float | None = None
+        self.deferred_since: float | None = None
+        self.expected_latency: float | None = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self.in_flight_since is not None
+
+    def conversation_activity(self) -> bool:
+        """Record a conversation turn, returning whether to cancel the summary."""
+        now = time.monotonic()
+        self.hold_until = now + self.turn_hold_seconds
+        if not self.in_flight:
+            return False
+        if self.expected_latency is not None:
+            remaining = self.expected_latency - (now - self.in_flight_since)
+            if remaining <= self.finish_grace_seconds:
+                return False
+        return True
+
+    def may_start(self) -> str | None:
+        """Return why a summary may start now ("idle" or "deadline"), or None."""
+        now = time.monotonic()
+        if now >= self.hold_until:
+            self.deferred_since = None
+            return "idle"
+
+        if self.deferred_since is None:
+            self.deferred_since = now
+        if now - self.deferred_since >= self.deadline_seconds:
+            self.deferred_since = None
+            return "deadline"
+        return None
+
+    def started(self) -> None:
+        self.in_flight_since = time.monotonic()
+
+    def finished(self) -> None:
+        if self.in_flight_since is None:
+            return
+        latency = time.monotonic() - self.in_flight_since
+        self.in_flight_since = None
+        if self.expected_latency is None:
+            self.expected_latency = latency
+        else:
+            self.expected_latency += LATENCY_SMOOTHING * (
+                latency - self.expected_latency
+            )
+
+    def cancelled(self) -> None:
+        self.in_flight_since = None
+        # The cancelled work still has to happen, count its wait from now
+        if self.deferred_since is None:
+            self.deferred_since = time.monotonic()
@@ -1,6 +1,6 @@
 """Transcript processing components."""
 
-from frame_processors.image_processor import ImageManager, ImageRawFrame
+from frame_processors.image_processor import ImageManager
 from loguru import logger
 from message_handler import MessageHandler
 from pipecat.frames.frames import Frame, TranscriptionFrame
@@ -16,10 +16,6 @@ class TranscriptProcessor(FrameProcessor):
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
 
-        # Block image frames from being processed by downstream processors
-        if isinstance(frame, ImageRawFrame):
-            return
-
         if isinstance(frame, TranscriptionFrame):
             logger.debug(f"Processing transcription frame: {frame.text}")
             await self.message_handler.handle_new_message(
@@ -0,0 +1,265 @@
+"""Cache of synthesized speech for phrases the assistant says often."""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    StartInterruptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.cartesia import CartesiaTTSService
+
+# Word timestamp markers CartesiaTTSService queues when a response is done
+RESPONSE_END_MARKERS = [("LLMFullResponseEndFrame", 0), ("Reset", 0)]
+MARKER_WORDS = {"LLMFullResponseEndFrame", "Reset", "TTSStoppedFrame"}
+
+# Bytes per sample of pcm_s16le audio
+SAMPLE_WIDTH = 2
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def tts_cache_key(text: str, voice_id: str, model: str, settings: dict) -> str:
+    """Key for `text` spoken with a voice, model and output settings."""
+    key = [normalize_text(text), voice_id, model, settings]
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class CachedAudio:
+    audio: bytes
+    sample_rate: int
+    # (word, start seconds) as reported by the TTS service
+    words: list[tuple[str, float]]
+    # How long the TTS service took to send the first audio
+    first_audio_seconds: float
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / (SAMPLE_WIDTH * self.sample_rate)
+
+
+class TTSAudioCache:
+    """LRU cache of synthesized phrases, bounded by audio bytes.
+
+    With a `directory`, entries are also written to disk and read back when
+    they are not in memory, so phrases survive restarts. One cache can be
+    shared by all sessions of a worker.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, directory: str | None = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries: OrderedDict[str, CachedAudio] = OrderedDict()
+        self.size = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> CachedAudio | None:
+        entry = self.entries.get(key)
+        if entry:
+            self.entries.move_to_end(key)
+            return entry
+
+        entry = self._load(key) if self.directory else None
+        if entry:
+            self._insert(key, entry)
+        return entry
+
+    def put(self, key: str, entry: CachedAudio) -> None:
+        self._insert(key, entry)
+        if self.directory:
+            self._save(key, entry)
+
+    def _insert(self, key: str, entry: CachedAudio) -> None:
+        previous = self.entries.pop(key, None)
+        if previous:
+            self.size -= len(previous.audio)
+        self.entries[key] = entry
+        self.size += len(entry.audio)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.audio)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.tts")
+
+    def _load(self, key: str) -> CachedAudio | None:
+        # A JSON header line, then the raw audio
+        try:
+            with open(self._path(key), "rb") as f:
+                header = json.loads(f.readline())
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cached audio {key}: {e}")
+            return None
+        return CachedAudio(
+            audio=audio,
+            sample_rate=header["sample_rate"],
+            words=[tuple(word) for word in header["words"]],
+            first_audio_seconds=header["first_audio_seconds"],
+        )
+
+    def _save(self, key: str, entry: CachedAudio) -> None:
+        header = {
+            "sample_rate": entry.sample_rate,
+            "words": entry.words,
+            "first_audio_seconds": entry.first_audio_seconds,
+        }
+        path = self._path(key)
+        try:
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                f.write(entry.audio)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Failed to write cached audio {key}: {e}")
+
+
+@dataclass
+class TTSCacheStats:
+    hits: int = 0
+    misses: int = 0
+    first_audio_saved_seconds: float = 0.0
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Capture:
+    key: str
+    started: float
+    first_audio_seconds: float | None = None
+    audio: list[bytes] = field(default_factory=list)
+    words: list[tuple[str, float]] = field(default_factory=list)
+
+
+class CachedCartesiaTTSService(CartesiaTTSService):
+    """CartesiaTTSService that replays phrases it has synthesized before.
+
+    Cartesia streams a whole response through one websocket context, so audio
+    can only be told apart per context. A context that carried a single
+    phrase of at most `max_cached_chars` characters is cached with its word
+    timestamps. A cached phrase is played back when no context is streaming,
+    which covers short one-sentence replies and the first sentence of longer
+    ones. Word timestamps of everything that follows cached audio in the same
+    response are shifted by its duration, so text frames stay aligned with
+    the audio.
+    """
+
+    def __init__(self, *, cache: TTSAudioCache, max_cached_chars: int = 120, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.max_cached_chars = max_cached_chars
+        self.stats = TTSCacheStats()
+        self._capture: _Capture | None = None
+        # Seconds of cached audio played since the start of the response
+        self._word_offset = 0.0
+
+    def _cache_key(self, text: str) -> str:
+        return tts_cache_key(text, self._voice_id, self.model_name, self._settings)
+
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        self._capture = None
+        # While a context is streaming, this text's audio would be mixed into it
+        if not self._context_id and len(text.strip()) <= self.max_cached_chars:
+            key = self._cache_key(text)
+            entry = self.cache.get(key)
+            if entry:
+                async for frame in self._play_cached(text, entry):
+                    yield frame
+                return
+            self.stats.misses += 1
+            self._capture = _Capture(key, started=time.monotonic())
+
+        async for frame in super().run_tts(text):
+            yield frame
+
+    async def _play_cached(
+        self, text: str, entry: CachedAudio
+    ) -> AsyncGenerator[Frame, None]:
+        self.stats.hits += 1
+        self.stats.first_audio_saved_seconds += entry.first_audio_seconds
+        logger.debug(
+            f"Playing cached TTS: [{text}] ({self.stats.hit_rate():.0%} hit rate, "
+            f"{self.stats.first_audio_saved_seconds:.2f}s to first audio saved)"
+        )
+
+        yield TTSStartedFrame()
+        self.start_word_timestamps()
+        await self.add_word_timestamps(entry.words)
+        self._word_offset += entry.duration
+        yield TTSAudioRawFrame(
+            audio=entry.audio, sample_rate=entry.sample_rate, num_channels=1
+        )
+        yield TTSStoppedFrame()
+
+    async def flush_audio(self):
+        if not self._context_id and self._word_offset:
+            # The response ended on cached audio, close it the way the
+            # websocket's "done" message does
+            await self.add_word_timestamps(RESPONSE_END_MARKERS)
+        await super().flush_audio()
+
+    async def add_word_timestamps(self, word_times: list[tuple[str, float]]):
+        shifted = []
+        for word, timestamp in word_times:
+            if word in MARKER_WORDS and timestamp == 0:
+                if word == "LLMFullResponseEndFrame" and self._capture:
+                    self._store_capture()
+                elif word == "Reset":
+                    self._word_offset = 0.0
+            else:
+                if self._capture:
+                    self._capture.words.append((word, timestamp))
+                timestamp += self._word_offset
+            shifted.append((word, timestamp))
+        await super().add_word_timestamps(shifted)
+
+    async def push_frame(
+        self, frame: Frame, direction: FrameDirection = FrameDirection.DOWNSTREAM
+    ):
+        if self._capture and isinstance(frame, TTSAudioRawFrame):
+            if self._capture.first_audio_seconds is None:
+                self._capture.first_audio_seconds = (
+                    time.monotonic() - self._capture.started
+                )
+            self._capture.audio.append(frame.audio)
+        await super().push_frame(frame, direction)
+
+    async def _handle_interruption(
+        self, frame: StartInterruptionFrame, direction: FrameDirection
+    ):
+        await super()._handle_interruption(frame, direction)
+        self._capture = None
+        self._word_offset = 0.0
+
+    def _store_capture(self) -> None:
+        capture, self._capture = self._capture, None
+        if not capture.audio or capture.first_audio_seconds is None:
+            return
+        self.cache.put(
+            capture.key,
+            CachedAudio(
+                audio=b"".join(capture.audio),
+                sample_rate=self._settings["output_format"]["sample_rate"],
+                words=capture.words,
+                first_audio_seconds=capture.first_audio_seconds,
+            ),
+        )
@@ -0,0 +1,46 @@
+"""Pass-through processor that marks turn stages for latency tracing."""
+
+from pipecat.frames.frames import Frame, MetricsFrame
+from pipecat.metrics.metrics import LLMUsageMetricsData
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from tracing import TurnTracer
+
+
+class TurnTraceProcessor(FrameProcessor):
+    """Marks a tracer stage whenever a frame of a watched type passes by.
+
+    Frame types are matched exactly, so a TranscriptionFrame does not count as
+    the TextFrame an LLM streams. Frames in both directions are watched, which
+    lets one processor see audio going down and speaking events coming back up.
+    With `record_usage`, LLM token usage passing by is recorded as well; set
+    it on one processor only, usage metrics travel all the way downstream.
+    """
+
+    def __init__(
+        self,
+        tracer: TurnTracer,
+        stages: dict[type[Frame], str],
+        record_usage: bool = False,
+    ):
+        super().__init__()
+        self.tracer = tracer
+        self.stages = stages
+        self.record_usage = record_usage
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        stage = self.stages.get(type(frame))
+        if stage:
+            self.tracer.mark(stage)
+
+        if self.record_usage and isinstance(frame, MetricsFrame):
+            for data in frame.data:
+                if isinstance(data, LLMUsageMetricsData):
+                    self.tracer.record_usage(
+                        data.value.prompt_tokens,
+                        data.value.cache_read_input_tokens or 0,
+                        data.value.cache_creation_input_tokens or 0,
+                    )
+
+        await self.push_frame(frame, direction)
@@ -1,66 +1,357 @@
+"""Restart a script when its Python files change.
+
+By default a restart stops the running process and then starts a new one.
+With `handoff`, the replacement is started and warmed up first, and the
+running process is only drained once the replacement is healthy, so there is
+no gap in service. Handoff expects the worker protocol of `bot.py --worker`:
+a `ready` event on stdout once warm, assignments on stdin, and closing stdin
+to drain. This process speaks the same protocol to its own parent, so it can
+stand in for a bot worker:
+
+    python bot/hot_reload.py --handoff bot/bot.py --worker --max-sessions 4
+
+The session events of draining processes are forwarded too, so the parent
+keeps counting their sessions against the capacity it was told about, and
+the old and new process together never get more than `--max-sessions`.
+
+Besides file changes, SIGHUP triggers a restart, for code rollouts without a
+file watcher.
+"""
+
+import argparse
+import json
 import logging
+import signal
 import subprocess
 import sys
+import threading
 import time
+from collections.abc import Sequence
 from pathlib import Path
 
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
+logger = logging.getLogger(__name__)
+
+# Event types that mean a file's content changed; opening and closing files
+# (as every import does) is reported too and must not trigger restarts
+CHANGE_EVENTS = {"modified", "created", "moved", "deleted"}
+
 
 class RestartHandler(FileSystemEventHandler):
-    def __init__(self, process_manager):
+    """Restarts once Python files have stopped changing for `debounce` seconds.
+
+    Saving a file or switching branches produces a burst of events; the whole
+    burst results in a single restart after its last event.
+    """
+
+    def __init__(self, process_manager, debounce: float = 1.0):
         self.process_manager = process_manager
-        self.last_restart = time.time()
-        self.cooldown = 1  # Cooldown period in seconds
+        self.debounce = debounce
+        self._changed = set()
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
 
-    def on_modified(self, event):
-        if event.src_path.endswith(".py"):
-            current_time = time.time()
-            if current_time - self.last_restart >= self.cooldown:
-                logging.info(f"File changed: {event.src_path}")
-                self.process_manager.restart_process()
-                self.last_restart = current_time
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        changed = [
+            path for path in paths if path.endswith(".py") and "__pycache__" not in path
+        ]
+        if not changed:
+            return
+
+        with self._lock:
+            self._changed.update(changed)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._restart)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+
+    def _restart(self):
+        with self._lock:
+            changed, self._changed = sorted(self._changed), set()
+            self._timer = None
+        logger.info(f"Files changed: {', '.join(changed)}")
+        self.process_manager.restart_process()
+
+
+class ChildProcess:
+    """A started copy of the script, with its stdout forwarded in handoff mode."""
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.pid = popen.pid
+        self.ready = threading.Event()
+
+    def poll(self) -> int | None:
+        return self.popen.poll()
 
 
 class ProcessManager:
-    def __init__(self, main_file):
+    """Starts the script and replaces it on restart.
+
+    In handoff mode a restart starts a replacement and waits up to
+    `ready_timeout` seconds for its `ready` event, then checks it is still
+    running `health_check_seconds` later. Only then do new assignments go to
+    the replacement and the old process is drained: its stdin is closed so it
+    finishes its sessions, and it is terminated if that takes longer than
+    `drain_timeout`. A replacement that fails the health check is stopped and
+    the old process keeps serving.
+    """
+
+    def __init__(
+        self,
+        main_file,
+        args: Sequence[str] = (),
+        handoff: bool = False,
+        ready_timeout: float = 60.0,
+        health_check_seconds: float = 1.0,
+        drain_timeout: float = 600.0,
+    ):
         self.main_file = main_file
-        self.process = None
+        self.args = list(args)
+        self.handoff = handoff
+        self.ready_timeout = ready_timeout
+        self.health_check_seconds = health_check_seconds
+        self.drain_timeout = drain_timeout
+        self.process: ChildProcess | None = None
+        # Replacement being warmed up and health checked
+        self.starting: ChildProcess | None = None
+        # Old processes still finishing their sessions
+        self.draining: list[ChildProcess] = []
+        self._draining_lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        # Guards writes to the current process's stdin against the handoff
+        self._stdin_lock = threading.Lock()
+        # Guards our stdout and _ready_forwarded across the forwarding threads
+        self._stdout_lock = threading.Lock()
+        self._ready_forwarded = False
+        self._stopped = False
 
     def start_process(self):
-        self.process = subprocess.Popen([sys.executable, self.main_file])
+        self.process = self._spawn()
 
     def stop_process(self):
-        if self.process:
-            self.process.terminate()
-            self.process.wait()
+        self._stopped = True
+        with self._draining_lock:
+            children = [self.process, self.starting, *self.draining]
+        for child in children:
+            if child and child.poll() is None:
+                child.popen.terminate()
+        for child in children:
+            if child:
+                child.popen.wait()
 
     def restart_process(self):
-        logging.info("Restarting process...")
-        self.stop_process()
-        self.start_process()
+        with self._restart_lock:
+            if self._stopped:
+                return
+            if not self.handoff:
+                logger.info("Restarting process...")
+                if self.process:
+                    self._stop(self.process)
+                self.start_process()
+                return
 
+            replacement = self.starting = self._spawn()
+            logger.info(f"Started replacement process {replacement.pid}")
+            healthy = self._health_check(replacement)
+            self.starting = None
+            if not healthy:
+                logger.error(
+                    f"Replacement process {replacement.pid} failed its health "
+                    "check, keeping the running process"
+                )
+                self._stop(replacement)
+                return
 
-def run_with_reload(main_file):
+            with self._stdin_lock:
+                old, self.process = self.process, replacement
+            logger.info(f"Handed off to process {replacement.pid}")
+            if old:
+                with self._draining_lock:
+                    self.draining.append(old)
+                threading.Thread(target=self._retire, args=(old,), daemon=True).start()
+
+    def forward_stdin(self, stdin) -> None:
+        """Pass lines from `stdin` to the current process until it closes."""
+        for line in stdin:
+            with self._stdin_lock:
+                try:
+                    self.process.popen.stdin.write(line)
+                    self.process.popen.stdin.flush()
+                except (BrokenPipeError, ValueError):
+                    logger.warning(f"Process {self.process.pid} is not reading stdin")
+
+    def drain(self) -> None:
+        """Close the current process's stdin and wait for every process to exit."""
+        with self._restart_lock:
+            self._stopped = True
+            with self._stdin_lock:
+                self._close_stdin(self.process)
+            with self._draining_lock:
+                children = [self.process, *self.draining]
+            for child in children:
+                child.popen.wait()
+
+    def _spawn(self) -> ChildProcess:
+        command = [sys.executable, self.main_file, *self.args]
+        if not self.handoff:
+            return ChildProcess(subprocess.Popen(command))
+
+        child = ChildProcess(
+            subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        )
+        threading.Thread(
+            target=self._forward_stdout, args=(child,), daemon=True
+        ).start()
+        return child
+
+    def _forward_stdout(self, child: ChildProcess) -> None:
+        for line in child.popen.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                event = None
+            is_ready = isinstance(event, dict) and event.get("event") == "ready"
+            if is_ready:
+                child.ready.set()
+            with self._stdout_lock:
+                # Our parent sees a single worker that became ready once
+                if is_ready:
+                    if self._ready_forwarded:
+                        continue
+                    self._ready_forwarded = True
+                sys.stdout.write(line)
+                sys.stdout.flush()
+
+    def _health_check(self, child: ChildProcess) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        while not child.ready.wait(0.1):
+            if child.poll() is not None or time.monotonic() > deadline:
+                return False
+        time.sleep(self.health_check_seconds)
+        return child.poll() is None
+
+    def _retire(self, child: ChildProcess) -> None:
+        with self._stdin_lock:
+            self._close_stdin(child)
+        try:
+            child.popen.wait(self.drain_timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Process {child.pid} did not drain in time, stopping it")
+            self._stop(child)
+        logger.info(f"Retired process {child.pid} ({child.poll()})")
+        with self._draining_lock:
+            self.draining.remove(child)
+
+    @staticmethod
+    def _close_stdin(child: ChildProcess) -> None:
+        try:
+            child.popen.stdin.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _stop(child: ChildProcess) -> None:
+        child.popen.terminate()
+        try:
+            child.popen.wait(10)
+        except subprocess.TimeoutExpired:
+            child.popen.kill()
+            child.popen.wait()
+
+
+def run_with_reload(
+    main_file,
+    args: Sequence[str] = (),
+    handoff: bool = False,
+    debounce: float = 1.0,
+    **process_options,
+):
+    # Logs go to stderr, stdout carries worker events in handoff mode
     logging.basicConfig(level=logging.INFO)
 
     # Get the directory containing the main file
     watch_path = Path(main_file).parent
 
-    process_manager = ProcessManager(main_file)
-    event_handler = RestartHandler(process_manager)
+    process_manager = ProcessManager(
+        main_file, args, handoff=handoff, **process_options
+    )
+    event_handler = RestartHandler(process_manager, debounce=debounce)
 
     observer = Observer()
     observer.schedule(event_handler, str(watch_path), recursive=True)
     observer.start()
 
+    def handle_sighup(signum, frame):
+        logger.info("SIGHUP received")
+        threading.Thread(target=process_manager.restart_process, daemon=True).start()
+
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGHUP, handle_sighup)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
     try:
         process_manager.start_process()
-        while True:
-            time.sleep(1)
+        if handoff:
+            process_manager.forward_stdin(sys.stdin)
+            logger.info("Stdin closed, waiting for sessions to finish")
+            observer.stop()
+            event_handler.cancel()
+            process_manager.drain()
+        else:
+            while True:
+                time.sleep(1)
     except KeyboardInterrupt:
         observer.stop()
+        event_handler.cancel()
         process_manager.stop_process()
 
     observer.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("main_file", help="Script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Script arguments")
+    parser.add_argument(
+        "--handoff",
+        action="store_true",
+        help="Warm up the replacement before draining the running process",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=1.0,
+        help="Seconds without file changes before restarting",
+    )
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--drain-timeout", type=float, default=600.0)
+    options = parser.parse_args()
+
+    run_with_reload(
+        options.main_file,
+        options.args,
+        handoff=options.handoff,
+        debounce=options.debounce,
+        ready_timeout=options.ready_timeout,
+        drain_timeout=options.drain_timeout,
+    )
@@ -1,53 +1,109 @@
 """Message handling and context management."""
 
-from typing import List
+import time
+from dataclasses import dataclass, field
 
-from frame_processors.image_processor import ImageManager
+from context_manager import ContextManager
+from frame_processors.image_processor import CONVERSATION_PROFILE, ImageManager
 from loguru import logger
 from pipecat.frames.frames import ImageRawFrame
 from pipecat.services.anthropic import AnthropicLLMContext
+from tracing import CONTEXT_READY, IMAGE_ENCODE_SPAN, TurnTracer
+
+
+@dataclass
+class UserTurn:
+    """Content blocks of a user turn and what ContextManager tracks about them."""
+
+    message: dict
+    summary: dict
+    content: list[dict]
+    images: list[dict] = field(default_factory=list)
+    image_hashes: list[str] = field(default_factory=list)
+    labels: list[dict] = field(default_factory=list)
+    references: dict[str, dict] = field(default_factory=dict)
 
 
 class MessageHandler:
-    def __init__(self, context: AnthropicLLMContext, image_manager: ImageManager):
+    def __init__(
+        self,
+        context: AnthropicLLMContext,
+        image_manager: ImageManager,
+        context_manager: ContextManager | None = None,
+        tracer: TurnTracer | None = None,
+    ):
         self.context = context
         self.image_manager = image_manager
+        self.context_manager = context_manager or ContextManager(context)
+        self.tracer = tracer
         logger.debug("MessageHandler initialized")
 
-    async def handle_new_message(self, text: str, frames: List[ImageRawFrame]) -> None:
+    async def handle_new_message(self, text: str, frames: list[ImageRawFrame]) -> None:
         """Process a new message with associated image frames."""
         if not frames:
             logger.debug("No frames provided, skipping message handling")
             return
 
         # Include the current summary in the context
-        content = self.image_manager.recent_images_to_llm_messages()
+        encode_started = time.perf_counter()
+        hashed_images = await self.image_manager.recent_images_with_hashes(
+            CONVERSATION_PROFILE
+        )
+        if self.tracer:
+            self.tracer.record(IMAGE_ENCODE_SPAN, time.perf_counter() - encode_started)
 
-        # Add current summary
-        content.append({"type": "text", "text": self.image_manager.get_summary()})
+        turn = self.build_turn(text, hashed_images)
+        self.context.add_message({"role": "user", "content": turn.content})
 
-        # Add user message
-        content.append({"type": "text", "text": text})
+        # Age older screenshots out of the context
+        self.context_manager.track_turn(
+            turn.images,
+            turn.summary,
+            turn.image_hashes,
+            turn.labels,
+            turn.references,
+            first_block=turn.message,
+        )
+        self.context_manager.compact()
 
-        self.context.add_message({"role": "user", "content": content})
+        if self.tracer:
+            self.tracer.mark(CONTEXT_READY)
 
-    def update_image_summaries(self, summary: str) -> None:
-        """Update previous image-containing messages with their summaries."""
-        if not self.context.messages:
-            logger.debug("No messages to update summaries for")
-            return
+    async def prepare_turn_content(self, text: str) -> list[dict]:
+        """Content `handle_new_message` would add for `text`, without adding it."""
+        if not self.image_manager.get_frames():
+            return []
+        hashed_images = await self.image_manager.recent_images_with_hashes(
+            CONVERSATION_PROFILE
+        )
+        return self.build_turn(text, hashed_images).content
+
+    def build_turn(self, text: str, hashed_images: list[tuple[str, dict]]) -> UserTurn:
+        # The user's words and the narrative summary come first, the screen
+        # content that ages out of the context last
+        message = {"type": "text", "text": text}
+        summary = {"type": "text", "text": self.image_manager.get_summary()}
+        turn = UserTurn(message, summary, [message, summary])
 
-        updates = 0
-        for i, msg in enumerate(self.context.messages):
-            if (
-                msg["role"] == "user"
-                and isinstance(msg["content"], list)
-                and msg["content"]
-                and msg["content"][0].get("type") == "image"
-            ):
-                self.context.messages[i] = {
-                    "role": "user",
-                    "content": summary,
+        # Attach each distinct screenshot once, and point back at screenshots
+        # the context already holds instead of uploading them again
+        for key, image in hashed_images:
+            if key in turn.image_hashes or key in turn.references:
+                # Repeated frames of a still screen within this turn
+                continue
+            if self.context_manager.has_image(key):
+                note = {
+                    "type": "text",
+                    "text": "[The screen looks the same as earlier screenshot "
+                    f"{key[:8]}.]",
                 }
-                updates += 1
-        logger.debug(f"Updated {updates} message(s) with image summaries")
+                turn.content.append(note)
+                turn.references[key] = note
+                continue
+
+            label = {"type": "text", "text": f"Screenshot {key[:8]}:"}
+            turn.content += [label, image]
+            turn.images.append(image)
+            turn.image_hashes.append(key)
+            turn.labels.append(label)
+        return turn
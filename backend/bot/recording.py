@@ -0,0 +1,318 @@
+"""Compact session recordings of screen frames, transcripts and timing events.
+
+A recording is one append-only file:
+
+    header   MAGIC, start time (f64 unix seconds)
+    records  RECORD_HEADER (timestamp, kind, payload length) + payload, repeated
+    index    INDEX_ENTRY (timestamp, offset, kind) per record
+    trailer  TRAILER (index offset, entry count, INDEX_MAGIC)
+
+Timestamps are seconds since the start of the recording. Frames are stored as
+JPEG keyframes, with delta records in between that only carry JPEG crops of
+the regions that changed since the previous frame. The index and trailer are
+written on close; a recording that was never closed is still readable, the
+reader rebuilds the index by walking the record headers.
+"""
+
+import bisect
+import io
+import json
+import mmap
+import struct
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Self
+
+import numpy as np
+from frame_processors.change_detector import changed_regions
+from PIL import Image
+
+MAGIC = b"GSREC\x00\x01\x00"
+INDEX_MAGIC = b"GSRECIDX"
+
+FILE_HEADER = struct.Struct("<8sd")
+# timestamp, kind, payload length
+RECORD_HEADER = struct.Struct("<dB3xI")
+# timestamp, record offset, kind
+INDEX_ENTRY = struct.Struct("<dQB7x")
+# index offset, entry count, magic
+TRAILER = struct.Struct("<QQ8s")
+# width, height, region count
+FRAME_HEADER = struct.Struct("<HHH")
+# left, top, right, bottom, JPEG length
+REGION_HEADER = struct.Struct("<HHHHI")
+
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+KIND_TRANSCRIPT = 3
+KIND_EVENT = 4
+FRAME_KINDS = (KIND_KEYFRAME, KIND_DELTA)
+
+
+@dataclass
+class IndexEntry:
+    timestamp: float
+    offset: int
+    kind: int
+
+
+@dataclass
+class RecordingStats:
+    frames: int = 0
+    keyframes: int = 0
+    raw_bytes: int = 0
+    written_bytes: int = 0
+
+
+def _jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+class RecordingWriter:
+    """Appends frames, transcripts and events to a recording file.
+
+    A keyframe is written every `keyframe_interval` frames, when the frame
+    size changes, or when more than `max_delta_area_fraction` of the screen
+    changed. Writes are synchronous, so callers on an event loop should run
+    them in an executor.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keyframe_interval: int = 10,
+        quality: int = 70,
+        max_delta_area_fraction: float = 0.5,
+    ):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.quality = quality
+        self.max_delta_area_fraction = max_delta_area_fraction
+        self.started_at = time.time()
+        self.index: list[IndexEntry] = []
+        self.stats = RecordingStats()
+        self._previous: np.ndarray | None = None
+        self._frames_since_keyframe = 0
+        # Closed again if the header can't be written
+        with ExitStack() as stack:
+            self._file = stack.enter_context(open(path, "wb"))
+            self._file.write(FILE_HEADER.pack(MAGIC, self.started_at))
+            stack.pop_all()
+
+    def write_frame(
+        self, timestamp: float, format: str, size: tuple[int, int], image: bytes
+    ) -> None:
+        width, height = size
+        decoded = Image.frombytes(format, size, image).convert("RGB")
+        current = np.asarray(decoded)
+
+        regions = None
+        if (
+            self._previous is not None
+            and self._previous.shape == current.shape
+            and self._frames_since_keyframe < self.keyframe_interval
+        ):
+            regions = changed_regions(self._previous, current, max_regions=8)
+            changed_area = sum((r - left) * (b - top) for left, top, r, b in regions)
+            if changed_area > self.max_delta_area_fraction * width * height:
+                regions = None
+
+        if regions is None:
+            payload = FRAME_HEADER.pack(width, height, 0) + _jpeg(decoded, self.quality)
+            self._append(timestamp, KIND_KEYFRAME, payload)
+            self._frames_since_keyframe = 0
+            self.stats.keyframes += 1
+        else:
+            parts = [FRAME_HEADER.pack(width, height, len(regions))]
+            for region in regions:
+                crop = _jpeg(decoded.crop(region), self.quality)
+                parts += [REGION_HEADER.pack(*region, len(crop)), crop]
+            self._append(timestamp, KIND_DELTA, b"".join(parts))
+            self._frames_since_keyframe += 1
+
+        self._previous = current
+        self.stats.frames += 1
+        self.stats.raw_bytes += len(image)
+
+    def write_transcript(self, timestamp: float, text: str) -> None:
+        self._append(timestamp, KIND_TRANSCRIPT, text.encode())
+
+    def write_event(self, timestamp: float, name: str, **data) -> None:
+        self._append(timestamp, KIND_EVENT, json.dumps({"name": name, **data}).encode())
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        # Without the index the recording is still readable, just slower to open
+        with self._file:
+            index_offset = self._file.tell()
+            for entry in self.index:
+                self._file.write(
+                    INDEX_ENTRY.pack(entry.timestamp, entry.offset, entry.kind)
+                )
+            self._file.write(TRAILER.pack(index_offset, len(self.index), INDEX_MAGIC))
+
+    def _append(self, timestamp: float, kind: int, payload: bytes) -> None:
+        offset = self._file.tell()
+        self._file.write(RECORD_HEADER.pack(timestamp, kind, len(payload)))
+        self._file.write(payload)
+        self.index.append(IndexEntry(timestamp, offset, kind))
+        self.stats.written_bytes += RECORD_HEADER.size + len(payload)
+
+
+class RecordingReader:
+    """Random access to a recording through a read-only memory map.
+
+    Only the index is read up front. Frames are rebuilt on demand from the
+    nearest keyframe at or before the requested time.
+    """
+
+    def __init__(self, path: str):
+        # Both are closed again if the file turns out not to be a recording
+        with ExitStack() as stack:
+            self._file = stack.enter_context(open(path, "rb"))
+            self._map = stack.enter_context(
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+            magic, self.started_at = FILE_HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a session recording")
+
+            self.index = self._read_index()
+            stack.pop_all()
+        self._frame_entries = [e for e in self.index if e.kind in FRAME_KINDS]
+        self._frame_times = [entry.timestamp for entry in self._frame_entries]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def duration(self) -> float:
+        return self.index[-1].timestamp if self.index else 0.0
+
+    @property
+    def frame_times(self) -> list[float]:
+        return list(self._frame_times)
+
+    def frame_at(self, timestamp: float) -> tuple[float, Image.Image] | None:
+        """Return the last frame at or before `timestamp`, with its time."""
+        position = bisect.bisect_right(self._frame_times, timestamp) - 1
+        if position < 0:
+            return None
+
+        start = position
+        while start > 0 and self._frame_entries[start].kind != KIND_KEYFRAME:
+            start -= 1
+
+        image = None
+        for entry in self._frame_entries[start : position + 1]:
+            image = self._apply_frame(image, entry)
+        return self._frame_times[position], image
+
+    def frames(
+        self, start: float = 0.0, end: float = float("inf")
+    ) -> Iterator[tuple[float, Image.Image]]:
+        """Decode frames in order, starting from the frame shown at `start`."""
+        shown = max(0, bisect.bisect_right(self._frame_times, start) - 1)
+        first = shown
+        while first > 0 and self._frame_entries[first].kind != KIND_KEYFRAME:
+            first -= 1
+
+        image = None
+        for position in range(first, len(self._frame_entries)):
+            entry = self._frame_entries[position]
+            if entry.timestamp > end:
+                break
+            image = self._apply_frame(image, entry)
+            if position >= shown:
+                yield entry.timestamp, image
+
+    def transcripts(
+        self, start: float = 0.0, end: float = float("inf")
+    ) -> list[tuple[float, str]]:
+        return [
+            (timestamp, payload.decode())
+            for timestamp, _, payload in self.records(start, end, KIND_TRANSCRIPT)
+        ]
+
+    def events(self, start: float = 0.0, end: float = float("inf")) -> list[dict]:
+        return [
+            {"timestamp": timestamp, **json.loads(payload)}
+            for timestamp, _, payload in self.records(start, end, KIND_EVENT)
+        ]
+
+    def records(
+        self,
+        start: float = 0.0,
+        end: float = float("inf"),
+        kind: int | None = None,
+    ) -> Iterator[tuple[float, int, bytes]]:
+        """Yield (timestamp, kind, payload) for records between two times."""
+        times = [entry.timestamp for entry in self.index]
+        for entry in self.index[bisect.bisect_left(times, start) :]:
+            if entry.timestamp > end:
+                break
+            if kind is None or entry.kind == kind:
+                yield entry.timestamp, entry.kind, self._payload(entry)
+
+    def close(self) -> None:
+        with self._file:
+            self._map.close()
+
+    def _payload(self, entry: IndexEntry) -> bytes:
+        _, _, length = RECORD_HEADER.unpack_from(self._map, entry.offset)
+        start = entry.offset + RECORD_HEADER.size
+        return self._map[start : start + length]
+
+    def _apply_frame(self, image: Image.Image | None, entry: IndexEntry) -> Image.Image:
+        payload = self._payload(entry)
+        _, _, count = FRAME_HEADER.unpack_from(payload, 0)
+        if entry.kind == KIND_KEYFRAME:
+            return Image.open(io.BytesIO(payload[FRAME_HEADER.size :])).convert("RGB")
+
+        image = image.copy()
+        offset = FRAME_HEADER.size
+        for _ in range(count):
+            left, top, _, _, length = REGION_HEADER.unpack_from(payload, offset)
+            offset += REGION_HEADER.size
+            crop = Image.open(io.BytesIO(payload[offset : offset + length]))
+            image.paste(crop.convert("RGB"), (left, top))
+            offset += length
+        return image
+
+    def _read_index(self) -> list[IndexEntry]:
+        size = len(self._map)
+        if size >= FILE_HEADER.size + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(
+                self._map, size - TRAILER.size
+            )
+            if magic == INDEX_MAGIC:
+                return [
+                    IndexEntry(*INDEX_ENTRY.unpack_from(self._map, offset))
+                    for offset in range(
+                        index_offset,
+                        index_offset + count * INDEX_ENTRY.size,
+                        INDEX_ENTRY.size,
+                    )
+                ]
+
+        # Never closed, walk the record headers and drop a torn last record
+        index = []
+        offset = FILE_HEADER.size
+        while offset + RECORD_HEADER.size <= size:
+            timestamp, kind, length = RECORD_HEADER.unpack_from(self._map, offset)
+            if offset + RECORD_HEADER.size + length > size:
+                break
+            index.append(IndexEntry(timestamp, offset, kind))
+            offset += RECORD_HEADER.size + length
+        return index
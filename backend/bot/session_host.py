@@ -0,0 +1,134 @@
+"""Hosts many VisionAssistant sessions in one process."""
+
+import asyncio
+import json
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from config import VisionConfig
+from frame_processors.tts_cache import TTSAudioCache
+from loguru import logger
+from vad import (
+    BatchedSileroInference,
+    BatchedSileroModel,
+    SharedSessionSileroModel,
+    SharedSileroVADAnalyzer,
+    load_silero_session,
+)
+
+
+def send_worker_event(event: str, **data) -> None:
+    """Report a worker event to the API process over stdout."""
+    print(json.dumps({"event": event, **data}), flush=True)
+
+
+class SessionHost:
+    """Runs up to `max_sessions` VisionAssistant sessions on one event loop.
+
+    Assignments arrive from the API process as JSON lines on stdin and events
+    go back as JSON lines on stdout. Each session gets its own assistant, and
+    with it its own ImageManager and MessageHandler. The Silero model weights
+    the frame encoding threads and the TTS audio cache are loaded once and
+    shared, and VAD chunks from all sessions are scored in micro-batches when
+    VAD_BATCHING is on.
+    Each session's counters and turn latencies are reported every
+    METRICS_REPORT_INTERVAL seconds and once more when it ends.
+    """
+
+    def __init__(self, assistant_factory: Callable, max_sessions: int = 1):
+        self.assistant_factory = assistant_factory
+        self.max_sessions = max_sessions
+        self.sessions: dict[str, asyncio.Task] = {}
+        self.vad_session = load_silero_session()
+        self.vad_inference = (
+            BatchedSileroInference(
+                self.vad_session,
+                max_batch_size=VisionConfig.VAD_MAX_BATCH_SIZE,
+                max_delay=VisionConfig.VAD_MAX_BATCH_DELAY,
+            )
+            if VisionConfig.VAD_BATCHING
+            else None
+        )
+        self.encoder_executor = ThreadPoolExecutor(
+            max_workers=VisionConfig.ENCODER_WORKERS * max_sessions
+        )
+        self.tts_cache = (
+            TTSAudioCache(
+                max_bytes=VisionConfig.TTS_CACHE_MAX_BYTES,
+                directory=VisionConfig.TTS_CACHE_DIR,
+            )
+            if VisionConfig.TTS_CACHE
+            else None
+        )
+        logger.info(f"SessionHost initialized for {max_sessions} session(s)")
+
+    async def run(self) -> None:
+        """Accept assignments until stdin closes, then let sessions finish."""
+        send_worker_event("ready", capacity=self.max_sessions)
+
+        loop = asyncio.get_running_loop()
+        while line := await loop.run_in_executor(None, sys.stdin.readline):
+            try:
+                assignment = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring malformed assignment: {line!r}")
+                continue
+            self.start_session(assignment)
+
+        logger.info("Worker stdin closed, waiting for sessions to finish")
+        await asyncio.gather(*self.sessions.values(), return_exceptions=True)
+        self.encoder_executor.shutdown(wait=False, cancel_futures=True)
+        if self.vad_inference:
+            self.vad_inference.close()
+
+    def start_session(self, assignment: dict) -> None:
+        session_id = assignment["session_id"]
+        if len(self.sessions) >= self.max_sessions:
+            logger.warning(f"Session cap reached, rejecting {session_id}")
+            send_worker_event("session_rejected", session_id=session_id)
+            return
+
+        self.sessions[session_id] = asyncio.create_task(
+            self._run_session(session_id, assignment["room_url"], assignment["token"])
+        )
+
+    def _create_vad_model(self):
+        if self.vad_inference:
+            return BatchedSileroModel(self.vad_inference)
+        return SharedSessionSileroModel(self.vad_session)
+
+    async def _run_session(self, session_id: str, room_url: str, token: str) -> None:
+        logger.info(f"Starting session {session_id} in room: {room_url}")
+        send_worker_event("session_started", session_id=session_id)
+        assistant = None
+        reporter = None
+        try:
+            assistant = self.assistant_factory(
+                vad_analyzer=SharedSileroVADAnalyzer(self._create_vad_model()),
+                encoder_executor=self.encoder_executor,
+                tts_cache=self.tts_cache,
+            )
+            reporter = asyncio.create_task(self._report_metrics(session_id, assistant))
+            await assistant.run(room_url, token, handle_sigint=False)
+        # A failed session must not take down the others this worker hosts
+        except Exception as e:  # noqa: BLE001
+            logger.exception(f"Session {session_id} failed: {e}")
+        finally:
+            if reporter:
+                reporter.cancel()
+            if assistant:
+                self._send_metrics(session_id, assistant)
+            del self.sessions[session_id]
+            send_worker_event("session_ended", session_id=session_id)
+            logger.info(f"Session {session_id} ended")
+
+    def _send_metrics(self, session_id: str, assistant) -> None:
+        send_worker_event(
+            "session_metrics", session_id=session_id, **assistant.get_metrics()
+        )
+
+    async def _report_metrics(self, session_id: str, assistant) -> None:
+        while True:
+            await asyncio.sleep(VisionConfig.METRICS_REPORT_INTERVAL)
+            self._send_metrics(session_id, assistant)
@@ -0,0 +1,166 @@
+"""Per-turn latency tracing for the conversation pipeline."""
+
+import bisect
+import time
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+# Upper bounds in seconds, the last bucket catches everything above
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+# Stages of a conversation turn, in the order they normally happen
+VAD_STOP = "vad_stop"
+TRANSCRIPTION = "transcription"
+CONTEXT_READY = "context_ready"
+LLM_FIRST_TOKEN = "llm_first_token"
+TTS_FIRST_BYTE = "tts_first_byte"
+OUTPUT_STARTED = "output_started"
+
+# Span name -> (start stage, end stage)
+TURN_SPANS: dict[str, tuple[str, str]] = {
+    "vad_to_transcription": (VAD_STOP, TRANSCRIPTION),
+    "transcription_to_context": (TRANSCRIPTION, CONTEXT_READY),
+    "llm_time_to_first_token": (CONTEXT_READY, LLM_FIRST_TOKEN),
+    "tts_time_to_first_byte": (LLM_FIRST_TOKEN, TTS_FIRST_BYTE),
+    "tts_to_output": (TTS_FIRST_BYTE, OUTPUT_STARTED),
+}
+
+# Spans timed directly rather than between two stages
+IMAGE_ENCODE_SPAN = "image_encode"
+TURN_TOTAL_SPAN = "turn_total"
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, in seconds."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        p95 = self.quantile(0.95)
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": round(self.total, 4),
+            "count": self.count,
+            "p50": self.quantile(0.5),
+            "p95": p95 if p95 != float("inf") else None,
+        }
+
+
+@dataclass
+class TurnStats:
+    turns_completed: int = 0
+    turns_abandoned: int = 0
+    # Conversation LLM input tokens, split by prompt cache outcome
+    uncached_input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+class TurnTracer:
+    """Collects stage timestamps for each turn and aggregates them into spans.
+
+    Pipeline processors call `mark` as a turn passes through them. A turn opens
+    at its first mark and closes when the bot starts speaking, at which point
+    every span whose two stages were seen is added to its histogram. VAD stop
+    is re-marked each time the user pauses, so the last pause before the reply
+    counts. A VAD stop after the LLM has started answering opens a new turn
+    and the unfinished one is dropped.
+    """
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {
+            name: LatencyHistogram()
+            for name in [*TURN_SPANS, IMAGE_ENCODE_SPAN, TURN_TOTAL_SPAN]
+        }
+        self.stats = TurnStats()
+        self._turn: dict[str, float] = {}
+
+    def mark(self, stage: str, at: float | None = None) -> None:
+        at = time.monotonic() if at is None else at
+
+        if stage == VAD_STOP:
+            if LLM_FIRST_TOKEN in self._turn:
+                self.stats.turns_abandoned += 1
+                self._turn = {}
+            self._turn[VAD_STOP] = at
+        else:
+            self._turn.setdefault(stage, at)
+
+        if stage == OUTPUT_STARTED:
+            self._complete_turn()
+
+    def record(self, span: str, seconds: float) -> None:
+        self.histograms[span].observe(seconds)
+
+    def record_usage(
+        self, input_tokens: int, cache_read_tokens: int, cache_write_tokens: int
+    ) -> None:
+        """Count the input tokens of one conversation LLM request."""
+        self.stats.uncached_input_tokens += input_tokens
+        self.stats.cache_read_tokens += cache_read_tokens
+        self.stats.cache_write_tokens += cache_write_tokens
+        logger.info(
+            f"LLM input tokens: {cache_read_tokens} cache read, "
+            f"{cache_write_tokens} cache write, {input_tokens} uncached"
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "spans": {
+                name: histogram.snapshot()
+                for name, histogram in self.histograms.items()
+            },
+            "turns_completed": self.stats.turns_completed,
+            "turns_abandoned": self.stats.turns_abandoned,
+            "uncached_input_tokens": self.stats.uncached_input_tokens,
+            "cache_read_tokens": self.stats.cache_read_tokens,
+            "cache_write_tokens": self.stats.cache_write_tokens,
+        }
+
+    def _complete_turn(self) -> None:
+        turn, self._turn = self._turn, {}
+        spans = {}
+        for name, (start, end) in TURN_SPANS.items():
+            # Transcripts can land before the final VAD stop, skip those spans
+            if start in turn and end in turn and turn[end] >= turn[start]:
+                spans[name] = turn[end] - turn[start]
+                self.histograms[name].observe(spans[name])
+
+        # Turns started by the bot itself, like the greeting, have no user input
+        started = turn.get(VAD_STOP, turn.get(TRANSCRIPTION))
+        if started is not None:
+            spans[TURN_TOTAL_SPAN] = turn[OUTPUT_STARTED] - started
+            self.histograms[TURN_TOTAL_SPAN].observe(spans[TURN_TOTAL_SPAN])
+
+        self.stats.turns_completed += 1
+        logger.debug(
+            "Turn latency: "
+            + ", ".join(f"{name}={seconds:.3f}s" for name, seconds in spans.items())
+        )
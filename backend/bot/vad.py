@@ -0,0 +1,195 @@
+"""Voice activity detection shared across sessions."""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from loguru import logger
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+
+def load_silero_session():
+    """Load the Silero VAD model and return its ONNX inference session."""
+    return SileroVADAnalyzer()._model.session
+
+
+class SharedSessionSileroModel(SileroOnnxModel):
+    """Silero model wrapper around an ONNX session owned by someone else."""
+
+    def __init__(self, session):
+        self.session = session
+        self.reset_states()
+        self.sample_rates = [8000, 16000]
+
+
+@dataclass
+class InferenceRequest:
+    audio: np.ndarray
+    state: np.ndarray
+    sample_rate: int
+    done: threading.Event = field(default_factory=threading.Event)
+    result: tuple[np.ndarray, np.ndarray] | None = None
+    error: Exception | None = None
+
+
+class BatchedSileroInference:
+    """Runs Silero inference for many audio streams in micro-batches.
+
+    Callers block until their chunk has been scored. The first request of a
+    batch waits at most `max_delay` seconds for others to join before the
+    batch runs, which bounds the latency added to any one stream.
+    """
+
+    def __init__(self, session, max_batch_size: int = 32, max_delay: float = 0.005):
+        self.session = session
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self.chunks = 0
+        self._queue: queue.Queue[InferenceRequest | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.debug(
+            f"BatchedSileroInference started (batch {max_batch_size}, "
+            f"deadline {max_delay * 1000:.1f}ms)"
+        )
+
+    def infer(
+        self, audio: np.ndarray, state: np.ndarray, sample_rate: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Score one (1, samples) chunk and return (output, new_state)."""
+        request = InferenceRequest(audio, state, sample_rate)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error:
+            raise request.error
+        return request.result
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect_batch(self, first: InferenceRequest) -> list[InferenceRequest]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while (first := self._queue.get()) is not None:
+            batch = self._collect_batch(first)
+
+            # The model takes one sample rate per call, so split mixed batches
+            for sample_rate in {request.sample_rate for request in batch}:
+                group = [r for r in batch if r.sample_rate == sample_rate]
+                try:
+                    out, state = self._score(group, sample_rate)
+                    for i, request in enumerate(group):
+                        request.result = (out[i : i + 1], state[:, i : i + 1])
+                # ONNX Runtime errors derive from Exception directly
+                except Exception:  # noqa: BLE001
+                    # Score the chunks one by one, so only a bad chunk fails
+                    logger.opt(exception=True).warning(
+                        f"Batched VAD inference of {len(group)} chunk(s) failed, "
+                        "scoring them one by one"
+                    )
+                    for request in group:
+                        try:
+                            request.result = self._score([request], sample_rate)
+                        except Exception as e:  # noqa: BLE001
+                            # Raised again by infer(), in the caller's thread
+                            request.error = e
+
+                for request in group:
+                    request.done.set()
+
+            self.batches += 1
+            self.chunks += len(batch)
+
+    def _score(
+        self, group: list[InferenceRequest], sample_rate: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        out, state = self.session.run(
+            None,
+            {
+                "input": np.concatenate([r.audio for r in group]),
+                "state": np.concatenate([r.state for r in group], axis=1),
+                "sr": np.array(sample_rate, dtype="int64"),
+            },
+        )
+        return out, state
+
+
+class BatchedSileroModel(SileroOnnxModel):
+    """Single-stream Silero model that scores its chunks on a shared batcher."""
+
+    def __init__(self, inference: BatchedSileroInference):
+        self.inference = inference
+        self.reset_states()
+        self.sample_rates = [8000, 16000]
+
+    def __call__(self, x, sr: int):
+        x, sr = self._validate_input(x, sr)
+        num_samples = 512 if sr == 16000 else 256
+        if np.shape(x) != (1, num_samples):
+            raise ValueError(
+                f"Provided shape is {np.shape(x)} (Supported: (1, {num_samples}))"
+            )
+        context_size = 64 if sr == 16000 else 32
+
+        if self._last_sr and self._last_sr != sr:
+            self.reset_states()
+        if not np.shape(self._context)[1]:
+            self._context = np.zeros((1, context_size), dtype="float32")
+
+        x = np.concatenate((self._context, x), axis=1)
+        out, self._state = self.inference.infer(x, self._state, sr)
+
+        self._context = x[..., -context_size:]
+        self._last_sr = sr
+        self._last_batch_size = 1
+
+        return out
+
+
+class SharedSileroVADAnalyzer(SileroVADAnalyzer):
+    """Silero VAD analyzer built around an already loaded model wrapper.
+
+    Each analyzer keeps its own recurrent state, only the model weights (and,
+    with BatchedSileroModel, the inference calls) are shared, so creating one
+    per session costs no model load.
+    """
+
+    def __init__(
+        self,
+        model: SileroOnnxModel,
+        *,
+        sample_rate: int = 16000,
+        params: VADParams | None = None,
+    ):
+        VADAnalyzer.__init__(
+            self,
+            sample_rate=sample_rate,
+            num_channels=1,
+            params=params or VADParams(),
+        )
+
+        if sample_rate != 16000 and sample_rate != 8000:
+            raise ValueError("Silero VAD sample rate needs to be 16000 or 8000")
+
+        self._model = model
+        self._last_reset_time = 0
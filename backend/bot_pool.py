@@ -0,0 +1,193 @@
+"""Pool of pre-started bot workers."""
+
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Callable
+
+from loguru import logger
+
+
+class BotWorker:
+    """A bot process that has finished importing and is waiting for rooms.
+
+    A worker hosts up to `capacity` sessions, which it reports once ready.
+    Sessions are tracked from the events the worker sends back on stdout.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.pid = process.pid
+        self.started_at = time.time()
+        self.ready_at: float | None = None
+        self.capacity = 1
+        # Session id -> room URL, including sessions not yet confirmed started
+        self.sessions: dict[str, str] = {}
+        self.ready = asyncio.Event()
+        # Extra callbacks run with (worker, event) for every event received
+        self.event_handlers: list[Callable[[BotWorker, dict], None]] = []
+        self._events_task = asyncio.create_task(self._read_events())
+
+    @property
+    def free_slots(self) -> int:
+        return self.capacity - len(self.sessions)
+
+    def poll(self) -> int | None:
+        return self.process.returncode
+
+    async def assign(self, room_url: str, token: str) -> str:
+        """Hand a room to the worker and return the new session id."""
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = room_url
+        assignment = json.dumps(
+            {"session_id": session_id, "room_url": room_url, "token": token}
+        )
+        self.process.stdin.write(f"{assignment}\n".encode())
+        await self.process.stdin.drain()
+        return session_id
+
+    def terminate(self) -> None:
+        if self.process.returncode is None:
+            self.process.terminate()
+
+    async def wait(self) -> int:
+        return await self.process.wait()
+
+    def handle_event(self, event: dict) -> None:
+        match event.get("event"):
+            case "ready":
+                self.ready_at = time.time()
+                self.capacity = event.get("capacity", 1)
+                self.ready.set()
+                logger.debug(
+                    f"Bot worker {self.pid} ready in "
+                    f"{self.ready_at - self.started_at:.2f}s"
+                )
+            case "session_ended" | "session_rejected":
+                room_url = self.sessions.pop(event.get("session_id"), None)
+                logger.debug(f"Bot worker {self.pid} {event['event']}: {room_url}")
+
+    async def _read_events(self) -> None:
+        async for line in self.process.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # Anything else a library prints to stdout is not for us
+                continue
+            if isinstance(event, dict):
+                self.handle_event(event)
+                for handler in self.event_handlers:
+                    handler(self, event)
+
+
+class BotWorkerPool:
+    """Keeps `size` idle, fully imported bot workers ready to take rooms.
+
+    Rooms are packed onto the busiest live worker that still has a free slot,
+    and only spill over to idle workers once the others are full. A refill
+    pass runs in the background after every hand-out: it spawns workers until
+    `size` are idle, retires idle workers beyond that, and drops dead ones. If
+    nothing is ready a worker is cold-started on demand. `event_handlers` are
+    attached to every worker the pool spawns.
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        cwd: str,
+        size: int = 2,
+        ready_timeout: float = 60.0,
+        refill_interval: float = 5.0,
+        event_handlers: list[Callable[[BotWorker, dict], None]] | None = None,
+    ):
+        self.command = command
+        self.cwd = cwd
+        self.size = size
+        self.ready_timeout = ready_timeout
+        self.refill_interval = refill_interval
+        self.event_handlers = event_handlers or []
+        self.workers: list[BotWorker] = []
+        self._refill_event = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+
+    @property
+    def idle(self) -> list[BotWorker]:
+        return [worker for worker in self.workers if not worker.sessions]
+
+    async def start(self) -> None:
+        self._refill_task = asyncio.create_task(self._refill_loop())
+        self._refill_event.set()
+
+    async def stop(self) -> None:
+        if self._refill_task:
+            self._refill_task.cancel()
+        for worker in self.workers:
+            worker.terminate()
+        await asyncio.gather(*[worker.wait() for worker in self.workers])
+        self.workers.clear()
+
+    async def acquire(self) -> BotWorker:
+        """Return a ready worker with a free slot, cold-starting one if needed.
+
+        The slot is taken by `BotWorker.assign`, so call it right away. A
+        caller that waited for a worker to start selects again once it is
+        ready, since callers that waited alongside may have filled it.
+        """
+        while True:
+            self._prune()
+            ready = [
+                worker
+                for worker in self.workers
+                if worker.ready.is_set() and worker.free_slots > 0
+            ]
+            self._refill_event.set()
+            if ready:
+                return min(ready, key=lambda worker: worker.free_slots)
+            if self.idle:
+                worker = self.idle[0]
+                logger.info(f"No warm bot worker ready, waiting on {worker.pid}")
+            else:
+                worker = await self._spawn()
+                logger.info(f"Bot worker pool empty, cold-started {worker.pid}")
+
+            await asyncio.wait_for(worker.ready.wait(), self.ready_timeout)
+
+    async def _spawn(self) -> BotWorker:
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+        )
+        logger.debug(f"Spawned bot worker {process.pid}")
+        worker = BotWorker(process)
+        worker.event_handlers.extend(self.event_handlers)
+        self.workers.append(worker)
+        return worker
+
+    def _prune(self) -> None:
+        for worker in [worker for worker in self.workers if worker.poll() is not None]:
+            logger.warning(f"Bot worker {worker.pid} exited ({worker.poll()})")
+            self.workers.remove(worker)
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), self.refill_interval)
+            except TimeoutError:
+                pass
+            self._refill_event.clear()
+
+            self._prune()
+            for worker in self.idle[self.size :]:
+                if worker.ready.is_set():
+                    logger.debug(f"Retiring surplus idle bot worker {worker.pid}")
+                    self.workers.remove(worker)
+                    worker.terminate()
+            while len(self.idle) < self.size:
+                try:
+                    await self._spawn()
+                except OSError as e:
+                    logger.error(f"Failed to spawn bot worker: {e}")
+                    break
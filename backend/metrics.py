@@ -0,0 +1,202 @@
+"""Aggregation of bot worker metrics for the Prometheus /metrics endpoint."""
+
+import bisect
+from collections.abc import Callable
+
+from bot_pool import BotWorker
+
+METRIC_PREFIX = "grandson"
+
+# Upper bounds in seconds for bot worker spawn times
+SPAWN_BUCKETS = (0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+
+# Session counter name -> help text
+SESSION_COUNTERS = {
+    "frames_received": "Screen frames received from participants",
+    "frames_encoded": "Screen frames encoded for the LLMs",
+    "frames_dropped": "Screen frames dropped before encoding finished",
+    "summaries_sent": "Vision summaries sent to the vision LLM",
+    "summaries_skipped": "Vision summaries skipped because the screen was unchanged",
+    "summaries_deferred": "Vision summaries held back by a conversation turn",
+    "summaries_forced": "Vision summaries started during a turn after the deadline",
+    "summaries_cancelled": "In-flight vision summaries cancelled for a turn",
+    "summaries_cached": "Vision summaries reused from the perceptual hash cache",
+    "summary_cache_misses": "Summary cache lookups that found no similar screen",
+    "images_deduplicated": "Screenshots referenced instead of attached again",
+    "uncached_input_tokens": "Conversation LLM input tokens not read from the cache",
+    "cache_read_tokens": "Conversation LLM input tokens read from the prompt cache",
+    "cache_write_tokens": "Conversation LLM input tokens written to the prompt cache",
+    "tts_cache_hits": "Phrases played from the TTS audio cache",
+    "tts_cache_misses": "Short phrases synthesized because they were not cached",
+    "tts_first_audio_saved_seconds": "Time to first audio saved by the TTS cache",
+    "speculations_started": "Speculative replies started from interim transcripts",
+    "speculations_committed": "Speculative replies used for the final transcript",
+    "speculations_discarded": "Speculative replies cancelled or not matching",
+    "speculation_latency_saved_seconds": "Head start of committed speculative replies",
+    "frames_saved": "Screen frames not captured thanks to the adaptive capture rate",
+}
+
+
+class Histogram:
+    """Cumulative histogram that can absorb snapshots reported by bots."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, snapshot: dict) -> None:
+        """Add a bot histogram snapshot, which must use the same buckets."""
+        if tuple(snapshot["buckets"]) != self.buckets:
+            return
+        for i, count in enumerate(snapshot["counts"]):
+            self.counts[i] += count
+        self.total += snapshot["sum"]
+        self.count += snapshot["count"]
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.total = self.total
+        histogram.count = self.count
+        return histogram
+
+    def render(self, name: str, labels: str = "") -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(
+                f"{name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}"
+            )
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.total:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class MetricsCollector:
+    """Collects the metrics bot workers report on stdout and renders them.
+
+    Bots send cumulative per-session snapshots, so the latest one for each live
+    session replaces the previous one. When a session ends, or its worker
+    exits, its last snapshot is folded into the totals so counters never go
+    backwards. Spawn times are measured here from each worker's ready event.
+    """
+
+    def __init__(self):
+        self.sessions: dict[str, tuple[BotWorker, dict]] = {}
+        self.counters: dict[str, int] = {name: 0 for name in SESSION_COUNTERS}
+        self.latency: dict[str, Histogram] = {}
+        self.spawn_seconds = Histogram(SPAWN_BUCKETS)
+        self.gauges: dict[str, tuple[str, Callable[[], float | None]]] = {}
+        self.histograms: dict[str, tuple[str, Histogram]] = {}
+
+    def add_gauge(
+        self, name: str, help_text: str, read: Callable[[], float | None]
+    ) -> None:
+        """Register a gauge that is read every time metrics are rendered."""
+        self.gauges[name] = (help_text, read)
+
+    def add_histogram(self, name: str, help_text: str, histogram: Histogram) -> None:
+        """Register a histogram that is observed outside the collector."""
+        self.histograms[name] = (help_text, histogram)
+
+    def on_worker_event(self, worker: BotWorker, event: dict) -> None:
+        match event.get("event"):
+            case "ready":
+                self.spawn_seconds.observe(worker.ready_at - worker.started_at)
+            case "session_metrics":
+                self.sessions[event["session_id"]] = (worker, event)
+            case "session_ended" | "session_rejected":
+                self._fold(event.get("session_id"))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        for session_id, (worker, _) in list(self.sessions.items()):
+            if worker.poll() is not None:
+                self._fold(session_id)
+
+        counters = dict(self.counters)
+        latency = {span: hist.copy() for span, hist in self.latency.items()}
+        context_bytes = []
+        capture_fps = []
+        for _, report in self.sessions.values():
+            for name, value in report.get("counters", {}).items():
+                if name in counters:
+                    counters[name] += value
+            self._merge_latency(latency, report)
+            context_bytes.append(report.get("context_bytes", 0))
+            if report.get("capture_fps") is not None:
+                capture_fps.append(report["capture_fps"])
+
+        lines = []
+        for name, (help_text, read) in self.gauges.items():
+            value = read()
+            if value is not None:
+                lines += self._header(name, help_text, "gauge")
+                lines.append(f"{METRIC_PREFIX}_{name} {value}")
+
+        for name, help_text in SESSION_COUNTERS.items():
+            lines += self._header(f"{name}_total", help_text, "counter")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {counters[name]}")
+
+        lines += self._header(
+            "context_bytes", "LLM context size of the largest live session", "gauge"
+        )
+        lines.append(f"{METRIC_PREFIX}_context_bytes {max(context_bytes, default=0)}")
+
+        lines += self._header(
+            "capture_fps",
+            "Mean effective screen capture rate of live sessions",
+            "gauge",
+        )
+        mean_fps = sum(capture_fps) / len(capture_fps) if capture_fps else 0
+        lines.append(f"{METRIC_PREFIX}_capture_fps {mean_fps:.3f}")
+
+        lines += self._header(
+            "turn_latency_seconds", "Conversation turn latency by span", "histogram"
+        )
+        for span, histogram in sorted(latency.items()):
+            lines += histogram.render(
+                f"{METRIC_PREFIX}_turn_latency_seconds", f'span="{span}"'
+            )
+
+        lines += self._header(
+            "bot_spawn_seconds", "Time for a bot worker to become ready", "histogram"
+        )
+        lines += self.spawn_seconds.render(f"{METRIC_PREFIX}_bot_spawn_seconds")
+
+        for name, (help_text, histogram) in self.histograms.items():
+            lines += self._header(name, help_text, "histogram")
+            lines += histogram.render(f"{METRIC_PREFIX}_{name}")
+        return "\n".join(lines) + "\n"
+
+    def _fold(self, session_id: str | None) -> None:
+        _, report = self.sessions.pop(session_id, (None, None))
+        if not report:
+            return
+        for name, value in report.get("counters", {}).items():
+            if name in self.counters:
+                self.counters[name] += value
+        self._merge_latency(self.latency, report)
+
+    def _merge_latency(self, latency: dict[str, Histogram], report: dict) -> None:
+        for span, snapshot in report.get("latency", {}).get("spans", {}).items():
+            if span not in latency:
+                latency[span] = Histogram(tuple(snapshot["buckets"]))
+            latency[span].merge(snapshot)
+
+    @staticmethod
+    def _header(name: str, help_text: str, kind: str) -> list[str]:
+        return [
+            f"# HELP {METRIC_PREFIX}_{name} {help_text}",
+            f"# TYPE {METRIC_PREFIX}_{name} {kind}",
+        ]
@@ -0,0 +1,205 @@
+"""Pool of pre-created Daily rooms with meeting tokens."""
+
+import asyncio
+import time
+from collections.abc import Awaitable
+from dataclasses import dataclass
+
+import aiohttp
+from loguru import logger
+from pipecat.transports.services.helpers.daily_rest import (
+    DailyRESTHelper,
+    DailyRoomParams,
+    DailyRoomProperties,
+)
+
+
+class DailyAPIError(Exception):
+    pass
+
+
+async def call_daily[T](request: Awaitable[T]) -> T:
+    """Await a DailyRESTHelper call, raising DailyAPIError if it fails."""
+    try:
+        return await request
+    except (aiohttp.ClientError, TimeoutError) as e:
+        raise DailyAPIError(f"Daily API unreachable: {e!r}") from e
+    except Exception as e:
+        # DailyRESTHelper reports failed API calls as plain Exceptions
+        if type(e) is not Exception:
+            raise
+        raise DailyAPIError(str(e)) from e
+
+
+@dataclass
+class PooledRoom:
+    url: str
+    name: str
+    token: str
+    created_at: float
+    # Unix seconds at which both the room and its token expire
+    expires_at: float
+
+
+class RoomPool:
+    """Keeps `size` Daily rooms with fresh owner tokens ready to hand out.
+
+    Creating a room and a token are two round trips to the Daily REST API,
+    so a background refill pass creates them ahead of time. Rooms and tokens
+    expire `shelf_seconds + session_seconds` after creation, and rooms are
+    only handed out while they still have `session_seconds` left; older ones
+    are deleted and replaced. Daily ejects everyone when a room expires, so
+    `session_seconds` caps how long a call can last; it defaults to the hour
+    room tokens used to be valid for. When the pool is empty, or `size` is 0,
+    a room is created on demand. With a `room_name`, every room has that
+    fixed name, so nothing can be pooled and all rooms are created on demand.
+    """
+
+    def __init__(
+        self,
+        daily_rest_helper: DailyRESTHelper,
+        size: int = 2,
+        session_seconds: float = 60 * 60,
+        shelf_seconds: float = 10 * 60,
+        refill_interval: float = 5.0,
+        room_name: str | None = None,
+    ):
+        self.daily_rest_helper = daily_rest_helper
+        self.size = 0 if room_name else size
+        self.session_seconds = session_seconds
+        self.shelf_seconds = shelf_seconds
+        self.refill_interval = refill_interval
+        self.room_name = room_name
+        self.rooms: list[PooledRoom] = []
+        self.hits_total = 0
+        self.misses_total = 0
+        self.expired_total = 0
+        self.failures_total = 0
+        self._refill_event = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+        # Deletes of expired rooms still running, awaited on stop()
+        self._delete_tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self.size:
+            self._refill_task = asyncio.create_task(self._refill_loop())
+            self._refill_event.set()
+
+    async def stop(self) -> None:
+        if self._refill_task:
+            self._refill_task.cancel()
+        rooms, self.rooms = self.rooms, []
+        await asyncio.gather(
+            *self._delete_tasks,
+            *[self._delete(room) for room in rooms],
+            return_exceptions=True,
+        )
+
+    async def acquire(self) -> PooledRoom:
+        """Return a ready room, creating one on demand if none is left."""
+        self._expire()
+        self._refill_event.set()
+        if self.rooms:
+            self.hits_total += 1
+            return self.rooms.pop(0)
+
+        self.misses_total += 1
+        if self.size:
+            logger.info("Room pool empty, creating a room on demand")
+        return await self._create(ttl=self.session_seconds)
+
+    async def discard(self, room: PooledRoom) -> None:
+        """Delete a room that was acquired but never used for a session.
+
+        A fixed `room_name` room may host other sessions, so it is kept.
+        """
+        if not self.room_name:
+            await self._delete(room)
+
+    def metrics(self) -> dict:
+        return {
+            "ready": len(self.rooms),
+            "hits_total": self.hits_total,
+            "misses_total": self.misses_total,
+            "expired_total": self.expired_total,
+            "failures_total": self.failures_total,
+        }
+
+    async def _create(self, ttl: float) -> PooledRoom:
+        created_at = time.time()
+        room = await call_daily(
+            self.daily_rest_helper.create_room(
+                DailyRoomParams(
+                    name=self.room_name,
+                    properties=DailyRoomProperties(
+                        exp=created_at + ttl,
+                        enable_chat=True,
+                        enable_recording=False,
+                    ),
+                )
+            )
+        )
+        token = await call_daily(
+            self.daily_rest_helper.get_token(room.url, expiry_time=ttl)
+        )
+        return PooledRoom(
+            url=room.url,
+            name=room.name,
+            token=token,
+            created_at=created_at,
+            expires_at=created_at + ttl,
+        )
+
+    async def _delete(self, room: PooledRoom) -> None:
+        try:
+            await call_daily(self.daily_rest_helper.delete_room_by_name(room.name))
+        except DailyAPIError:
+            logger.exception(f"Failed to delete pooled room {room.name}")
+
+    def _expire(self) -> None:
+        deadline = time.time() + self.session_seconds
+        expired = [room for room in self.rooms if room.expires_at < deadline]
+        if not expired:
+            return
+        self.rooms = [room for room in self.rooms if room not in expired]
+        self.expired_total += len(expired)
+        for room in expired:
+            # Deleting is only tidying up, the room expires on its own anyway
+            task = asyncio.create_task(self._delete(room))
+            self._delete_tasks.add(task)
+            task.add_done_callback(self._delete_tasks.discard)
+
+    async def _refill(self) -> None:
+        self._expire()
+        missing = self.size - len(self.rooms)
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(
+            *[
+                self._create(ttl=self.shelf_seconds + self.session_seconds)
+                for _ in range(missing)
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.failures_total += 1
+                logger.opt(exception=result).warning("Failed to create pooled room")
+            else:
+                self.rooms.append(result)
+        logger.debug(f"Room pool refilled, {len(self.rooms)} rooms ready")
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), self.refill_interval)
+            except TimeoutError:
+                pass
+            self._refill_event.clear()
+
+            # Keep refilling after an unexpected error, the pool is still useful
+            try:
+                await self._refill()
+            except Exception:  # noqa: BLE001
+                logger.exception("Room pool refill failed")
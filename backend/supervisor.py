@@ -0,0 +1,218 @@
+"""Supervision and resource accounting for bot workers."""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from loguru import logger
+
+from bot_pool import BotWorker
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class ProcessSample:
+    rss_bytes: int
+    cpu_seconds: float
+    cpu_percent: float | None
+    sampled_at: float
+
+
+def read_process_usage(pid: int) -> tuple[int, float] | None:
+    """Return (rss_bytes, cpu_seconds) for a process and its descendants.
+
+    A hot-reloading worker is a reloader process whose sessions run in its
+    children, so the whole tree is summed. CPU time includes children that
+    were already reaped, so the total does not drop when one exits.
+    """
+    usage = _read_single_usage(pid)
+    if usage is None:
+        return None
+    rss_bytes, cpu_seconds = usage
+    for child in _descendants(pid):
+        child_usage = _read_single_usage(child)
+        if child_usage:
+            rss_bytes += child_usage[0]
+            cpu_seconds += child_usage[1]
+    return rss_bytes, cpu_seconds
+
+
+def _read_single_usage(pid: int) -> tuple[int, float] | None:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the ")" that closes the command name; utime, stime,
+            # cutime and cstime are fields 14 to 17 of the full line
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    cpu_seconds = sum(int(field) for field in fields[11:15]) / CLOCK_TICKS
+    return rss_pages * PAGE_SIZE, cpu_seconds
+
+
+def _descendants(pid: int) -> list[int]:
+    pids = []
+    parents = [pid]
+    while parents:
+        parent = parents.pop()
+        try:
+            tasks = os.listdir(f"/proc/{parent}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{parent}/task/{task}/children") as f:
+                    children = [int(child) for child in f.read().split()]
+            except (OSError, ValueError):
+                continue
+            pids += children
+            parents += children
+    return pids
+
+
+class BotSupervisor:
+    """Tracks live bot workers, reaps exited ones and samples their usage.
+
+    Workers are indexed by pid and their sessions by room, so per-room limits
+    are a dictionary lookup. Each worker is awaited by its own reaper task, and
+    the last `max_exited` exited workers are kept for status reporting. RSS and
+    CPU are sampled from /proc every `sample_interval` seconds. Turn latency
+    histograms reported by each session are kept for the last `max_exited`
+    sessions, live or ended.
+    """
+
+    def __init__(self, sample_interval: float = 5.0, max_exited: int = 100):
+        self.sample_interval = sample_interval
+        self.max_exited = max_exited
+        self.workers: dict[int, BotWorker] = {}
+        self.samples: dict[int, ProcessSample] = {}
+        self.rooms: dict[str, set[str]] = {}
+        self.session_rooms: dict[str, str] = {}
+        self.exited: OrderedDict[int, dict] = OrderedDict()
+        self.latency: OrderedDict[str, dict] = OrderedDict()
+        self._reapers: dict[int, asyncio.Task] = {}
+        self._sample_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._sample_task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self) -> None:
+        if self._sample_task:
+            self._sample_task.cancel()
+        for worker in self.workers.values():
+            worker.terminate()
+        await asyncio.gather(*self._reapers.values(), return_exceptions=True)
+
+    def track(self, worker: BotWorker, session_id: str, room_url: str) -> None:
+        """Record a session that was just assigned to `worker`."""
+        if worker.pid not in self.workers:
+            self.workers[worker.pid] = worker
+            worker.event_handlers.append(self._on_worker_event)
+            self._reapers[worker.pid] = asyncio.create_task(self._reap(worker))
+
+        self.rooms.setdefault(room_url, set()).add(session_id)
+        self.session_rooms[session_id] = room_url
+
+    def bots_in_room(self, room_url: str) -> int:
+        return len(self.rooms.get(room_url, ()))
+
+    def session_latency(self, session_id: str) -> dict | None:
+        return self.latency.get(session_id)
+
+    @property
+    def running_bots(self) -> int:
+        return len(self.session_rooms)
+
+    def status(self, pid: int) -> dict | None:
+        if pid in self.exited:
+            return self.exited[pid]
+
+        worker = self.workers.get(pid)
+        if not worker:
+            return None
+
+        sample = self.samples.get(pid)
+        return {
+            "bot_id": pid,
+            "status": "running",
+            "sessions": len(worker.sessions),
+            "uptime_seconds": round(time.time() - worker.started_at, 1),
+            "rss_bytes": sample.rss_bytes if sample else None,
+            "cpu_percent": sample.cpu_percent if sample else None,
+            "latency": {
+                session_id: self.latency[session_id]
+                for session_id in worker.sessions
+                if session_id in self.latency
+            },
+        }
+
+    def _end_session(self, session_id: str) -> None:
+        room_url = self.session_rooms.pop(session_id, None)
+        if room_url is None:
+            return
+        sessions = self.rooms.get(room_url, set())
+        sessions.discard(session_id)
+        if not sessions:
+            self.rooms.pop(room_url, None)
+
+    def _on_worker_event(self, worker: BotWorker, event: dict) -> None:
+        match event.get("event"):
+            case "session_ended" | "session_rejected":
+                self._end_session(event.get("session_id"))
+            case "session_metrics":
+                self._record_latency(event.get("session_id"), event.get("latency"))
+
+    def _record_latency(self, session_id: str, latency: dict) -> None:
+        self.latency[session_id] = latency
+        self.latency.move_to_end(session_id)
+        while len(self.latency) > self.max_exited:
+            self.latency.popitem(last=False)
+
+    async def _reap(self, worker: BotWorker) -> None:
+        returncode = await worker.wait()
+        logger.info(f"Bot worker {worker.pid} exited with code {returncode}")
+
+        for session_id in list(worker.sessions):
+            self._end_session(session_id)
+        sample = self.samples.pop(worker.pid, None)
+        self.workers.pop(worker.pid, None)
+        self._reapers.pop(worker.pid, None)
+
+        self.exited[worker.pid] = {
+            "bot_id": worker.pid,
+            "status": "finished",
+            "exit_code": returncode,
+            "uptime_seconds": round(time.time() - worker.started_at, 1),
+            "rss_bytes": sample.rss_bytes if sample else None,
+            "cpu_seconds": sample.cpu_seconds if sample else None,
+        }
+        while len(self.exited) > self.max_exited:
+            self.exited.popitem(last=False)
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        for pid in list(self.workers):
+            usage = read_process_usage(pid)
+            if usage is None:
+                continue
+            rss_bytes, cpu_seconds = usage
+
+            previous = self.samples.get(pid)
+            cpu_percent = None
+            if previous:
+                elapsed = now - previous.sampled_at
+                cpu_percent = round(
+                    100 * (cpu_seconds - previous.cpu_seconds) / elapsed, 1
+                )
+            self.samples[pid] = ProcessSample(rss_bytes, cpu_seconds, cpu_percent, now)
+
+    async def _sample_loop(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.sample_interval)
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The bot modules import each other by their bare names, like bot.py does
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(BACKEND), str(BACKEND / "bot")]
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import admission as admission_module
+import api
+from admission import AdmissionController, QueueFullError
+
+
+class Reading:
+    def __init__(self, percent=None):
+        self.percent = percent
+
+    def read_percent(self):
+        return self.percent
+
+
+@pytest.fixture(autouse=True)
+def idle_host(monkeypatch):
+    monkeypatch.setattr(admission_module, "read_memory_percent", lambda: None)
+
+
+def controller(running: int = 0, **kwargs) -> AdmissionController:
+    controller = AdmissionController(lambda: running, **kwargs)
+    controller.cpu_monitor = Reading()
+    return controller
+
+
+def test_admits_up_to_max_bots_in_order():
+    admission = controller(running=1, max_bots=3)
+    tickets = [admission.enqueue() for _ in range(4)]
+
+    admission._dispatch()
+
+    assert [t.admitted.is_set() for t in tickets] == [True, True, False, False]
+    assert [admission.position(t) for t in tickets] == [0, 0, 1, 2]
+
+    # Completing a ticket releases the slot it reserved
+    admission.complete(tickets[0])
+    admission._dispatch()
+
+    assert tickets[2].admitted.is_set()
+    assert not tickets[3].admitted.is_set()
+    assert admission.metrics()["admitted_total"] == 3
+    assert admission.wait_seconds.count == 3
+
+
+def test_busy_cpu_holds_the_queue():
+    admission = controller(max_cpu_percent=85.0)
+    admission.cpu_monitor = Reading(95.0)
+    ticket = admission.enqueue()
+
+    admission._dispatch()
+    assert not ticket.admitted.is_set()
+
+    admission.cpu_monitor = Reading(40.0)
+    admission._dispatch()
+    assert ticket.admitted.is_set()
+
+
+def test_unpolled_tickets_expire():
+    admission = controller(max_bots=0, ticket_ttl=30.0)
+    abandoned = admission.enqueue()
+    polled = admission.enqueue()
+    abandoned.last_seen -= 31
+    polled.last_seen -= 31
+
+    assert admission.get(polled.id) is polled
+    admission._dispatch()
+
+    assert admission.get(abandoned.id) is None
+    assert admission.get(polled.id) is polled
+    assert admission.metrics()["expired_total"] == 1
+
+
+def test_full_queue_rejects_requests():
+    admission = controller(max_bots=0, max_queue=2)
+    admission.enqueue()
+    admission.enqueue()
+
+    with pytest.raises(QueueFullError):
+        admission.enqueue()
+    assert admission.metrics()["rejected_total"] == 1
+
+
+def test_start_returns_503_when_queue_is_full(monkeypatch):
+    full = controller(max_bots=0, max_queue=1)
+    full.enqueue()
+    monkeypatch.setattr(api, "admission", full)
+
+    # Without entering the client, the app's lifespan (and its workers) is skipped
+    response = TestClient(api.app).get("/")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
@@ -0,0 +1,69 @@
+import asyncio
+import json
+from collections import Counter
+
+from bot_pool import BotWorker, BotWorkerPool
+
+
+class Stdin:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data: bytes):
+        self.lines.append(json.loads(data))
+
+    async def drain(self):
+        pass
+
+
+class Process:
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode = None
+        self.stdin = Stdin()
+        self.stdout = asyncio.StreamReader()
+
+    def send(self, event: dict):
+        self.stdout.feed_data(f"{json.dumps(event)}\n".encode())
+
+
+def test_burst_during_cold_start_spreads_over_workers():
+    async def main():
+        pool = BotWorkerPool(["bot"], ".")
+        spawned = []
+
+        async def spawn() -> BotWorker:
+            worker = BotWorker(Process(len(spawned)))
+            pool.workers.append(worker)
+            spawned.append(worker)
+            return worker
+
+        pool._spawn = spawn
+
+        async def connect() -> BotWorker:
+            worker = await pool.acquire()
+            await worker.assign("https://example.daily.co/room", "token")
+            return worker
+
+        connects = [asyncio.create_task(connect()) for _ in range(6)]
+        await asyncio.sleep(0)
+        # Every connect is waiting on the one cold-starting worker
+        assert len(spawned) == 1
+        spawned[0].process.send({"event": "ready", "capacity": 4})
+
+        async def second_spawn():
+            while len(spawned) < 2:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(second_spawn(), timeout=5)
+        spawned[1].process.send({"event": "ready", "capacity": 4})
+        workers = await asyncio.wait_for(asyncio.gather(*connects), timeout=5)
+
+        for worker in spawned:
+            worker.process.stdout.feed_eof()
+        return workers
+
+    workers = asyncio.run(main())
+
+    assert Counter(worker.pid for worker in workers) == {0: 4, 1: 2}
+    assert all(worker.free_slots >= 0 for worker in workers)
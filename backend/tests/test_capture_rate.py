@@ -0,0 +1,85 @@
+import asyncio
+
+import numpy as np
+import pytest
+from frame_processors import capture_rate
+from frame_processors.capture_rate import AdaptiveCaptureProcessor
+from pipecat.frames.frames import (
+    ImageRawFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(capture_rate, "time", clock)
+    return clock
+
+
+def screen(dark_columns: int = 0) -> ImageRawFrame:
+    pixels = np.full((64, 64, 3), 255, dtype=np.uint8)
+    pixels[:, :dark_columns] = 0
+    return ImageRawFrame(image=pixels.tobytes(), size=(64, 64), format="RGB")
+
+
+def rates(clock: Clock, steps) -> list:
+    """Current fps after each (frame, seconds to wait before it) step."""
+
+    async def main():
+        capture = AdaptiveCaptureProcessor(
+            min_fps=0.2, max_fps=2.0, burst_seconds=5.0, burst_threshold=0.02
+        )
+        seen = [capture.current_fps]
+        for frame, wait in steps:
+            clock.now += wait
+            if frame is not None:
+                await capture.process_frame(frame, FrameDirection.DOWNSTREAM)
+            seen.append(capture.current_fps)
+        return seen
+
+    return asyncio.run(main())
+
+
+def test_speech_raises_the_rate_until_the_burst_ends(clock):
+    assert rates(
+        clock,
+        [
+            (UserStartedSpeakingFrame(), 0),
+            (UserStoppedSpeakingFrame(), 10),
+            (None, 4.9),
+            (None, 0.2),
+        ],
+    ) == [0.2, 2.0, 2.0, 2.0, 0.2]
+
+
+def test_screen_changes_start_a_burst(clock):
+    assert rates(
+        clock,
+        [
+            # The first frame has nothing to compare with
+            (screen(), 0),
+            # A still screen falls back to the idle rate
+            (screen(), 5.1),
+            (screen(dark_columns=32), 5),
+            (None, 5.1),
+        ],
+    ) == [0.2, 2.0, 0.2, 2.0, 0.2]
+
+
+def test_rates_are_validated():
+    async def main():
+        AdaptiveCaptureProcessor(min_fps=2.0, max_fps=1.0)
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
@@ -0,0 +1,111 @@
+import numpy as np
+from frame_processors.change_detector import ChangeDetector, changed_regions
+from pipecat.frames.frames import ImageRawFrame
+
+WIDTH, HEIGHT = 640, 480
+
+
+def screen(pixels: np.ndarray) -> ImageRawFrame:
+    return ImageRawFrame(
+        image=pixels.tobytes(), size=(pixels.shape[1], pixels.shape[0]), format="RGB"
+    )
+
+
+def blank(value: int = 255) -> np.ndarray:
+    return np.full((HEIGHT, WIDTH, 3), value, dtype=np.uint8)
+
+
+def test_score_without_reference_is_full_change():
+    assert ChangeDetector().score(screen(blank())) == 1.0
+
+
+def test_identical_frame_scores_zero():
+    detector = ChangeDetector()
+    detector.set_reference(screen(blank()))
+
+    assert detector.score(screen(blank())) == 0.0
+
+
+def test_score_is_fraction_of_changed_cells():
+    detector = ChangeDetector(grid_size=32)
+    detector.set_reference(screen(blank()))
+
+    # The left quarter of the screen goes black
+    pixels = blank()
+    pixels[:, : WIDTH // 4] = 0
+
+    assert detector.score(screen(pixels)) == 0.25
+
+
+def test_small_brightness_changes_are_ignored():
+    detector = ChangeDetector(cell_threshold=8.0)
+    detector.set_reference(screen(blank(200)))
+
+    assert detector.score(screen(blank(205))) == 0.0
+    assert detector.score(screen(blank(220))) == 1.0
+
+
+def test_incomparable_screen_is_full_change():
+    detector = ChangeDetector(grid_size=32)
+    detector.set_reference(screen(blank()))
+
+    # Smaller than the grid, so its signature has a different shape
+    tiny = np.full((16, 16, 3), 255, dtype=np.uint8)
+
+    assert detector.score(screen(tiny)) == 1.0
+
+
+def test_no_regions_for_identical_frames():
+    assert changed_regions(blank(), blank()) == []
+
+
+def test_region_covers_changed_tiles():
+    current = blank()
+    current[40:50, 100:110] = 0
+
+    assert changed_regions(blank(), current, tile_size=32) == [(96, 32, 128, 64)]
+
+
+def test_nearby_changes_group_into_one_region():
+    current = blank()
+    # Two tiles apart with one unchanged tile between them
+    current[5, 5] = 0
+    current[5, 69] = 0
+
+    assert changed_regions(blank(), current, tile_size=32) == [(0, 0, 96, 32)]
+
+
+def test_distant_changes_stay_separate():
+    current = blank()
+    current[5, 5] = 0
+    current[400, 600] = 0
+
+    regions = changed_regions(blank(), current, tile_size=32)
+
+    assert sorted(regions) == [(0, 0, 32, 32), (576, 384, 608, 416)]
+
+
+def test_too_many_regions_merge_into_bounding_box():
+    current = blank()
+    for x in (5, 200, 400, 600):
+        current[5, x] = 0
+    current[400, 5] = 0
+
+    regions = changed_regions(blank(), current, tile_size=32, max_regions=4)
+
+    assert regions == [(0, 0, 608, 416)]
+
+
+def test_region_is_clipped_to_the_frame():
+    previous = np.full((50, 50, 3), 255, dtype=np.uint8)
+    current = previous.copy()
+    current[45, 45] = 0
+
+    assert changed_regions(previous, current, tile_size=32) == [(32, 32, 50, 50)]
+
+
+def test_differences_below_threshold_are_ignored():
+    current = blank()
+    current[10, 10] = 240
+
+    assert changed_regions(blank(), current, pixel_threshold=24) == []
@@ -0,0 +1,170 @@
+from context_manager import (
+    DROPPED_REFERENCE_TEXT,
+    MAX_MESSAGE_BREAKPOINTS,
+    ContextManager,
+    PromptCacheContext,
+)
+from pipecat.services.anthropic import AnthropicLLMContext
+
+
+def image(key: str, size: int = 100) -> dict:
+    return {
+        "type": "image",
+        "source": {"type": "base64", "media_type": "image/jpeg", "data": key * size},
+    }
+
+
+def add_turn(manager: ContextManager, keys=(), references=(), summary="summary"):
+    """Add a user turn laid out like MessageHandler.build_turn, and a reply."""
+    message = {"type": "text", "text": "What is on my screen?"}
+    summary_block = {"type": "text", "text": summary}
+    content = [message, summary_block]
+    notes = {}
+    for key in references:
+        notes[key] = {"type": "text", "text": f"[Same as screenshot {key}.]"}
+        content.append(notes[key])
+    images, labels = [], []
+    for key in keys:
+        labels.append({"type": "text", "text": f"Screenshot {key}:"})
+        images.append(image(key))
+        content += [labels[-1], images[-1]]
+
+    manager.context.add_message({"role": "user", "content": content})
+    manager.track_turn(
+        images, summary_block, list(keys), labels, notes, first_block=message
+    )
+    manager.context.add_message({"role": "assistant", "content": "It shows a page."})
+    return manager.context.messages[-2]
+
+
+def images_in(message: dict) -> list:
+    return [block for block in message["content"] if block["type"] == "image"]
+
+
+def test_only_newest_turns_keep_images():
+    manager = ContextManager(AnthropicLLMContext(), max_image_turns=2)
+    first = add_turn(manager, keys=["a"])
+    second = add_turn(manager, keys=["b"])
+    third = add_turn(manager, keys=["c"])
+
+    manager.compact()
+
+    assert images_in(first) == []
+    assert [block["type"] for block in first["content"]] == ["text", "text"]
+    assert len(images_in(second)) == 1
+    assert len(images_in(third)) == 1
+    assert manager.stats.last_image_count == 2
+
+
+def test_over_budget_keeps_images_of_newest_turn_only():
+    manager = ContextManager(AnthropicLLMContext(), max_bytes=250, max_image_turns=2)
+    first = add_turn(manager, keys=["a"], summary="old\nnewer")
+    second = add_turn(manager, keys=["b"])
+
+    size = manager.compact()
+
+    assert images_in(first) == []
+    assert first["content"][1]["text"] == "newer"
+    assert len(images_in(second)) == 1
+    assert size == manager.context_size()
+
+
+def test_referenced_image_outlives_its_turn():
+    manager = ContextManager(AnthropicLLMContext(), max_image_turns=2)
+    first = add_turn(manager, keys=["a"])
+    second = add_turn(manager, references=["a"])
+    add_turn(manager, keys=["b"])
+
+    manager.compact()
+
+    # The first turn aged out, but the second still points at its screenshot
+    assert len(images_in(first)) == 1
+    assert manager.has_image("a")
+
+    add_turn(manager, keys=["c"])
+    manager.compact()
+
+    assert images_in(first) == []
+    assert not manager.has_image("a")
+    assert second["content"][2]["text"] == DROPPED_REFERENCE_TEXT
+
+
+def test_turns_removed_from_context_are_forgotten():
+    manager = ContextManager(AnthropicLLMContext(), max_image_turns=2)
+    add_turn(manager, keys=["a"])
+    add_turn(manager, keys=["b"])
+    del manager.context.messages[:2]
+
+    manager.compact()
+
+    assert len(manager.turns) == 1
+    assert not manager.has_image("a")
+
+
+def cached_manager(**kwargs) -> ContextManager:
+    context = PromptCacheContext(
+        messages=[
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi, share your screen."},
+        ]
+    )
+    return ContextManager(context, max_image_turns=2, **kwargs)
+
+
+def test_breakpoint_ends_the_part_that_no_longer_changes():
+    manager = cached_manager()
+    add_turn(manager, keys=["a"])
+    add_turn(manager, keys=["b"])
+    manager.compact()
+
+    # The first turn with screenshots can still change, so the prefix ends
+    # with the reply before it
+    assert manager.context.cache_breakpoints == [(manager.context.messages[1], 0)]
+
+    add_turn(manager, keys=["c"])
+    manager.compact()
+
+    # The first turn aged and is now part of the prefix; the old breakpoint
+    # stays, it is what the next request reads from the cache
+    messages = manager.context.messages
+    assert manager.context.cache_breakpoints == [(messages[1], 0), (messages[3], 0)]
+
+
+def test_breakpoints_are_capped():
+    manager = cached_manager()
+    for key in "abcdef":
+        add_turn(manager, keys=[key])
+        manager.compact()
+
+    breakpoints = manager.context.cache_breakpoints
+    assert len(breakpoints) == MAX_MESSAGE_BREAKPOINTS
+    # The reply before the older of the two turns that keep their screenshots
+    assert breakpoints[-1] == (manager.context.messages[-5], 0)
+
+
+def test_markers_go_on_a_copy_of_the_breakpoint_blocks():
+    manager = cached_manager()
+    add_turn(manager, keys=["a"])
+    manager.compact()
+
+    marked = manager.context.get_messages_with_cache_control_markers()
+
+    assert marked[1]["content"] == [
+        {
+            "type": "text",
+            "text": "Hi, share your screen.",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    assert manager.context.messages[1]["content"] == "Hi, share your screen."
+    assert not any("cache_control" in block for block in marked[2]["content"])
+
+
+def test_breakpoints_reset_when_aged_turns_change():
+    manager = cached_manager(max_bytes=350)
+    for key in "abc":
+        add_turn(manager, keys=[key])
+        manager.compact()
+
+    assert manager.context_size() <= 350
+    assert len(manager.context.cache_breakpoints) == 1
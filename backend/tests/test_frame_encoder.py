@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+from frame_processors.frame_encoder import FrameEncoder
+
+
+def test_full_queue_drops_the_oldest_pending_job():
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking(name):
+        started.set()
+        release.wait(timeout=5)
+        return name
+
+    async def main():
+        encoder = FrameEncoder(max_workers=1, max_pending=2)
+        running = encoder.submit(blocking, "running")
+        await asyncio.to_thread(started.wait, 5)
+
+        oldest = encoder.submit(str, "oldest")
+        middle = encoder.submit(str, "middle")
+        newest = encoder.submit(str, "newest")
+        # Let the cancellation reach the asyncio side of the future
+        await asyncio.sleep(0)
+        assert oldest.cancelled()
+
+        release.set()
+        results = await asyncio.gather(running, middle, newest)
+        encoder.shutdown()
+        return encoder, results
+
+    encoder, results = asyncio.run(main())
+
+    assert results == ["running", "middle", "newest"]
+    assert encoder.frames_dropped == 1
@@ -0,0 +1,72 @@
+import io
+import json
+import queue
+import sys
+import textwrap
+import threading
+import time
+
+from hot_reload import ProcessManager
+
+WORKER = textwrap.dedent(
+    """
+    import json, os, sys
+
+    print(json.dumps({"event": "ready"}), flush=True)
+    for line in sys.stdin:
+        event = {"event": "assigned", "pid": os.getpid(), "line": line.strip()}
+        print(json.dumps(event), flush=True)
+    """
+)
+
+
+class Output(io.StringIO):
+    def events(self) -> list:
+        return [json.loads(line) for line in self.getvalue().splitlines()]
+
+
+def test_handoff_loses_no_assignment(tmp_path, monkeypatch):
+    worker = tmp_path / "worker.py"
+    worker.write_text(WORKER)
+    output = Output()
+    monkeypatch.setattr(sys, "stdout", output)
+
+    manager = ProcessManager(
+        str(worker), handoff=True, health_check_seconds=0.1, drain_timeout=10
+    )
+    manager.start_process()
+    assert manager.process.ready.wait(10)
+    first = manager.process.pid
+
+    lines = queue.Queue()
+    forwarder = threading.Thread(
+        target=manager.forward_stdin, args=(iter(lines.get, None),)
+    )
+    forwarder.start()
+    restart = threading.Thread(target=manager.restart_process)
+
+    sent = [str(i) for i in range(300)]
+    for i, line in enumerate(sent):
+        if i == 50:
+            restart.start()
+        lines.put(f"{line}\n")
+        time.sleep(0.002)
+    restart.join(10)
+    lines.put(None)
+    forwarder.join(10)
+    manager.drain()
+
+    events = output.events()
+    assigned = {
+        int(event["line"]): event["pid"]
+        for event in events
+        if event["event"] == "assigned"
+    }
+    assert sorted(assigned) == list(range(len(sent)))
+    # Once the replacement took over, nothing more went to the old process
+    replacement = manager.process.pid
+    old_lines = [i for i, pid in assigned.items() if pid == first]
+    new_lines = [i for i, pid in assigned.items() if pid == replacement]
+    assert len(old_lines) + len(new_lines) == len(sent)
+    assert max(old_lines) < min(new_lines)
+    assert sum(event["event"] == "ready" for event in events) == 1
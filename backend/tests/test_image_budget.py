@@ -0,0 +1,62 @@
+import base64
+import io
+
+import numpy as np
+from frame_processors.image_processor import (
+    PIXELS_PER_TOKEN,
+    ImageBudget,
+    encode_image,
+    fit_image,
+)
+from PIL import Image
+
+QUALITIES = (85, 70, 55, 40)
+
+
+def noise(width: int = 256, height: int = 256) -> Image.Image:
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3))
+    return Image.fromarray(pixels.astype(np.uint8))
+
+
+def encoded_length(image: Image.Image, quality: int) -> int:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return len(base64.b64encode(buffer.getvalue()))
+
+
+def decoded(block: dict) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(block["source"]["data"])))
+
+
+def test_budget_overrun_steps_down_the_quality_ladder():
+    image = noise()
+    # Too small for 85 and 70, large enough for 55
+    budget = ImageBudget(
+        max_request_bytes=encoded_length(image, 55), qualities=QUALITIES
+    )
+
+    block = encode_image(image, budget, max_images=1)
+
+    assert len(block["source"]["data"]) == encoded_length(image, 55)
+    assert decoded(block).size == image.size
+
+
+def test_image_shrinks_once_the_lowest_quality_overruns():
+    image = noise()
+    budget = ImageBudget(
+        max_request_bytes=encoded_length(image, 40) - 1, qualities=QUALITIES
+    )
+
+    block = encode_image(image, budget, max_images=1)
+
+    assert len(block["source"]["data"]) <= budget.max_request_bytes
+    assert decoded(block).size == (192, 192)
+
+
+def test_token_budget_is_shared_between_images():
+    budget = ImageBudget(max_request_tokens=1600)
+
+    fitted = fit_image(noise(1000, 1000), budget, max_images=4)
+
+    assert fitted.width * fitted.height <= 1600 * PIXELS_PER_TOKEN // 4
+    assert fitted.width == fitted.height
@@ -0,0 +1,51 @@
+import asyncio
+
+from frame_processors.image_processor import CONVERSATION_PROFILE, ImageManager
+from pipecat.frames.frames import ImageRawFrame
+
+
+def block(data: str) -> dict:
+    return {"type": "image", "source": {"data": data}}
+
+
+def test_failed_encode_is_skipped_and_the_rest_served():
+    async def main():
+        loop = asyncio.get_running_loop()
+        manager = ImageManager()
+        futures = []
+        for key, data in (("a" * 16, "first"), ("b" * 16, None), ("c" * 16, "third")):
+            future = loop.create_future()
+            if data is None:
+                future.set_exception(OSError("broken image"))
+            else:
+                future.set_result(({CONVERSATION_PROFILE: block(data)}, 0.0))
+            manager.frame_hashes.append(key)
+            manager.encoded_frames.append(future)
+            futures.append(future)
+
+        served = await manager.recent_images_with_hashes()
+        manager.encoder.shutdown()
+        return served, futures
+
+    served, futures = asyncio.run(main())
+
+    assert [key[0] for key, _ in served] == ["a", "c"]
+    assert [b["source"]["data"] for _, b in served] == ["first", "third"]
+    assert not any(future.cancelled() for future in futures)
+
+
+def test_failed_delta_encode_falls_back_to_full_frames():
+    frame = ImageRawFrame(image=bytes(12), size=(2, 2), format="RGB")
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        manager = ImageManager()
+        manager.set_summary_reference(frame)
+        failed = loop.create_future()
+        failed.set_exception(ValueError("bad crop"))
+        manager.encoder.submit = lambda *args: failed
+        images = await manager.delta_images_to_llm_messages(frame)
+        manager.encoder.shutdown()
+        return images
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,66 @@
+import asyncio
+
+from message_handler import MessageHandler
+from pipecat.services.anthropic import AnthropicLLMContext
+
+
+class Images:
+    """Stands in for ImageManager, serving a fixed list of encoded frames."""
+
+    def __init__(self, hashed_images=()):
+        self.hashed_images = list(hashed_images)
+
+    def get_frames(self) -> list:
+        return [object()] * len(self.hashed_images)
+
+    def get_summary(self) -> str:
+        return "The user is reading email."
+
+    async def recent_images_with_hashes(self, profile: str) -> list:
+        return self.hashed_images
+
+
+def image(key: str) -> tuple[str, dict]:
+    return key * 32, {"type": "image", "source": {"data": key * 100}}
+
+
+def texts(content: list) -> list:
+    return [block["text"] for block in content if block["type"] == "text"]
+
+
+def test_repeated_screenshots_are_referenced_once():
+    images = Images([image("a")])
+    handler = MessageHandler(AnthropicLLMContext(), images)
+    asyncio.run(handler.handle_new_message("What is this?", [object()]))
+    handler.context.add_message({"role": "assistant", "content": "An inbox."})
+
+    # Still on screen, then a new one, each captured twice
+    images.hashed_images = [image("a"), image("a"), image("b"), image("b")]
+    asyncio.run(handler.handle_new_message("And now?", [object()]))
+
+    content = handler.context.messages[-1]["content"]
+    assert [block["type"] for block in content].count("image") == 1
+    assert texts(content)[2:] == [
+        "[The screen looks the same as earlier screenshot aaaaaaaa.]",
+        "Screenshot bbbbbbbb:",
+    ]
+
+
+def test_prepared_turn_content_leaves_the_context_alone():
+    handler = MessageHandler(AnthropicLLMContext(), Images([image("a")]))
+
+    content = asyncio.run(handler.prepare_turn_content("Open my inbox"))
+
+    assert texts(content) == [
+        "Open my inbox",
+        "The user is reading email.",
+        "Screenshot aaaaaaaa:",
+    ]
+    assert handler.context.messages == []
+    assert handler.context_manager.turns == []
+
+
+def test_no_turn_content_without_frames():
+    handler = MessageHandler(AnthropicLLMContext(), Images())
+
+    assert asyncio.run(handler.prepare_turn_content("Hello")) == []
@@ -0,0 +1,115 @@
+from metrics import METRIC_PREFIX, Histogram, MetricsCollector
+
+
+class Worker:
+    def __init__(self, started_at: float = 100.0, ready_at: float = 101.5):
+        self.started_at = started_at
+        self.ready_at = ready_at
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+
+def report(session_id: str, frames: int, span_counts=None) -> dict:
+    event = {
+        "event": "session_metrics",
+        "session_id": session_id,
+        "counters": {"frames_received": frames},
+        "context_bytes": frames * 1000,
+    }
+    if span_counts:
+        event["latency"] = {
+            "spans": {
+                "turn_total": {
+                    "buckets": [0.5, 1.0],
+                    "counts": span_counts,
+                    "sum": 1.0,
+                    "count": sum(span_counts),
+                }
+            }
+        }
+    return event
+
+
+def samples(rendered: str) -> dict:
+    """Metric lines of a render, as name (with labels) -> value."""
+    lines = [line for line in rendered.splitlines() if not line.startswith("#")]
+    return dict(line.rsplit(" ", 1) for line in lines)
+
+
+def test_live_sessions_add_to_folded_totals():
+    metrics = MetricsCollector()
+    worker = Worker()
+    metrics.on_worker_event(worker, report("a", 10))
+    metrics.on_worker_event(worker, report("b", 5))
+    # Snapshots are cumulative, the latest replaces the previous one
+    metrics.on_worker_event(worker, report("a", 12))
+
+    assert samples(metrics.render())[f"{METRIC_PREFIX}_frames_received_total"] == "17"
+
+    metrics.on_worker_event(worker, {"event": "session_ended", "session_id": "a"})
+    rendered = samples(metrics.render())
+
+    assert rendered[f"{METRIC_PREFIX}_frames_received_total"] == "17"
+    assert rendered[f"{METRIC_PREFIX}_context_bytes"] == "5000"
+
+
+def test_sessions_of_exited_workers_are_folded():
+    metrics = MetricsCollector()
+    worker = Worker()
+    metrics.on_worker_event(worker, report("a", 3))
+    worker.returncode = -9
+
+    assert samples(metrics.render())[f"{METRIC_PREFIX}_frames_received_total"] == "3"
+    assert metrics.sessions == {}
+    assert metrics.counters["frames_received"] == 3
+
+
+def test_latency_histograms_merge_across_sessions():
+    metrics = MetricsCollector()
+    worker = Worker()
+    metrics.on_worker_event(worker, report("a", 1, span_counts=[1, 0, 0]))
+    metrics.on_worker_event(worker, report("b", 1, span_counts=[0, 2, 1]))
+    metrics.on_worker_event(worker, {"event": "session_ended", "session_id": "a"})
+
+    rendered = samples(metrics.render())
+    name = f"{METRIC_PREFIX}_turn_latency_seconds"
+
+    assert rendered[f'{name}_bucket{{span="turn_total",le="0.5"}}'] == "1"
+    assert rendered[f'{name}_bucket{{span="turn_total",le="1.0"}}'] == "3"
+    assert rendered[f'{name}_bucket{{span="turn_total",le="+Inf"}}'] == "4"
+    assert rendered[f'{name}_count{{span="turn_total"}}'] == "4"
+
+
+def test_gauges_without_a_value_are_left_out():
+    metrics = MetricsCollector()
+    metrics.add_gauge("bot_workers", "Workers", lambda: 3)
+    metrics.add_gauge("room_pool_ready", "Rooms", lambda: None)
+
+    rendered = metrics.render()
+
+    assert f"# TYPE {METRIC_PREFIX}_bot_workers gauge" in rendered
+    assert samples(rendered)[f"{METRIC_PREFIX}_bot_workers"] == "3"
+    assert "room_pool_ready" not in rendered
+
+
+def test_spawn_and_registered_histograms():
+    metrics = MetricsCollector()
+    metrics.on_worker_event(
+        Worker(started_at=100.0, ready_at=101.5), {"event": "ready"}
+    )
+    waits = Histogram((1.0, 5.0))
+    waits.observe(2.0)
+    metrics.add_histogram("admission_wait_seconds", "Waits", waits)
+
+    rendered = samples(metrics.render())
+
+    spawn = f"{METRIC_PREFIX}_bot_spawn_seconds"
+    assert rendered[f'{spawn}_bucket{{le="1.0"}}'] == "0"
+    assert rendered[f'{spawn}_bucket{{le="2.0"}}'] == "1"
+    assert rendered[f"{spawn}_sum"] == "1.500000"
+    wait = f"{METRIC_PREFIX}_admission_wait_seconds"
+    assert rendered[f'{wait}_bucket{{le="1.0"}}'] == "0"
+    assert rendered[f'{wait}_bucket{{le="5.0"}}'] == "1"
+    assert rendered[f"{wait}_count"] == "1"
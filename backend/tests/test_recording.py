@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from recording import RecordingReader, RecordingWriter
+
+
+def screen(shade: int) -> bytes:
+    pixels = np.full((64, 64, 3), 255, dtype=np.uint8)
+    pixels[8:24, 8:24] = shade
+    return pixels.tobytes()
+
+
+def test_frames_and_transcripts_round_trip(tmp_path):
+    path = str(tmp_path / "session.rec")
+    writer = RecordingWriter(path, keyframe_interval=10)
+    writer.write_frame(1.0, "RGB", (64, 64), screen(255))
+    writer.write_transcript(1.5, "open the settings")
+    writer.write_frame(2.0, "RGB", (64, 64), screen(0))
+    writer.close()
+
+    with RecordingReader(path) as reader:
+        assert reader.transcripts() == [(1.5, "open the settings")]
+        assert reader.frame_times == [1.0, 2.0]
+        # The second frame is a delta, rebuilt on top of the keyframe
+        _, image = reader.frame_at(2.5)
+        assert image.getpixel((16, 16))[0] < 32
+        assert image.getpixel((48, 48))[0] > 224
+    assert writer.stats.keyframes == 1
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not a recording, but long enough to hold a header")
+
+    with pytest.raises(ValueError):
+        RecordingReader(str(path))
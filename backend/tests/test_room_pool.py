@@ -0,0 +1,111 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from room_pool import DailyAPIError, PooledRoom, RoomPool
+
+
+class DailyRest:
+    def __init__(self, fail_deletes: bool = False, create_error=None):
+        self.fail_deletes = fail_deletes
+        self.create_error = create_error
+        self.created = 0
+        self.deleted = []
+
+    async def create_room(self, params):
+        if self.create_error:
+            raise self.create_error
+        self.created += 1
+        name = params.name or f"room-{self.created}"
+        return SimpleNamespace(url=f"https://example.daily.co/{name}", name=name)
+
+    async def get_token(self, room_url, expiry_time):
+        return f"token-{room_url}"
+
+    async def delete_room_by_name(self, name):
+        # Gives stop() a delete that is still running to wait for
+        await asyncio.sleep(0.01)
+        if self.fail_deletes:
+            raise RuntimeError("Daily API unavailable")
+        self.deleted.append(name)
+
+
+def room(name: str, expires_in: float) -> PooledRoom:
+    now = time.time()
+    return PooledRoom(
+        url=f"https://example.daily.co/{name}",
+        name=name,
+        token="token",
+        created_at=now,
+        expires_at=now + expires_in,
+    )
+
+
+def test_pooled_rooms_are_handed_out_before_creating_one():
+    async def main():
+        pool = RoomPool(DailyRest(), size=1)
+        pool.rooms.append(room("warm", expires_in=2 * 60 * 60))
+        return pool, await pool.acquire(), await pool.acquire()
+
+    pool, first, second = asyncio.run(main())
+
+    assert first.name == "warm"
+    assert second.name == "room-1"
+    assert (pool.hits_total, pool.misses_total) == (1, 1)
+
+
+def test_stop_waits_for_expired_rooms_to_be_deleted():
+    async def main():
+        daily = DailyRest()
+        pool = RoomPool(daily, size=1)
+        pool.rooms.append(room("stale", expires_in=60))
+        await pool.acquire()
+        assert pool._delete_tasks
+
+        await pool.stop()
+        return pool, daily
+
+    pool, daily = asyncio.run(main())
+
+    assert daily.deleted == ["stale"]
+    assert pool.expired_total == 1
+    assert not pool._delete_tasks
+
+
+def test_failed_deletes_do_not_fail_stop():
+    async def main():
+        pool = RoomPool(DailyRest(fail_deletes=True), size=1)
+        pool.rooms.append(room("stale", expires_in=60))
+        pool.rooms.append(room("warm", expires_in=2 * 60 * 60))
+        await pool.acquire()
+        await pool.stop()
+        return pool
+
+    assert asyncio.run(main()).rooms == []
+
+
+def test_fixed_name_rooms_are_kept_on_discard():
+    async def main():
+        daily = DailyRest()
+        pool = RoomPool(daily, room_name="demo")
+        acquired = await pool.acquire()
+        await pool.discard(acquired)
+        return acquired, daily
+
+    acquired, daily = asyncio.run(main())
+
+    assert acquired.name == "demo"
+    assert daily.deleted == []
+
+
+def test_failed_daily_calls_raise_daily_api_errors():
+    # DailyRESTHelper raises plain Exceptions for failed API calls
+    pool = RoomPool(DailyRest(create_error=Exception("status: 429")), size=0)
+    with pytest.raises(DailyAPIError):
+        asyncio.run(pool.acquire())
+
+    pool = RoomPool(DailyRest(create_error=TypeError("bug")), size=0)
+    with pytest.raises(TypeError):
+        asyncio.run(pool.acquire())
@@ -0,0 +1,106 @@
+import asyncio
+
+from frame_processors.routing import Branch, RoutedParallelPipeline
+from pipecat.frames.frames import (
+    EndFrame,
+    Frame,
+    ImageRawFrame,
+    TextFrame,
+    TranscriptionFrame,
+)
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+class Recorder(FrameProcessor):
+    def __init__(self, consume=()):
+        super().__init__()
+        self.consume = consume
+        self.frames = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        self.frames.append(frame)
+        if not isinstance(frame, self.consume):
+            await self.push_frame(frame, direction)
+
+
+def image() -> ImageRawFrame:
+    return ImageRawFrame(image=bytes(12), size=(2, 2), format="RGB")
+
+
+async def run(branches, frames):
+    after = Recorder()
+    task = PipelineTask(
+        Pipeline([RoutedParallelPipeline(*branches), after]), PipelineParams()
+    )
+    await task.queue_frames([*frames, EndFrame()])
+    await asyncio.wait_for(PipelineRunner(handle_sigint=False).run(task), timeout=5)
+    return after
+
+
+def data_frames(recorder: Recorder) -> list:
+    return [
+        frame
+        for frame in recorder.frames
+        if isinstance(frame, (TextFrame, ImageRawFrame))
+    ]
+
+
+def test_frames_reach_only_branches_that_take_them():
+    text, transcript, frame = (
+        TextFrame("hi"),
+        TranscriptionFrame("hey", "u", ""),
+        image(),
+    )
+
+    async def main():
+        conversation, vision = Recorder(), Recorder()
+        after = await run(
+            [
+                Branch([conversation], rejects=(ImageRawFrame,)),
+                Branch([vision], accepts=(ImageRawFrame, TranscriptionFrame)),
+            ],
+            [text, transcript, frame],
+        )
+        return conversation, vision, after
+
+    conversation, vision, after = asyncio.run(main())
+
+    assert data_frames(conversation) == [text, transcript]
+    assert data_frames(vision) == [transcript, frame]
+    # The transcript went through both branches but comes out once
+    assert data_frames(after) == [text, transcript, frame]
+
+
+def test_frame_consumed_by_one_branch_still_comes_out_of_the_other():
+    text = TextFrame("hi")
+
+    async def main():
+        return await run(
+            [Branch([Recorder(consume=(TextFrame,))]), Branch([Recorder()])],
+            [text],
+        )
+
+    assert data_frames(asyncio.run(main())) == [text]
+
+
+def test_every_branch_ends_before_the_pipeline_does():
+    async def main():
+        first, second = Recorder(), Recorder()
+        after = await run(
+            [
+                Branch([first], accepts=(TextFrame,)),
+                Branch([second], accepts=(ImageRawFrame,)),
+            ],
+            [],
+        )
+        return first, second, after
+
+    first, second, after = asyncio.run(main())
+
+    for recorder in (first, second):
+        assert sum(isinstance(f, EndFrame) for f in recorder.frames) == 1
+    assert sum(isinstance(f, EndFrame) for f in after.frames) == 1
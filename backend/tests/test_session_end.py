@@ -0,0 +1,60 @@
+import asyncio
+
+from frame_processors.image_processor import (
+    CONVERSATION_FRAMES,
+    ImageManager,
+    ProcessImageSummaryFrame,
+    SummarizeImageFrames,
+)
+from frame_processors.routing import Branch, RoutedParallelPipeline
+from pipecat.frames.frames import EndFrame, Frame, ImageRawFrame, TextFrame
+from pipecat.pipeline.pipeline import Pipeline
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+
+class Recorder(FrameProcessor):
+    def __init__(self):
+        super().__init__()
+        self.frames = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        self.frames.append(frame)
+        await self.push_frame(frame, direction)
+
+
+async def run_until_end(frames) -> Recorder:
+    image_manager = ImageManager()
+    summarize = SummarizeImageFrames(image_manager)
+    after = Recorder()
+    pipeline = Pipeline(
+        [
+            RoutedParallelPipeline(
+                Branch([Recorder()], rejects=(ImageRawFrame,)),
+                # The summary branch consumes most frames, it must still end
+                Branch(
+                    [
+                        summarize,
+                        Recorder(),
+                        ProcessImageSummaryFrame(image_manager, summarize),
+                    ],
+                    accepts=(ImageRawFrame, *CONVERSATION_FRAMES),
+                ),
+            ),
+            after,
+        ]
+    )
+    task = PipelineTask(pipeline, PipelineParams())
+    await task.queue_frames([*frames, EndFrame()])
+    await asyncio.wait_for(PipelineRunner(handle_sigint=False).run(task), timeout=5)
+    return after
+
+
+def test_pipeline_finishes_on_end_frame():
+    after = asyncio.run(run_until_end([TextFrame("hello")]))
+
+    ends = [frame for frame in after.frames if isinstance(frame, EndFrame)]
+    assert len(ends) == 1
+    assert any(isinstance(frame, TextFrame) for frame in after.frames)
@@ -0,0 +1,28 @@
+from frame_processors.speculation import last_user_text, transcripts_match
+from pipecat.services.anthropic import AnthropicLLMContext
+
+
+def test_transcripts_match_despite_punctuation_and_case():
+    assert transcripts_match("what's on my screen", "What's on my screen?", 0.9)
+    assert transcripts_match("open the settings page", "Open the setting page.", 0.9)
+    assert not transcripts_match("open the settings", "close the browser tab", 0.9)
+
+
+def test_last_user_text_reads_the_last_text_block():
+    context = AnthropicLLMContext()
+    assert last_user_text(context) == ""
+
+    context.add_message(
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Screenshot abcd1234:"},
+                {"type": "image", "source": {"data": ""}},
+                {"type": "text", "text": "What is this?"},
+            ],
+        }
+    )
+    assert last_user_text(context) == "What is this?"
+
+    context.add_message({"role": "assistant", "content": "An inbox."})
+    assert last_user_text(context) == ""
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from frame_processors import summary_cache
+from frame_processors.summary_cache import HASH_BITS, SummaryCache, perceptual_hash
+from pipecat.frames.frames import ImageRawFrame
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(summary_cache, "time", clock)
+    return clock
+
+
+def test_lookup_matches_close_hashes(clock):
+    cache = SummaryCache(max_distance=0.05)
+    cache.store(0b1011, "An inbox")
+
+    # Within 5% of the hash bits
+    assert cache.lookup(0b1011 ^ (1 << 40)) == "An inbox"
+    assert cache.lookup((1 << int(HASH_BITS * 0.1)) - 1) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SummaryCache(ttl_seconds=60)
+    cache.store(1, "A settings page")
+
+    clock.now += 59
+    assert cache.lookup(1) == "A settings page"
+
+    clock.now += 2
+    assert cache.lookup(1) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = SummaryCache(max_entries=2, max_distance=0)
+    cache.store(1, "first")
+    cache.store(2, "second")
+    # A hit makes the first entry the most recently used one
+    assert cache.lookup(1) == "first"
+
+    cache.store(3, "third")
+
+    assert cache.lookup(2) is None
+    assert cache.lookup(1) == "first"
+    assert cache.lookup(3) == "third"
+
+
+def test_similar_screens_share_a_hash():
+    pixels = np.full((480, 640, 3), 255, dtype=np.uint8)
+    pixels[:, :320] = 0
+    blinked = pixels.copy()
+    blinked[100:110, 400:402] = 0
+
+    def frame(image: np.ndarray) -> ImageRawFrame:
+        return ImageRawFrame(image=image.tobytes(), size=(640, 480), format="RGB")
+
+    inverted = frame(255 - pixels)
+    assert perceptual_hash(frame(pixels)) == perceptual_hash(frame(blinked))
+    distance = (perceptual_hash(frame(pixels)) ^ perceptual_hash(inverted)).bit_count()
+    assert distance == HASH_BITS
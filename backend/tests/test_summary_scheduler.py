@@ -0,0 +1,89 @@
+import pytest
+from frame_processors import summary_scheduler
+from frame_processors.summary_scheduler import SummaryScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(summary_scheduler, "time", clock)
+    return clock
+
+
+def test_summary_starts_when_idle(clock):
+    assert SummaryScheduler().may_start() == "idle"
+
+
+def test_conversation_holds_summaries(clock):
+    scheduler = SummaryScheduler(turn_hold_seconds=4.0)
+    scheduler.conversation_activity()
+
+    clock.now += 3.9
+    assert scheduler.may_start() is None
+
+    clock.now += 0.1
+    assert scheduler.may_start() == "idle"
+
+
+def test_deadline_overrides_the_hold(clock):
+    scheduler = SummaryScheduler(turn_hold_seconds=4.0, deadline_seconds=10.0)
+    scheduler.conversation_activity()
+    assert scheduler.may_start() is None
+
+    # Back-to-back turns keep extending the hold
+    for _ in range(3):
+        clock.now += 3.0
+        scheduler.conversation_activity()
+        assert scheduler.may_start() is None
+
+    clock.now += 1.0
+    scheduler.conversation_activity()
+    assert scheduler.may_start() == "deadline"
+    # The deferral was served, the next one waits a full deadline again
+    assert scheduler.may_start() is None
+
+
+def test_activity_cancels_summary_in_flight(clock):
+    scheduler = SummaryScheduler()
+    assert not scheduler.conversation_activity()
+
+    scheduler.started()
+    assert scheduler.conversation_activity()
+
+
+def test_summary_about_to_finish_is_not_cancelled(clock):
+    scheduler = SummaryScheduler(finish_grace_seconds=0.3)
+    scheduler.started()
+    clock.now += 2.0
+    scheduler.finished()
+    assert scheduler.expected_latency == 2.0
+
+    scheduler.started()
+    clock.now += 1.8
+    assert not scheduler.conversation_activity()
+
+    scheduler.cancelled()
+    scheduler.started()
+    clock.now += 1.0
+    assert scheduler.conversation_activity()
+
+
+def test_cancelled_summary_counts_toward_the_deadline(clock):
+    scheduler = SummaryScheduler(turn_hold_seconds=4.0, deadline_seconds=5.0)
+    scheduler.started()
+    scheduler.conversation_activity()
+    scheduler.cancelled()
+
+    clock.now += 3.0
+    scheduler.conversation_activity()
+    clock.now += 2.0
+
+    assert scheduler.may_start() == "deadline"
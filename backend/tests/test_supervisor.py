@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+
+from supervisor import BotSupervisor, read_process_usage
+
+
+class Worker:
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.started_at = time.time()
+        self.sessions = {}
+        self.event_handlers = []
+        self.exited = asyncio.get_running_loop().create_future()
+
+    def send(self, event: dict):
+        for handler in self.event_handlers:
+            handler(self, event)
+
+    def terminate(self):
+        if not self.exited.done():
+            self.exited.set_result(-15)
+
+    async def wait(self) -> int:
+        return await self.exited
+
+
+def test_sessions_are_counted_per_room_until_they_end():
+    async def main():
+        supervisor = BotSupervisor()
+        worker = Worker(1)
+        supervisor.track(worker, "a", "https://example.daily.co/one")
+        supervisor.track(worker, "b", "https://example.daily.co/one")
+        supervisor.track(worker, "c", "https://example.daily.co/two")
+        counts = [
+            supervisor.bots_in_room("https://example.daily.co/one"),
+            supervisor.running_bots,
+        ]
+
+        worker.send({"event": "session_ended", "session_id": "a"})
+        worker.send({"event": "session_rejected", "session_id": "c"})
+        counts += [
+            supervisor.bots_in_room("https://example.daily.co/one"),
+            supervisor.bots_in_room("https://example.daily.co/two"),
+            supervisor.running_bots,
+        ]
+        await supervisor.stop()
+        return counts
+
+    assert asyncio.run(main()) == [2, 3, 1, 0, 1]
+
+
+def test_exited_workers_are_reaped():
+    async def main():
+        supervisor = BotSupervisor()
+        worker = Worker(7)
+        worker.sessions = {"a": "https://example.daily.co/one"}
+        supervisor.track(worker, "a", "https://example.daily.co/one")
+        assert supervisor.status(7)["status"] == "running"
+
+        worker.exited.set_result(1)
+        await asyncio.sleep(0)
+        return supervisor
+
+    supervisor = asyncio.run(main())
+
+    assert supervisor.status(7)["status"] == "finished"
+    assert supervisor.status(7)["exit_code"] == 1
+    assert supervisor.workers == {}
+    assert supervisor.bots_in_room("https://example.daily.co/one") == 0
+
+
+def test_usage_is_read_from_proc():
+    rss_bytes, cpu_seconds = read_process_usage(os.getpid())
+
+    assert rss_bytes > 0
+    assert cpu_seconds > 0
+    assert read_process_usage(2**22 + 1) is None
@@ -0,0 +1,63 @@
+from tracing import (
+    CONTEXT_READY,
+    LLM_FIRST_TOKEN,
+    OUTPUT_STARTED,
+    TRANSCRIPTION,
+    TTS_FIRST_BYTE,
+    TURN_TOTAL_SPAN,
+    VAD_STOP,
+    LatencyHistogram,
+    TurnTracer,
+)
+
+
+def sums(tracer: TurnTracer) -> dict:
+    return {
+        name: round(histogram.total, 3)
+        for name, histogram in tracer.histograms.items()
+        if histogram.count
+    }
+
+
+def test_turn_spans_are_measured_from_the_last_pause():
+    tracer = TurnTracer()
+    tracer.mark(VAD_STOP, at=9.0)
+    # The user kept talking, the later pause starts the turn
+    tracer.mark(VAD_STOP, at=10.0)
+    tracer.mark(TRANSCRIPTION, at=10.2)
+    tracer.mark(CONTEXT_READY, at=10.25)
+    tracer.mark(LLM_FIRST_TOKEN, at=10.75)
+    tracer.mark(TTS_FIRST_BYTE, at=11.0)
+    tracer.mark(OUTPUT_STARTED, at=11.1)
+
+    assert sums(tracer) == {
+        "vad_to_transcription": 0.2,
+        "transcription_to_context": 0.05,
+        "llm_time_to_first_token": 0.5,
+        "tts_time_to_first_byte": 0.25,
+        "tts_to_output": 0.1,
+        TURN_TOTAL_SPAN: 1.1,
+    }
+    assert tracer.stats.turns_completed == 1
+
+
+def test_interrupted_reply_abandons_the_turn():
+    tracer = TurnTracer()
+    tracer.mark(VAD_STOP, at=1.0)
+    tracer.mark(LLM_FIRST_TOKEN, at=1.5)
+    tracer.mark(VAD_STOP, at=2.0)
+    tracer.mark(OUTPUT_STARTED, at=2.5)
+
+    assert tracer.stats.turns_abandoned == 1
+    assert sums(tracer) == {TURN_TOTAL_SPAN: 0.5}
+
+
+def test_histogram_quantiles_are_bucket_bounds():
+    histogram = LatencyHistogram(buckets=(0.5, 1.0))
+    for seconds in (0.1, 0.2, 0.7, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.5) == 0.5
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.snapshot()["p95"] is None
+    assert histogram.counts == [2, 1, 1]
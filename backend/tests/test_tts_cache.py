@@ -0,0 +1,53 @@
+from frame_processors.tts_cache import CachedAudio, TTSAudioCache, tts_cache_key
+
+
+def audio(num_bytes: int, first_word: str = "Hello") -> CachedAudio:
+    return CachedAudio(
+        audio=bytes(num_bytes),
+        sample_rate=16000,
+        words=[(first_word, 0.0), ("there", 0.3)],
+        first_audio_seconds=0.25,
+    )
+
+
+def test_keys_ignore_spacing_and_case_but_not_the_voice():
+    key = tts_cache_key("Hello  there", "voice", "sonic", {"speed": 1})
+
+    assert key == tts_cache_key("hello there", "voice", "sonic", {"speed": 1})
+    assert key != tts_cache_key("hello there", "other", "sonic", {"speed": 1})
+    assert key != tts_cache_key("hello there", "voice", "sonic", {"speed": 2})
+
+
+def test_hits_misses_and_eviction_by_size():
+    cache = TTSAudioCache(max_bytes=1000)
+    cache.put("a", audio(400))
+    cache.put("b", audio(400))
+    assert cache.get("missing") is None
+    # A hit makes "a" the most recently used entry
+    assert cache.get("a").words[0] == ("Hello", 0.0)
+
+    cache.put("c", audio(400))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size == 800
+
+
+def test_entry_larger_than_the_cache_is_still_kept():
+    cache = TTSAudioCache(max_bytes=100)
+    cache.put("a", audio(50))
+    cache.put("b", audio(500))
+
+    assert list(cache.entries) == ["b"]
+    assert cache.size == 500
+
+
+def test_entries_on_disk_outlive_the_cache(tmp_path):
+    TTSAudioCache(directory=str(tmp_path)).put("a", audio(320, first_word="Hi"))
+
+    entry = TTSAudioCache(directory=str(tmp_path)).get("a")
+
+    assert entry.audio == bytes(320)
+    assert entry.words == [("Hi", 0.0), ("there", 0.3)]
+    assert entry.duration == 0.01
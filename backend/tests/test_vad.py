@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+import pytest
+from vad import BatchedSileroInference
+
+
+class Session:
+    """Stands in for the ONNX session, failing any call with a NaN chunk."""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, outputs, inputs):
+        audio = inputs["input"]
+        self.calls.append(len(audio))
+        if np.isnan(audio).any():
+            raise ValueError("NaN in audio")
+        return audio[:, :1], inputs["state"]
+
+
+def test_bad_chunk_fails_alone():
+    session = Session()
+    inference = BatchedSileroInference(session, max_delay=0.5)
+    state = np.zeros((2, 1, 128), dtype="float32")
+    good = np.full((1, 576), 0.5, dtype="float32")
+    bad = np.full((1, 576), np.nan, dtype="float32")
+    results = {}
+
+    def score(name, audio):
+        try:
+            results[name] = inference.infer(audio, state, 16000)
+        except ValueError as e:
+            results[name] = e
+
+    threads = [
+        threading.Thread(target=score, args=args)
+        for args in (("good", good), ("bad", bad))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    inference.close()
+
+    out, _ = results["good"]
+    assert out[0, 0] == pytest.approx(0.5)
+    assert isinstance(results["bad"], ValueError)
+    # Both chunks went out in one batch, then were retried one by one
+    assert session.calls == [2, 1, 1]